@@ -1,15 +1,52 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import APIKeyHeader, HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
+from cachetools import TLRUCache
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
-from pydantic import BaseModel
+import hashlib
+import secrets
+import threading
+import time
+from sqlalchemy.orm import Session
 from app.config import settings
+from app.database.db import get_db
+from app.repositories.api_token_repository import ApiTokenRepository
+from app.services.cache import LocalCache
+from app.services.cache_invalidation import invalidation_bus
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+bearer_scheme = HTTPBearer(auto_error=False)
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
 
-class TokenData(BaseModel):
-    username: Optional[str] = None
+API_TOKEN_PREFIX = "w2w_"
+
+# Claims de JWT ya verificados, hasta que caduca cada token. Los paneles
+# consultan la API cada pocos segundos con el mismo token: así la firma solo se
+# comprueba la primera vez. El reloj es time.time porque "exp" es un timestamp.
+_claims_cache: TLRUCache = TLRUCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_MAX_SIZE,
+    ttu=lambda _token, claims, _now: claims["exp"],
+    timer=time.time
+)
+_claims_lock = threading.Lock()
+
+# Claves de API por hash; el bus de invalidación las elimina al revocarlas. Sin
+# bus (SQLite) la revocación desde la CLI no llega al servidor: TTL corto
+api_token_cache = LocalCache(
+    "api_token",
+    maxsize=settings.AUTH_TOKEN_CACHE_MAX_SIZE,
+    ttl=(
+        settings.API_TOKEN_CACHE_TTL_SECONDS if invalidation_bus.enabled
+        else min(settings.API_TOKEN_CACHE_TTL_SECONDS, settings.API_TOKEN_CACHE_TTL_SECONDS_LOCAL)
+    )
+)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="No se pudieron validar las credenciales",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
@@ -24,27 +61,70 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
-    """
-    Valida el token JWT y devuelve la información del usuario
-    """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="No se pudieron validar las credenciales",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def hash_api_token(token: str) -> str:
+    """sha256 de la clave: es lo único que se guarda en la base de datos"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def generate_api_token() -> str:
+    """Genera una clave de API nueva (se muestra una sola vez)"""
+    return API_TOKEN_PREFIX + secrets.token_urlsafe(32)
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Valida un JWT y devuelve sus claims, usando la caché si ya se verificó"""
+    with _claims_lock:
+        claims = _claims_cache.get(token)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
-        raise credentials_exception
-    
-    # Aquí normalmente buscarías al usuario en la base de datos
-    # Pero por simplicidad, devolvemos directamente la información del token
-    user = {"username": token_data.username}
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    if claims.get("sub") is None or claims.get("exp") is None:
+        raise _credentials_exception()
+    with _claims_lock:
+        _claims_cache[token] = claims
+    return claims
+
+def _principal_from_api_token(db: Session, token: str) -> Dict[str, Any]:
+    token_hash = hash_api_token(token)
+
+    def load() -> Optional[Dict[str, Any]]:
+        api_token = ApiTokenRepository.get_active_by_hash(db, token_hash)
+        if api_token is None:
+            return None
+        return {"sub": f"api_token:{api_token.id}", "name": api_token.name, "business_id": api_token.business_id}
+
+    principal = api_token_cache.get_or_load(token_hash, load)
+    if principal is None:
+        raise _credentials_exception()
+    return principal
+
+def get_current_user(
+    bearer: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    api_key: Optional[str] = Depends(api_key_scheme),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Valida el JWT (Authorization: Bearer) o la clave de API (X-API-Key) y
+    devuelve la identidad: sub y, si el acceso está limitado a un negocio,
+    business_id.
+    """
+    if not settings.AUTH_ENABLED:
+        return {"sub": "anonymous", "business_id": None}
+    if api_key:
+        return _principal_from_api_token(db, api_key)
+    if bearer is None:
+        raise _credentials_exception()
+    claims = decode_access_token(bearer.credentials)
+    return {"sub": claims["sub"], "business_id": claims.get("business_id")}
+
+async def require_business_access(request: Request, user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Dependencia de los routers protegidos. Una identidad limitada a un negocio
+    solo puede acceder a las rutas con ese business_id; el resto de rutas
+    (listados, creación, archivo, debug) exigen una identidad sin límite.
+    """
+    scope = user.get("business_id")
+    if scope is not None and str(scope) != request.path_params.get("business_id"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso no permitido a este negocio")
+    return user
@@ -0,0 +1,68 @@
+"""
+Gestión de credenciales desde la línea de comandos.
+
+    python -m app.auth.tokens create-key --name crm-sync [--business-id 3]
+    python -m app.auth.tokens list-keys
+    python -m app.auth.tokens revoke-key 7
+    python -m app.auth.tokens create-jwt --sub panel@negocio.com [--business-id 3] [--minutes 60]
+
+La clave de API solo se muestra al crearla; en la base de datos se guarda su sha256.
+
+Con Postgres, revoke-key invalida la clave en la caché de todos los workers
+(LISTEN/NOTIFY). Con SQLite no hay bus de invalidación: el servidor puede seguir
+aceptando la clave revocada hasta API_TOKEN_CACHE_TTL_SECONDS_LOCAL segundos.
+"""
+import argparse
+from datetime import timedelta
+from app.auth.auth import create_access_token, generate_api_token, hash_api_token
+from app.database.db import SessionLocal
+from app.repositories.api_token_repository import ApiTokenRepository
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Claves de API y tokens JWT")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    create_key = commands.add_parser("create-key", help="Crea una clave de API (cabecera X-API-Key)")
+    create_key.add_argument("--name", required=True)
+    create_key.add_argument("--business-id", type=int, default=None, help="Limita la clave a un negocio")
+    
+    commands.add_parser("list-keys", help="Lista las claves de API")
+    
+    revoke_key = commands.add_parser("revoke-key", help="Revoca una clave de API")
+    revoke_key.add_argument("token_id", type=int)
+    
+    create_jwt = commands.add_parser("create-jwt", help="Emite un JWT (Authorization: Bearer)")
+    create_jwt.add_argument("--sub", required=True)
+    create_jwt.add_argument("--business-id", type=int, default=None, help="Limita el token a un negocio")
+    create_jwt.add_argument("--minutes", type=int, default=None)
+    args = parser.parse_args()
+    
+    if args.command == "create-jwt":
+        claims = {"sub": args.sub}
+        if args.business_id is not None:
+            claims["business_id"] = args.business_id
+        expires = timedelta(minutes=args.minutes) if args.minutes else None
+        print(create_access_token(claims, expires))
+        return
+    
+    db = SessionLocal()
+    try:
+        if args.command == "create-key":
+            token = generate_api_token()
+            api_token = ApiTokenRepository.create(db, args.name, hash_api_token(token), args.business_id)
+            print(f"ID: {api_token.id}")
+            print(f"Clave (guárdala, no se volverá a mostrar): {token}")
+        elif args.command == "list-keys":
+            for api_token in ApiTokenRepository.get_all(db):
+                state = "activa" if api_token.is_active else f"revocada {api_token.revoked_at:%Y-%m-%d}"
+                scope = f"negocio {api_token.business_id}" if api_token.business_id else "todos los negocios"
+                print(f"{api_token.id}\t{api_token.name}\t{scope}\t{state}")
+        elif args.command == "revoke-key":
+            if not ApiTokenRepository.revoke(db, args.token_id):
+                parser.error(f"No existe la clave {args.token_id}")
+            print(f"Clave {args.token_id} revocada")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Any, Dict, Optional
+from app.repositories.analytics_repository import ADDITIVE_COLUMNS, AnalyticsRepository
+from app.schemas.analytics import BusinessAnalytics, DailyStats, StatsTotals
+
+class AnalyticsController:
+    """Controlador para las métricas diarias de los negocios"""
+    
+    @staticmethod
+    def _derived(counters: Dict[str, Any]) -> Dict[str, Any]:
+        """Añade la latencia media y la tasa de fallback a partir de los contadores"""
+        replies = counters["ai_replies"]
+        return {
+            **{column: counters[column] for column in ADDITIVE_COLUMNS if column != "ai_latency_ms_sum"},
+            "ai_latency_ms_max": counters["ai_latency_ms_max"],
+            "ai_latency_ms_avg": round(counters["ai_latency_ms_sum"] / replies, 1) if replies else None,
+            "ai_fallback_rate": round(counters["ai_fallbacks"] / replies, 4) if replies else None,
+        }
+    
+    @staticmethod
+    def get_business_analytics(
+        db: Session,
+        business_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> BusinessAnalytics:
+        """Obtiene las métricas diarias de un negocio (leídas del rollup, O(días))"""
+        rows = AnalyticsRepository.get_daily(db, business_id, start, end)
+        totals: Dict[str, Any] = {column: 0 for column in ADDITIVE_COLUMNS}
+        totals["ai_latency_ms_max"] = 0
+        days = []
+        for row in rows:
+            counters = {column: getattr(row, column) for column in (*ADDITIVE_COLUMNS, "ai_latency_ms_max")}
+            days.append(DailyStats(day=row.day, **AnalyticsController._derived(counters)))
+            for column in ADDITIVE_COLUMNS:
+                totals[column] += counters[column]
+            totals["ai_latency_ms_max"] = max(totals["ai_latency_ms_max"], counters["ai_latency_ms_max"])
+        return BusinessAnalytics(
+            business_id=business_id,
+            start=start,
+            end=end,
+            days=days,
+            totals=StatsTotals(**AnalyticsController._derived(totals))
+        )
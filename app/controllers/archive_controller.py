@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.conversation_session import ConversationSession
+from app.repositories.session_repository import SessionRepository
+from app.schemas.archive import ArchivedSession, ArchivedSessionSummary
+from app.services.archive_service import ArchiveService
+
+class ArchiveController:
+    """Controlador para consultar el archivo en frío de sesiones"""
+    
+    @staticmethod
+    def get_archived_session(db: Session, session_id: int) -> Optional[ArchivedSession]:
+        """Obtiene una sesión archivada con sus mensajes"""
+        session = db.query(ConversationSession).filter(ConversationSession.id == session_id).first()
+        if session is None or not session.archive_path:
+            return None
+        record = ArchiveService.read_session(session.archive_path, session.id)
+        if record is None:
+            return None
+        return ArchivedSession(
+            id=session.id,
+            contact_id=session.contact_id,
+            business_id=session.business_id,
+            status=session.status,
+            started_at=session.started_at,
+            ended_at=session.ended_at,
+            archived_at=session.archived_at,
+            context=record.get("context"),
+            messages=record.get("messages", [])
+        )
+    
+    @staticmethod
+    def get_archived_sessions_by_contact(db: Session, contact_id: int, skip: int = 0, limit: int = 100) -> List[ArchivedSessionSummary]:
+        """Lista las sesiones archivadas de un contacto"""
+        sessions = SessionRepository.get_archived_by_contact(db, contact_id, skip, limit)
+        return [ArchivedSessionSummary.model_validate(session) for session in sessions]
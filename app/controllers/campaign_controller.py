@@ -0,0 +1,108 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import json
+from app.models.campaign import Campaign
+from app.repositories.campaign_repository import CampaignRepository
+from app.schemas.campaign import CampaignCreate, CampaignInDB, CampaignRecipientOut
+from app.services.campaign_service import BUILTIN_VARIABLES, TemplateVariableError, template_variables
+
+# Transiciones de estado permitidas desde la API
+_TRANSITIONS = {
+    "start": ({"draft", "paused"}, "running"),
+    "pause": ({"running"}, "paused"),
+    "cancel": ({"draft", "running", "paused"}, "cancelled"),
+}
+
+class CampaignTransitionError(Exception):
+    """La campaña no admite la acción en su estado actual"""
+
+class CampaignController:
+    """Controlador para las campañas de envío masivo"""
+    
+    @staticmethod
+    def _to_schema(campaign: Campaign, progress: Dict[str, int]) -> CampaignInDB:
+        return CampaignInDB(
+            id=campaign.id,
+            business_id=campaign.business_id,
+            name=campaign.name,
+            template_name=campaign.template_name,
+            template_language=campaign.template_language,
+            status=campaign.status,
+            rate_per_second=campaign.rate_per_second,
+            total_recipients=campaign.total_recipients,
+            created_at=campaign.created_at,
+            started_at=campaign.started_at,
+            completed_at=campaign.completed_at,
+            progress=progress
+        )
+    
+    @staticmethod
+    def create_campaign(db: Session, business_id: int, data: CampaignCreate) -> CampaignInDB:
+        """Crea la campaña con sus destinatarios en una transacción"""
+        missing = set(template_variables(data.template_components)) - BUILTIN_VARIABLES - set(data.variables)
+        if data.recipients is not None:
+            missing = {name for name in missing if not all(name in recipient.variables for recipient in data.recipients)}
+        if missing:
+            raise TemplateVariableError(f"Variables sin valor en la plantilla: {', '.join(sorted(missing))}")
+        campaign = CampaignRepository.create(db, {
+            "business_id": business_id,
+            "name": data.name,
+            "template_name": data.template_name,
+            "template_language": data.template_language,
+            "template_components": json.dumps(data.template_components, ensure_ascii=False),
+            "variables": json.dumps(data.variables, ensure_ascii=False),
+            "rate_per_second": data.rate_per_second,
+            "status": "draft",
+        })
+        if data.recipients is not None:
+            total = CampaignRepository.add_recipients(db, campaign.id, business_id, {
+                recipient.contact_id: json.dumps(recipient.variables, ensure_ascii=False)
+                for recipient in data.recipients
+            })
+        else:
+            total = CampaignRepository.add_recipients_from_contacts(db, campaign.id, business_id, data.contact_ids)
+        campaign.total_recipients = total
+        db.commit()
+        if data.start:
+            CampaignRepository.set_status(db, campaign, "running")
+        return CampaignController.get_campaign(db, business_id, campaign.id)
+    
+    @staticmethod
+    def get_campaign(db: Session, business_id: int, campaign_id: int) -> Optional[CampaignInDB]:
+        campaign = CampaignRepository.get(db, business_id, campaign_id)
+        if campaign is None:
+            return None
+        progress = CampaignRepository.count_by_status(db, [campaign.id])[campaign.id]
+        return CampaignController._to_schema(campaign, progress)
+    
+    @staticmethod
+    def get_campaigns(db: Session, business_id: int, skip: int = 0, limit: int = 100) -> List[CampaignInDB]:
+        campaigns = CampaignRepository.get_all(db, business_id, skip, limit)
+        progress = CampaignRepository.count_by_status(db, [campaign.id for campaign in campaigns])
+        return [CampaignController._to_schema(campaign, progress[campaign.id]) for campaign in campaigns]
+    
+    @staticmethod
+    def change_status(db: Session, business_id: int, campaign_id: int, action: str) -> Optional[CampaignInDB]:
+        """Aplica start, pause o cancel; lanza CampaignTransitionError si no procede"""
+        campaign = CampaignRepository.get(db, business_id, campaign_id)
+        if campaign is None:
+            return None
+        allowed, target = _TRANSITIONS[action]
+        if campaign.status not in allowed:
+            raise CampaignTransitionError(f"No se puede aplicar {action} a una campaña en estado {campaign.status}")
+        CampaignRepository.set_status(db, campaign, target)
+        return CampaignController.get_campaign(db, business_id, campaign_id)
+    
+    @staticmethod
+    def get_recipients(
+        db: Session,
+        business_id: int,
+        campaign_id: int,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> Optional[List[CampaignRecipientOut]]:
+        if CampaignRepository.get(db, business_id, campaign_id) is None:
+            return None
+        recipients = CampaignRepository.get_recipients(db, campaign_id, status, skip, limit)
+        return [CampaignRecipientOut.model_validate(recipient) for recipient in recipients]
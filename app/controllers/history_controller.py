@@ -0,0 +1,80 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.conversation_session import ConversationSession
+from app.repositories.message_repository import MessageRepository
+from app.repositories.session_repository import SessionRepository
+from app.schemas.history import (
+    HistoryBusiness,
+    HistoryContact,
+    HistoryMessage,
+    HistorySession,
+    HistorySessionDetail
+)
+
+class HistoryController:
+    """Controlador para consultar el historial de conversaciones de un negocio"""
+    
+    @staticmethod
+    def _messages(session: ConversationSession) -> List[HistoryMessage]:
+        # Ya cargados por selectinload: ordenarlos no lanza consultas
+        messages = sorted(session.messages, key=lambda m: (m.timestamp, m.id))
+        return [HistoryMessage.model_validate(message) for message in messages]
+    
+    @staticmethod
+    def _session_fields(session: ConversationSession) -> dict:
+        return {
+            "id": session.id,
+            "status": session.status,
+            "is_active": session.is_active,
+            "started_at": session.started_at,
+            "last_activity": session.last_activity,
+            "ended_at": session.ended_at,
+            "context": session.context,
+            "archived": session.archived_at is not None,
+            "contact": HistoryContact.model_validate(session.contact) if session.contact else None,
+        }
+    
+    @staticmethod
+    def get_sessions(
+        db: Session,
+        business_id: int,
+        skip: int = 0,
+        limit: int = 50,
+        active: Optional[bool] = None,
+        include_messages: bool = False
+    ) -> List[HistorySession]:
+        """Lista las sesiones del negocio con su contacto (y opcionalmente sus mensajes)"""
+        sessions = SessionRepository.get_history_page(db, business_id, skip, limit, active, include_messages)
+        return [
+            HistorySession(
+                **HistoryController._session_fields(session),
+                messages=HistoryController._messages(session) if include_messages else None
+            )
+            for session in sessions
+        ]
+    
+    @staticmethod
+    def get_session(db: Session, business_id: int, session_id: int) -> Optional[HistorySessionDetail]:
+        """Obtiene una sesión del negocio con su contacto y todos sus mensajes"""
+        session = SessionRepository.get_history_detail(db, business_id, session_id)
+        if session is None:
+            return None
+        return HistorySessionDetail(
+            **HistoryController._session_fields(session),
+            business=HistoryBusiness.model_validate(session.business) if session.business else None,
+            messages=HistoryController._messages(session)
+        )
+    
+    @staticmethod
+    def get_session_messages(
+        db: Session,
+        business_id: int,
+        session_id: int,
+        skip: int = 0,
+        limit: int = 100
+    ) -> Optional[List[HistoryMessage]]:
+        """Página de mensajes de una sesión del negocio; None si la sesión no es del negocio"""
+        if not SessionRepository.belongs_to_business(db, session_id, business_id):
+            return None
+        messages = MessageRepository.get_session_page(db, session_id, skip, limit)
+        return [HistoryMessage.model_validate(message) for message in messages]
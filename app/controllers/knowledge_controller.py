@@ -0,0 +1,109 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import re
+from app.config import settings
+from app.repositories.knowledge_repository import KnowledgeRepository
+from app.schemas.knowledge import (
+    KnowledgeDocumentResult,
+    KnowledgeItemCreate,
+    KnowledgeItemInDB,
+    KnowledgeItemUpdate,
+    KnowledgeSearchHit,
+    KnowledgeSearchResult
+)
+from app.services.knowledge_index import KnowledgeIndexService
+
+_PARAGRAPHS = re.compile(r"\n\s*\n")
+
+class KnowledgeController:
+    """Controlador para la base de conocimiento de los negocios"""
+    
+    @staticmethod
+    def split_document(text: str, chunk_chars: int) -> List[Dict[str, Optional[str]]]:
+        """
+        Divide un documento en fragmentos de hasta chunk_chars caracteres
+        
+        Se respetan los párrafos (separados por una línea en blanco): se juntan
+        mientras quepan, y uno demasiado largo se corta por palabras. Un
+        encabezado Markdown (# Entrantes) da título a los fragmentos que le siguen.
+        """
+        chunks: List[Dict[str, Optional[str]]] = []
+        title: Optional[str] = None
+        current: List[str] = []
+        
+        def flush() -> None:
+            if current:
+                chunks.append({"title": title, "content": "\n\n".join(current)})
+                current.clear()
+        
+        for paragraph in _PARAGRAPHS.split(text):
+            paragraph = paragraph.strip()
+            if paragraph.startswith("#"):
+                heading, _, paragraph = paragraph.partition("\n")
+                flush()
+                title = heading.lstrip("#").strip()[:200] or None
+                paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            while len(paragraph) > chunk_chars:
+                cut = paragraph.rfind(" ", 0, chunk_chars)
+                cut = cut if cut > 0 else chunk_chars
+                flush()
+                current.append(paragraph[:cut].strip())
+                flush()
+                paragraph = paragraph[cut:].strip()
+            if sum(len(p) + 2 for p in current) + len(paragraph) > chunk_chars:
+                flush()
+            current.append(paragraph)
+        flush()
+        return chunks
+    
+    @staticmethod
+    def create_item(db: Session, business_id: int, data: KnowledgeItemCreate) -> KnowledgeItemInDB:
+        item = KnowledgeRepository.create(db, business_id, data.model_dump())
+        KnowledgeIndexService.refresh(db, business_id)
+        return KnowledgeItemInDB.model_validate(item)
+    
+    @staticmethod
+    def get_items(
+        db: Session,
+        business_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        source: Optional[str] = None
+    ) -> List[KnowledgeItemInDB]:
+        items = KnowledgeRepository.get_page(db, business_id, skip, limit, source)
+        return [KnowledgeItemInDB.model_validate(item) for item in items]
+    
+    @staticmethod
+    def update_item(db: Session, business_id: int, item_id: int, data: KnowledgeItemUpdate) -> Optional[KnowledgeItemInDB]:
+        item = KnowledgeRepository.update(db, business_id, item_id, data.model_dump(exclude_unset=True))
+        if item is None:
+            return None
+        KnowledgeIndexService.refresh(db, business_id)
+        return KnowledgeItemInDB.model_validate(item)
+    
+    @staticmethod
+    def delete_item(db: Session, business_id: int, item_id: int) -> bool:
+        deleted = KnowledgeRepository.delete(db, business_id, item_id)
+        if deleted:
+            KnowledgeIndexService.refresh(db, business_id)
+        return deleted
+    
+    @staticmethod
+    def put_document(db: Session, business_id: int, source: str, text: str) -> KnowledgeDocumentResult:
+        """Sustituye los fragmentos del documento por los del texto subido"""
+        chunks = KnowledgeController.split_document(text, settings.KNOWLEDGE_CHUNK_CHARS)
+        replaced = KnowledgeRepository.replace_source(db, business_id, source, chunks)
+        KnowledgeIndexService.refresh(db, business_id)
+        return KnowledgeDocumentResult(source=source, items=len(chunks), replaced=replaced)
+    
+    @staticmethod
+    def search(db: Session, business_id: int, query: str, k: int) -> KnowledgeSearchResult:
+        """Fragmentos que se añadirían al prompt para la consulta, con su puntuación"""
+        index = KnowledgeIndexService.get(db, business_id)
+        hits = []
+        for doc_id, score in index.search(query, k):
+            title, content = index.snippet(doc_id)
+            hits.append(KnowledgeSearchHit(id=doc_id, title=title, content=content, score=round(score, 4)))
+        return KnowledgeSearchResult(query=query, hits=hits)
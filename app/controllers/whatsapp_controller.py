@@ -1,6 +1,10 @@
-from typing import Dict, Any
+from typing import Optional
 import logging
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.logging_config import payload_logger, should_sample
+from app.models.whatsapp_model import WhatsAppWebhookEvent
+from app.services.webhook_queue import WebhookQueueService
 from app.services.whatsapp_service import WhatsAppService
 
 logger = logging.getLogger(__name__)
@@ -9,32 +13,41 @@ class WhatsAppController:
     """Controlador para manejar la lógica relacionada con WhatsApp"""
     
     @staticmethod
-    async def handle_webhook_data(webhook_data: Dict[str, Any], db: Session):
+    async def handle_webhook_data(event: WhatsAppWebhookEvent, db: Session, business_id: Optional[int] = None):
         """
-        Procesa los datos del webhook de WhatsApp
+        Procesa un evento del webhook de WhatsApp ya validado
         """
-        logger.info(f"Webhook data received: {webhook_data}")
+        logger.info("Webhook event received: %s with %d entries", event.object, len(event.entry))
+        if should_sample() and payload_logger.isEnabledFor(logging.INFO):
+            payload_logger.info("Webhook payload: %s", event.model_dump_json(by_alias=True, exclude_none=True))
         try:
-            if webhook_data.get("object") == "whatsapp_business_account":
-                for entry in webhook_data.get("entry", []):
-                    for change in entry.get("changes", []):
-                        if change.get("field") == "messages":
-                            value = change.get("value", {})
+            if settings.WEBHOOK_PROCESSING_MODE == "queue":
+                # Solo se persiste el evento; lo procesan los workers de la cola
+                queued = WebhookQueueService.enqueue_event(event, db, business_id)
+                logger.info("Queued %d webhook jobs", queued)
+                return {"status": "success"}
+            
+            if event.object == "whatsapp_business_account":
+                for entry in event.entry:
+                    for change in entry.changes:
+                        if change.field == "messages":
+                            value = change.value
                             
                             # Procesar mensajes entrantes
-                            if value.get("messages"):
-                                for message in value.get("messages", []):
-                                    # Pasamos el objeto value completo, no solo metadata
-                                    await WhatsAppService.process_message(message, value, db)
+                            for message in value.messages or []:
+                                # Pasamos el objeto value completo, no solo metadata
+                                await WhatsAppService.process_message(message, value, db, business_id)
                                     
                             # Procesar actualizaciones de estado
-                            if value.get("statuses"):
-                                for status in value.get("statuses", []):
-                                    await WhatsAppService.process_status_update(status, db)
-                                    
+                            for status in value.statuses or []:
+                                await WhatsAppService.process_status_update(status, db)
+            
+            # La sesión se cierra después de enviar la respuesta: que no retenga
+            # hasta entonces una transacción (en SQLite, la conexión de escritura)
+            db.commit()
             return {"status": "success"}
         except Exception as e:
-            logger.error(f"Error handling webhook data: {str(e)}", exc_info=True)
+            logger.error("Error handling webhook data: %s", e, exc_info=True)
             return {"status": "error", "message": str(e)}
     
     @staticmethod
@@ -1,17 +1,68 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
 from app.config import settings
+from app.database.replicas import in_read_only, replica_router
+from app.database.sqlite import create_sqlite_engines, is_sqlite
 
 # Configuración del engine de SQLAlchemy
-engine = create_engine(
-    settings.DATABASE_URL,
-    #echo=settings.DEBUG_MODE, # Mostrar SQL generado en consola si estamos en modo debug
-    pool_pre_ping=True, # Verificar conexión antes de usarla
-)
+if is_sqlite(settings.DATABASE_URL):
+    # Modo embebido: un escritor por proceso y lecturas en conexiones aparte (ver sqlite.py)
+    engine, read_engine = create_sqlite_engines(settings.DATABASE_URL)
+else:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        #echo=settings.DEBUG_MODE, # Mostrar SQL generado en consola si estamos en modo debug
+        pool_pre_ping=True, # Verificar conexión antes de usarla
+    )
+    read_engine = None
+
+class RoutingSession(Session):
+    """
+    Sesión que puede leer de una réplica.
+    
+    Solo en sesiones creadas con replica_reads (ReadSessionLocal, get_read_db)
+    y solo las consultas de métodos de repositorio marcados con @read_only.
+    La sesión usa siempre la misma réplica. En cuanto escribe algo, el resto
+    de sus lecturas van al primario (read-your-writes). Las sesiones normales,
+    como las de la ingesta de webhooks, trabajan siempre contra el primario.
+    
+    En SQLite las lecturas @read_only de cualquier sesión van al engine de
+    lectura mientras la transacción en curso no haya escrito: no hay retraso
+    que esperar, y así no ocupan la única conexión de escritura.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if read_engine is not None:
+            if self._flushing or clause is None or isinstance(clause, UpdateBase):
+                self.info["local_write"] = True
+            if self.info.get("local_write") or not in_read_only():
+                return super().get_bind(mapper, clause=clause, **kw)
+            return read_engine
+        if not self.info.get("replica_reads") or not replica_router.enabled:
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or clause is None or isinstance(clause, UpdateBase):
+            self.info["wrote"] = True
+        if self.info.get("wrote") or not in_read_only():
+            return super().get_bind(mapper, clause=clause, **kw)
+        if "replica" not in self.info:
+            self.info["replica"] = replica_router.choose()
+        return self.info["replica"] or super().get_bind(mapper, clause=clause, **kw)
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _end_local_write(session, transaction):
+    # Lo confirmado ya lo ve el engine de lectura de SQLite
+    if transaction.parent is None:
+        session.info.pop("local_write", None)
 
 # Clase de sesión que se usará para operaciónes con la BD
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# Sesiones de los endpoints de consulta: sus lecturas @read_only pueden ir a una réplica
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, info={"replica_reads": True}
+)
 
 # Clase base para los modelos
 Base = declarative_base()
@@ -19,6 +70,14 @@ Base = declarative_base()
 # Función para obtener una sesión de BD
 def get_db():
     db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Función para obtener una sesión de solo consulta (réplica si hay una al día)
+def get_read_db():
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
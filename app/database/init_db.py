@@ -1,5 +1,28 @@
+import os
 from app.database.db import Base, engine
 
-def create_tables():
-    """Crea todas las tablas en la base de datos"""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def create_tables(stamp: bool = False):
+    """
+    Crea todas las tablas en la base de datos.
+
+    Para instalaciones nuevas (y el modo embebido en SQLite): crea el esquema
+    actual y, con stamp=True, lo marca en Alembic como migrado a la última
+    revisión, así las actualizaciones posteriores se aplican con
+    alembic upgrade head. Una base de datos existente se actualiza solo con
+    Alembic. Uso: python -m app.database.init_db
+    """
+    # Importar los modelos para registrar sus tablas en Base.metadata
+    from app.models import analytics, api_token, business, campaign, contact, conversation_session, knowledge, message, webhook_job  # noqa: F401
+    Base.metadata.create_all(bind=engine)
+    if stamp:
+        from alembic import command
+        from alembic.config import Config
+        config = Config(os.path.join(PROJECT_DIR, "alembic.ini"))
+        config.set_main_option("script_location", os.path.join(PROJECT_DIR, "migrations"))
+        command.stamp(config, "head")
+
+if __name__ == "__main__":
+    create_tables(stamp=True)
+    print("Tablas creadas")
@@ -0,0 +1,118 @@
+"""
+Particiones mensuales de la tabla messages (solo Postgres).
+
+La migración b7e2d4c9a1f0 convierte messages en una tabla particionada por
+rango de `timestamp`; la tabla original queda como partición messages_legacy
+(desde MINVALUE hasta el primer mes particionado). Estas funciones crean las
+particiones de los próximos meses y eliminan las antiguas una vez vacías
+(tras archivar sus sesiones). En SQLite u otras bases de datos no hacen nada.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "messages"
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_{month:%Y_%m}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """Indica si messages es una tabla particionada en esta base de datos"""
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {"table": PARENT_TABLE}).scalar())
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if value.upper() == "MINVALUE" or value.upper() == "MAXVALUE":
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def list_partitions(connection: Connection) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+    """Devuelve (nombre, límite inferior, límite superior) de cada partición; None = sin límite"""
+    rows = connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": PARENT_TABLE}).all()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound or "")
+        if match is None:
+            # Partición DEFAULT: nunca se elimina automáticamente
+            continue
+        partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda p: p[2] or datetime.max)
+
+
+def ensure_partitions(connection: Connection, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """Crea las particiones del mes actual y de los `months_ahead` siguientes que falten"""
+    if not is_partitioned(connection):
+        return []
+    existing = list_partitions(connection)
+    first = month_start(today or datetime.utcnow().date())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(first, offset)
+        start = datetime.combine(month, datetime.min.time())
+        # Los meses ya cubiertos (p. ej. por la partición legacy) no se vuelven a crear
+        if any((lower is None or lower <= start) and (upper is None or start < upper) for _, lower, upper in existing):
+            continue
+        name = partition_name(month)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    if created:
+        logger.info("Creadas particiones de messages: %s", ", ".join(created))
+    return created
+
+
+def drop_partitions_before(connection: Connection, cutoff: datetime, action: str = "drop") -> List[str]:
+    """
+    Desvincula (action="detach") o elimina (action="drop") las particiones cuyo
+    rango termina antes de `cutoff` y que ya no tienen filas
+    """
+    if not is_partitioned(connection):
+        return []
+    removed = []
+    for name, _, upper in list_partitions(connection):
+        if upper is None or upper > cutoff:
+            continue
+        if connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            logger.info("La partición %s aún tiene mensajes sin archivar; se mantiene", name)
+            continue
+        connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        if action == "drop":
+            connection.execute(text(f"DROP TABLE {name}"))
+        removed.append(name)
+    if removed:
+        logger.info("Particiones antiguas de messages (%s): %s", action, ", ".join(removed))
+    return removed
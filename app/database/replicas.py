@@ -0,0 +1,175 @@
+import contextvars
+import functools
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_read_only: contextvars.ContextVar = contextvars.ContextVar("read_only", default=False)
+
+# Retraso de una réplica: 0 si ha aplicado todo lo recibido (aunque el
+# primario lleve un rato sin escribir); si no, la antigüedad de la última
+# transacción aplicada. En un primario (sin recuperación) también es 0.
+_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def read_only(func: Callable) -> Callable:
+    """
+    Marca un método de repositorio como de solo lectura.
+
+    Sus consultas pueden ir a una réplica si la sesión lo permite (ver
+    RoutingSession). No sirve para generadores: la marca se retira al volver.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+def in_read_only() -> bool:
+    return _read_only.get()
+
+
+@dataclass
+class _Replica:
+    name: str
+    engine: Engine
+    lag_seconds: Optional[float] = None
+    checked_at: float = 0.0
+    healthy: bool = False
+    last_error: Optional[str] = None
+    selected: int = 0
+
+
+class ReplicaRouter:
+    """
+    Elige la réplica para las lecturas, teniendo en cuenta su retraso.
+
+    El retraso de cada réplica se consulta como mucho cada
+    DB_REPLICA_LAG_CHECK_SECONDS, en el hilo que pide la réplica (solo uno a
+    la vez; el resto usa el último valor). Una réplica con más de
+    DB_REPLICA_MAX_LAG_SECONDS de retraso, o que ha fallado, no se usa hasta
+    la siguiente comprobación; si ninguna sirve, la lectura va al primario.
+    """
+
+    def __init__(self, urls: List[str], max_lag_seconds: float, check_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self.replicas = [
+            _Replica(name=f"replica{number}", engine=self._create_engine(url))
+            for number, url in enumerate(urls, start=1)
+        ]
+        self.primary_fallbacks = 0
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._lock = threading.Lock()
+        self._checking = set()
+
+    def _create_engine(self, url: str) -> Engine:
+        connect_args = {"connect_timeout": 2} if url.startswith("postgresql") else {}
+        engine = create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+
+        @event.listens_for(engine, "handle_error")
+        def on_error(context):
+            # Una desconexión retira la réplica hasta la siguiente comprobación
+            if context.is_disconnect:
+                self._mark_failed(engine, str(context.original_exception))
+
+        return engine
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def _mark_failed(self, engine: Engine, error: str) -> None:
+        for replica in self.replicas:
+            if replica.engine is engine:
+                replica.healthy = False
+                replica.last_error = error[:300]
+                replica.checked_at = time.monotonic()
+
+    def _check(self, replica: _Replica) -> None:
+        try:
+            with replica.engine.connect() as connection:
+                lag = float(connection.execute(_LAG_QUERY).scalar() or 0)
+            was_lagging = replica.lag_seconds is not None and replica.lag_seconds > self.max_lag_seconds
+            if lag > self.max_lag_seconds and not was_lagging:
+                logger.warning("Réplica %s retrasada %.1f s (máximo %.1f s): lecturas al primario", replica.name, lag, self.max_lag_seconds)
+            elif was_lagging and lag <= self.max_lag_seconds:
+                logger.info("Réplica %s al día de nuevo", replica.name)
+            replica.lag_seconds = lag
+            replica.healthy = True
+            replica.last_error = None
+        except Exception as e:
+            if replica.healthy or replica.last_error is None:
+                logger.warning("Réplica %s no disponible: %s", replica.name, e)
+            replica.healthy = False
+            replica.last_error = str(e)[:300]
+        finally:
+            replica.checked_at = time.monotonic()
+
+    def _usable(self, replica: _Replica) -> bool:
+        if time.monotonic() - replica.checked_at >= self.check_seconds:
+            with self._lock:
+                check = replica.name not in self._checking
+                if check:
+                    self._checking.add(replica.name)
+            if check:
+                try:
+                    self._check(replica)
+                finally:
+                    with self._lock:
+                        self._checking.discard(replica.name)
+        return replica.healthy and replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds
+
+    def choose(self) -> Optional[Engine]:
+        """Engine de una réplica utilizable (por turnos) o None para usar el primario"""
+        if not self.replicas:
+            return None
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = next(self._cycle)
+            if self._usable(replica):
+                replica.selected += 1
+                return replica.engine
+        self.primary_fallbacks += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_lag_seconds": self.max_lag_seconds,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "sessions": replica.selected,
+                    "last_error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.DB_REPLICA_LAG_CHECK_SECONDS
+)
@@ -0,0 +1,94 @@
+"""
+Modo embebido en SQLite para instalaciones de un solo nodo.
+
+SQLite admite muchos lectores pero un único escritor. Para no acabar en
+"database is locked" con webhooks concurrentes:
+
+- WAL: los lectores no bloquean al escritor ni el escritor a los lectores.
+- Un solo escritor por proceso: el engine de escritura tiene una única
+  conexión, así que las transacciones de escritura del proceso hacen cola en
+  el pool de SQLAlchemy en vez de competir por el bloqueo del fichero.
+- BEGIN IMMEDIATE: cada transacción de escritura toma el bloqueo al empezar.
+  Entre procesos (API, worker de la cola, tareas) la espera la resuelve
+  busy_timeout; con un BEGIN diferido, la transacción que lee y luego escribe
+  fallaría a mitad sin esperar.
+- Un engine de lectura con varias conexiones (query_only) para las consultas
+  de repositorio marcadas con @read_only, que no esperan al escritor.
+"""
+import logging
+from typing import Optional, Tuple
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def _configure(engine: Engine, begin: str, query_only: bool = False) -> None:
+    """Pragmas de cada conexión y sentencia con la que empieza cada transacción"""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # El driver no abre transacciones por su cuenta: las abre el evento begin
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        journal_mode = cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}").fetchone()[0]
+        if journal_mode.lower() not in (settings.SQLITE_JOURNAL_MODE.lower(), "memory") and not query_only:
+            # WAL no funciona, por ejemplo, en sistemas de ficheros de red
+            logger.warning("SQLite journal_mode=%s (se pidió %s)", journal_mode, settings.SQLITE_JOURNAL_MODE)
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        if query_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql(begin)
+
+
+def create_sqlite_engines(url: str) -> Tuple[Engine, Optional[Engine]]:
+    """
+    Crea el engine de escritura y el de lectura para una base de datos SQLite.
+
+    Returns:
+        (engine de escritura, engine de lectura o None si la base es en memoria)
+    """
+    connect_args = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    if _is_memory(url):
+        # Una base en memoria solo existe dentro de su conexión: se comparte una
+        writer = create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+        _configure(writer, "BEGIN IMMEDIATE")
+        return writer, None
+
+    writer = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_WRITER_WAIT_SECONDS,
+    )
+    _configure(writer, "BEGIN IMMEDIATE")
+
+    reader = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=settings.SQLITE_READ_POOL_SIZE,
+    )
+    _configure(reader, "BEGIN", query_only=True)
+    return writer, reader
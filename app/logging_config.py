@@ -0,0 +1,170 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+from app.config import settings
+
+# Campos de contexto que se añaden a cada registro del mensaje en curso
+CONTEXT_FIELDS = ("message_id", "business_id", "wa_id", "session_id")
+
+# Logger de los payloads completos del webhook (ver should_sample)
+payload_logger = logging.getLogger("app.payloads")
+
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+_listener: Optional[QueueListener] = None
+_handler: Optional["NonBlockingQueueHandler"] = None
+
+# uvicorn configura estos loggers con su propio StreamHandler y propagate=False
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Atributos estándar de LogRecord; el resto son campos 'extra'
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def truncate(value: Any, limit: Optional[int] = None) -> Any:
+    """Recorta cadenas largas indicando cuántos caracteres se omiten"""
+    limit = limit or settings.LOG_MAX_FIELD_LENGTH
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}...[+{len(value) - limit} chars]"
+    return value
+
+
+def should_sample() -> bool:
+    """Indica si se debe registrar un payload grande (muestreo)"""
+    rate = settings.LOG_PAYLOAD_SAMPLE_RATE
+    return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+
+@contextmanager
+def log_context(**fields: Any):
+    """Añade campos (message_id, business_id...) a todos los logs dentro del bloque"""
+    token = _log_context.set({**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler que en el hilo llamante solo interpola y recorta el mensaje.
+
+    La serialización JSON, el formateo de trazas y la escritura se hacen en el
+    hilo del QueueListener. Si la cola está llena el registro se descarta.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Interpolar aquí para no acceder a objetos (p. ej. ORM) desde otro hilo
+        record.msg = truncate(record.getMessage())
+        record.args = None
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        for key, value in list(vars(record).items()):
+            if key not in _RESERVED:
+                setattr(record, key, truncate(value))
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class ContextTextFormatter(logging.Formatter):
+    """Formato de texto clásico con los campos de contexto al final"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = " ".join(
+            f"{key}={getattr(record, key)}" for key in CONTEXT_FIELDS if hasattr(record, key)
+        )
+        return f"{line} [{context}]" if context else line
+
+
+def setup_logging() -> None:
+    """
+    Configura el logging raíz con una cola y un hilo de escritura en segundo plano
+
+    Los loggers de uvicorn pierden sus handlers y propagan al raíz: si no,
+    escribirían en stderr desde el event loop, sin pasar por la cola.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    if settings.LOG_FORMAT == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = ContextTextFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers.clear()
+    _handler = NonBlockingQueueHandler(log_queue)
+    root.addHandler(_handler)
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    root.setLevel(logging.INFO if settings.DEBUG_MODE else logging.WARNING)
+    # Los payloads muestreados se registran aunque el nivel general sea WARNING:
+    # LOG_PAYLOAD_SAMPLE_RATE > 0 ya es la decisión explícita de verlos
+    payload_logger.setLevel(logging.INFO if settings.LOG_PAYLOAD_SAMPLE_RATE > 0 else logging.WARNING)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def stats() -> Dict[str, Any]:
+    """Registros descartados por cola llena y registros pendientes de escribir"""
+    if _handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "dropped": _handler.dropped,
+        "pending": _handler.queue.qsize(),
+        "queue_size": _handler.queue.maxsize,
+    }
+
+
+def shutdown_logging() -> None:
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
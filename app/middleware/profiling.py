@@ -0,0 +1,236 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Collector:
+    """Acumula las muestras de pila de una petición"""
+
+    __slots__ = ("stacks", "samples", "frame")
+
+    def __init__(self, frame):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # Frame del middleware para esta petición: solo se cuentan las pilas que lo contienen
+        self.frame = frame
+
+
+class SamplingProfiler:
+    """
+    Profiler por muestreo de pila para las peticiones del webhook.
+
+    Un hilo en segundo plano lee periódicamente la pila del hilo del event loop
+    (sys._current_frames) mientras haya alguna petición perfilada en curso, y
+    genera ficheros en formato "collapsed stack" listos para flamegraph.pl o speedscope.
+    Cuando está desactivado no se arranca ningún hilo y el middleware solo hace
+    una comprobación de un booleano.
+
+    sys._current_frames da la pila del hilo entero, que en cada muestra puede
+    estar ejecutando otra tarea del event loop (otra petición, una tarea en
+    segundo plano). Solo se guardan las muestras cuya pila pasa por el frame
+    del middleware de la petición perfilada, es decir, las que ejecutan su
+    cadena de corrutinas; las demás se descartan. El trabajo que la petición
+    lanza en otras tareas (create_task) o en el executor no aparece en su
+    perfil. Para acotar el coste del muestreo solo se perfila una petición por
+    hilo a la vez; las que llegan mientras tanto se atienden sin perfilar (se
+    cuentan en skipped_concurrent).
+    """
+
+    def __init__(self):
+        self.enabled = settings.PROFILING_ENABLED
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.latency_threshold_ms = settings.PROFILING_LATENCY_THRESHOLD_MS
+        self.interval_ms = settings.PROFILING_INTERVAL_MS
+        self.path_prefix = settings.PROFILING_PATH_PREFIX
+        self.output_dir = settings.PROFILING_OUTPUT_DIR
+        self.max_files = settings.PROFILING_MAX_FILES
+        self.profiles_written = 0
+        self.skipped_concurrent = 0
+
+        self._lock = threading.Lock()
+        self._active: Dict[int, _Collector] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def get_config(self) -> Dict[str, Any]:
+        """Devuelve la configuración actual del profiler"""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "latency_threshold_ms": self.latency_threshold_ms,
+            "interval_ms": self.interval_ms,
+            "path_prefix": self.path_prefix,
+            "output_dir": self.output_dir,
+            "max_files": self.max_files,
+            "profiles_written": self.profiles_written,
+            "skipped_concurrent": self.skipped_concurrent,
+        }
+
+    def configure(self, **changes: Any) -> Dict[str, Any]:
+        """Actualiza la configuración en caliente"""
+        for key, value in changes.items():
+            if value is not None and hasattr(self, key):
+                setattr(self, key, value)
+        logger.info("Configuración del profiler actualizada: %s", changes)
+        return self.get_config()
+
+    def should_profile(self, path: str) -> bool:
+        """Decide si una petición debe perfilarse"""
+        if not path.startswith(self.path_prefix):
+            return False
+        if self.latency_threshold_ms > 0:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, thread_id: int, frame) -> Optional[_Collector]:
+        """
+        Registra una petición en curso en el hilo indicado (None si ya hay otra perfilándose)
+
+        frame es el frame de la corrutina del middleware: marca qué muestras son de esta petición.
+        """
+        with self._lock:
+            if thread_id in self._active:
+                self.skipped_concurrent += 1
+                return None
+            collector = self._active[thread_id] = _Collector(frame)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._sample_loop, name="profiler-sampler", daemon=True
+                )
+                self._thread.start()
+        return collector
+
+    def stop(self, thread_id: int, collector: _Collector) -> None:
+        """Deja de muestrear la petición"""
+        with self._lock:
+            if self._active.get(thread_id) is collector:
+                del self._active[thread_id]
+            collector.frame = None
+
+    def _sample_loop(self) -> None:
+        """Bucle del hilo de muestreo; termina cuando no quedan peticiones activas"""
+        while True:
+            time.sleep(self.interval_ms / 1000.0)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                targets = dict(self._active)
+
+            frames = sys._current_frames()
+            for thread_id, collector in targets.items():
+                frame = frames.get(thread_id)
+                if frame is None or not self._runs(frame, collector.frame):
+                    continue
+                collector.stacks[self._collapse(frame)] += 1
+                collector.samples += 1
+
+    @staticmethod
+    def _runs(frame, marker) -> bool:
+        """Si la pila que termina en frame pasa por marker (la tarea de la petición está ejecutándose)"""
+        while frame is not None:
+            if frame is marker:
+                return True
+            frame = frame.f_back
+        return False
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        """Convierte una pila en una línea 'raíz;...;hoja'"""
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        parts.reverse()
+        return ";".join(parts)
+
+    def should_write(self, elapsed_ms: float) -> bool:
+        """Solo se guardan las peticiones que superan el umbral, si hay umbral"""
+        return self.latency_threshold_ms <= 0 or elapsed_ms >= self.latency_threshold_ms
+
+    def write_profile(self, collector: _Collector, method: str, path: str, elapsed_ms: float) -> None:
+        """Escribe el perfil en disco y rota los ficheros antiguos"""
+        if not collector.samples:
+            return
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            slug = path.strip("/").replace("/", "_") or "root"
+            filename = os.path.join(
+                self.output_dir, f"{stamp}_{int(elapsed_ms)}ms_{method}_{slug}.collapsed"
+            )
+            with open(filename, "w", encoding="utf-8") as f:
+                for stack, count in collector.stacks.items():
+                    f.write(f"{stack} {count}\n")
+            self.profiles_written += 1
+            self._rotate()
+        except OSError as e:
+            logger.warning("No se pudo escribir el perfil: %s", e)
+
+    def _rotate(self) -> None:
+        """Elimina los perfiles más antiguos por encima de max_files"""
+        files = [
+            os.path.join(self.output_dir, name)
+            for name in os.listdir(self.output_dir)
+            if name.endswith(".collapsed")
+        ]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[: len(files) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila una muestra de las peticiones o las más lentas"""
+
+    def __init__(self, app, sampler: SamplingProfiler = profiler):
+        self.app = app
+        self.profiler = sampler
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.profiler.enabled
+            or scope["type"] != "http"
+            or not self.profiler.should_profile(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        thread_id = threading.get_ident()
+        collector = self.profiler.start(thread_id, sys._getframe())
+        if collector is None:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.profiler.stop(thread_id, collector)
+            if self.profiler.should_write(elapsed_ms):
+                # Escribir fuera del event loop para no añadir latencia
+                asyncio.get_running_loop().run_in_executor(
+                    None,
+                    self.profiler.write_profile,
+                    collector,
+                    scope.get("method", "GET"),
+                    scope["path"],
+                    elapsed_ms,
+                )
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from app.database.db import Base
+
+class BusinessDailyStats(Base):
+    """Métricas diarias por negocio, mantenidas de forma incremental por el trabajo de rollup"""
+    __tablename__ = "business_daily_stats"
+    
+    business_id = Column(Integer, ForeignKey("businesses.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    messages_in = Column(Integer, nullable=False, default=0)
+    messages_out = Column(Integer, nullable=False, default=0)
+    sessions_started = Column(Integer, nullable=False, default=0)
+    sessions_timed_out = Column(Integer, nullable=False, default=0)
+    sessions_closed_by_user = Column(Integer, nullable=False, default=0)
+    ai_replies = Column(Integer, nullable=False, default=0)
+    ai_fallbacks = Column(Integer, nullable=False, default=0)
+    ai_latency_ms_sum = Column(Integer, nullable=False, default=0)
+    ai_latency_ms_max = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<BusinessDailyStats(business_id={self.business_id}, day={self.day})>"
+
+class RollupWatermark(Base):
+    """Hasta dónde ha consolidado cada fuente el trabajo de rollup"""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String(50), primary_key=True)
+    last_id = Column(Integer, nullable=True)  # último id consolidado (fuentes por id)
+    next_id = Column(Integer, nullable=True)  # id máximo visto en la ejecución anterior
+    last_time = Column(DateTime, nullable=True)  # instante consolidado (fuentes por tiempo)
+    
+    def __repr__(self):
+        return f"<RollupWatermark(name={self.name}, last_id={self.last_id}, last_time={self.last_time})>"
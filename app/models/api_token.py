@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from datetime import datetime, timezone
+from app.database.db import Base
+
+class ApiToken(Base):
+    """Clave de API para clientes máquina; solo se guarda el sha256 de la clave"""
+    __tablename__ = "api_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=True)  # None: acceso a todos los negocios
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    revoked_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<ApiToken(id={self.id}, name={self.name}, business_id={self.business_id}, is_active={self.is_active})>"
@@ -16,9 +16,16 @@ class Business(Base):
     email = Column(String(100), nullable=True)
     website = Column(String(100), nullable=True)
     logo_url = Column(String(255), nullable=True)
+    opening_hours = Column(String(255), nullable=True)  # texto libre, p. ej. "L-V 9:00-18:00"
     
     # Configuración del bot
     system_prompt = Column(Text, nullable=True)  # Prompt personalizado para este negocio
+    reply_deadline_ms = Column(Integer, nullable=True)  # plazo de la respuesta de IA (None = AI_REPLY_DEADLINE_MS)
+    holding_message = Column(Text, nullable=True)  # mensaje de espera si la IA no responde a tiempo
+    late_reply_policy = Column(String(20), nullable=True)  # deliver | discard (None = AI_LATE_REPLY_POLICY)
+    inbound_rate_per_minute = Column(Integer, nullable=True)  # mensajes por contacto (None = INBOUND_RATE_PER_MINUTE)
+    inbound_burst = Column(Integer, nullable=True)  # ráfaga permitida (None = INBOUND_BURST)
+    intent_fast_path = Column(Boolean, nullable=True)  # False = todo a la IA, sin respuestas con los datos del negocio
     
     # Metadatos
     created_at = Column(DateTime, default=datetime.now(timezone.utc))
@@ -0,0 +1,62 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from app.database.db import Base
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class Campaign(Base):
+    """Envío masivo de una plantilla de WhatsApp aprobada a una selección de contactos"""
+    __tablename__ = "campaigns"
+    
+    id = Column(Integer, primary_key=True)
+    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False, index=True)
+    name = Column(String(100), nullable=False)
+    template_name = Column(String(512), nullable=True)  # plantilla aprobada en WhatsApp Business
+    template_language = Column(String(20), nullable=False, default="es", server_default="es")
+    template_components = Column(Text, nullable=True)  # JSON: componentes con variables {nombre} en los textos
+    variables = Column(Text, nullable=True)  # JSON: valores por defecto de las variables
+    status = Column(String(20), nullable=False, default="draft")  # draft, running, paused, completed, cancelled
+    rate_per_second = Column(Float, nullable=False, default=10.0)
+    total_recipients = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=_utcnow)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    
+    recipients = relationship("CampaignRecipient", back_populates="campaign")
+    
+    def __repr__(self):
+        return f"<Campaign(id={self.id}, business_id={self.business_id}, status={self.status})>"
+
+class CampaignRecipient(Base):
+    """
+    Destinatario de una campaña y su progreso: pending -> sending -> sent ->
+    delivered -> read, o failed. Los estados posteriores a sent llegan por el
+    webhook de estados.
+    """
+    __tablename__ = "campaign_recipients"
+    
+    id = Column(Integer, primary_key=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
+    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False)
+    wa_id = Column(String(30), nullable=False)
+    variables = Column(Text, nullable=True)  # JSON: variables propias de este destinatario
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=_utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    wa_message_id = Column(String(100), nullable=True, index=True)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
+    
+    campaign = relationship("Campaign", back_populates="recipients")
+    
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "contact_id", name="uq_campaign_recipients_campaign_contact"),
+        Index("ix_campaign_recipients_campaign_status_id", "campaign_id", "status", "id"),
+    )
+    
+    def __repr__(self):
+        return f"<CampaignRecipient(id={self.id}, campaign_id={self.campaign_id}, status={self.status})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database.db import Base
@@ -16,10 +16,26 @@ class ConversationSession(Base):
     context = Column(String(500), nullable=True)  # información sobre el propósito de la sesión
     business_id = Column(Integer, ForeignKey("businesses.id"), nullable=True)
     
+    # Resumen en segundo plano: las sesiones cerradas con summarized_at nulo están en cola
+    summarized_at = Column(DateTime, nullable=True)
+    summary_attempts = Column(Integer, nullable=False, default=0, server_default="0")  # intentos sin resumen de Gemini
+    summary_retry_at = Column(DateTime, nullable=True)  # no se reintenta antes de este instante
+    
+    # Archivo en frío: los mensajes de la sesión se mueven a un fichero JSONL comprimido
+    archive_path = Column(String(255), nullable=True)  # relativo a ARCHIVE_DIR
+    archived_at = Column(DateTime, nullable=True)
+    
     # Relaciones
     contact = relationship("Contact", back_populates="sessions")
     messages = relationship("Message", back_populates="session")
     business = relationship("Business", back_populates="sessions")
     
+    __table_args__ = (
+        Index("ix_conversation_sessions_archive_candidates", "is_active", "ended_at"),
+        Index("ix_conversation_sessions_started_at", "started_at"),
+        Index("ix_conversation_sessions_ended_at", "ended_at"),
+        Index("ix_conversation_sessions_summarized_at", "summarized_at"),
+    )
+    
     def __repr__(self):
         return f"<ConversationSession(id={self.id}, contact_id={self.contact_id}, active={self.is_active})>"
\ No newline at end of file
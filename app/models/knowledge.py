@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime, timezone
+from app.database.db import Base
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class KnowledgeItem(Base):
+    """
+    Fragmento de la base de conocimiento de un negocio (un plato, un producto,
+    un párrafo de un documento). Los más relevantes para cada mensaje se añaden
+    al prompt de Gemini.
+    """
+    __tablename__ = "knowledge_items"
+    
+    id = Column(Integer, primary_key=True)
+    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False, index=True)
+    title = Column(String(200), nullable=True)
+    content = Column(Text, nullable=False)
+    source = Column(String(200), nullable=True)  # documento del que sale el fragmento (None = elemento suelto)
+    created_at = Column(DateTime, default=_utcnow)
+    updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
+    
+    def __repr__(self):
+        return f"<KnowledgeItem(id={self.id}, business_id={self.business_id}, title='{self.title}')>"
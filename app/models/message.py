@@ -1,23 +1,39 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database.db import Base
 
 class Message(Base):
     __tablename__ = "messages"
+    # En Postgres la tabla está particionada por `timestamp` y un índice único tiene
+    # que incluirlo, así que wa_message_id es único junto con él (las reentregas de
+    # Meta repiten el timestamp del mensaje). Por lo mismo la clave primaria real es
+    # (id, timestamp); el modelo mantiene id, que ya es único por su secuencia.
+    __table_args__ = (
+        Index("uq_messages_wa_message_id_timestamp", "wa_message_id", "timestamp", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    wa_message_id = Column(String(100), unique=True, index=True)
+    wa_message_id = Column(String(100), index=True)
     contact_id = Column(Integer, ForeignKey("contacts.id"))
     direction = Column(String(10))  # "incoming" o "outgoing"
     message_type = Column(String(20))  # "tegxt", "imae", "audio", etc.
     content = Column(Text)
-    timestamp = Column(DateTime)
-    status = Column(String(20), default="received")  # received, sent, delivered, read, failed
+    timestamp = Column(DateTime, nullable=False)  # En Postgres, clave de partición mensual (ver app/database/partitions.py)
+    status = Column(String(20), default="received")  # received, throttled, sent, delivered, read, failed
     ai_processed = Column(Boolean, default=False)
     ai_response = Column(Text, nullable=True)
+    ai_latency_ms = Column(Integer, nullable=True)  # respuestas de IA: desde el mensaje guardado hasta el envío
+    ai_fallback = Column(Boolean, nullable=True)  # respuestas de IA: se envió una respuesta alternativa (caché o espera)
     created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    session_id = Column(Integer, ForeignKey("conversation_sessions.id"), nullable=True)
+    
+    # Medio descargado (imagen, audio, documento...), guardado por contenido en MEDIA_DIR
+    media_id = Column(String(100), nullable=True)
+    media_sha256 = Column(String(64), nullable=True, index=True)
+    media_mime_type = Column(String(100), nullable=True)
+    media_size = Column(BigInteger, nullable=True)
+    media_path = Column(String(255), nullable=True)
+    session_id = Column(Integer, ForeignKey("conversation_sessions.id"), nullable=True, index=True)
     
     # Relación con contacto
     contact = relationship("Contact", back_populates="messages")
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime, timezone
+from app.database.db import Base
+
+class WebhookJob(Base):
+    """Evento del webhook pendiente de procesar por los workers de la cola"""
+    __tablename__ = "webhook_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(20), nullable=False)  # "message" o "status"
+    ordering_key = Column(String(64), nullable=False)  # wa_id: los trabajos de un contacto se procesan en orden
+    business_id = Column(Integer, nullable=True)
+    payload = Column(Text, nullable=False)  # JSON con el mensaje/estado y el value del webhook
+    status = Column(String(20), nullable=False, default="pending")  # pending, processing, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    available_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    locked_until = Column(DateTime, nullable=True)
+    locked_by = Column(String(64), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    
+    __table_args__ = (
+        Index("ix_webhook_jobs_status_available_at", "status", "available_at"),
+        Index("ix_webhook_jobs_ordering_key_id", "ordering_key", "id"),
+    )
+    
+    def __repr__(self):
+        return f"<WebhookJob(id={self.id}, kind={self.kind}, status={self.status}, attempts={self.attempts})>"
@@ -1,24 +1,141 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+import logging
+from pydantic import BaseModel, Field, ValidationError, ValidatorFunctionWrapHandler, WrapValidator
+from typing import Annotated, Optional, List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+def _validate_each(value: Any, handler: ValidatorFunctionWrapHandler) -> List[Any]:
+    kept = []
+    first_error = None
+    for index, item in enumerate(value):
+        try:
+            kept.extend(handler([item]))
+        except ValidationError as e:
+            # loc empieza por la posición en la lista de un elemento: se sustituye por la real
+            first_error = first_error or (index, *e.errors(include_url=False)[0]["loc"][1:])
+    if len(kept) < len(value):
+        logger.warning(
+            "Webhook payload: %d of %d items skipped as invalid (%s)",
+            len(value) - len(kept), len(value), first_error
+        )
+    return kept
+
+
+def _skip_invalid_items(value: Any, handler: ValidatorFunctionWrapHandler) -> Any:
+    """
+    Valida una lista del webhook descartando solo los elementos inválidos.
+
+    Un lote de Meta puede traer muchas entradas, cambios y mensajes: uno mal
+    formado no debe hacer que se pierdan los demás. Si la lista entera es
+    válida (lo normal) se valida de una vez; si no, elemento a elemento.
+    """
+    try:
+        return handler(value)
+    except ValidationError:
+        if not isinstance(value, list):
+            raise
+        return _validate_each(value, handler)
+
+
+def _skip_invalid_each(value: Any, handler: ValidatorFunctionWrapHandler) -> Any:
+    """Como _skip_invalid_items, pero elemento a elemento desde el principio (listas con listas anidadas)"""
+    if not isinstance(value, list):
+        return handler(value)
+    return _validate_each(value, handler)
+
+
+# Listas de elementos sin listas tolerantes dentro (mensajes, estados, contactos)
+SkipInvalid = WrapValidator(_skip_invalid_items)
+# Entradas y cambios: suelen ser pocos, y validarlos de uno en uno evita
+# repetir la validación (y los avisos) de sus mensajes si uno de ellos falla
+SkipInvalidEach = WrapValidator(_skip_invalid_each)
 
 # Modelos para mensajes recibidos
+# Los campos desconocidos se ignoran, así que nuevos campos de Meta no rompen la validación
 class WhatsAppTextMessage(BaseModel):
     body: str
 
+class WhatsAppMedia(BaseModel):
+    """Contenido multimedia (image, audio, video, document, sticker)"""
+    id: str
+    mime_type: Optional[str] = None
+    sha256: Optional[str] = None
+    caption: Optional[str] = None
+    filename: Optional[str] = None
+    voice: Optional[bool] = None
+    animated: Optional[bool] = None
+
+class WhatsAppLocation(BaseModel):
+    latitude: float
+    longitude: float
+    name: Optional[str] = None
+    address: Optional[str] = None
+
+class WhatsAppReaction(BaseModel):
+    message_id: str
+    emoji: Optional[str] = None
+
+class WhatsAppReply(BaseModel):
+    """Respuesta a un botón o a una lista de un mensaje interactivo"""
+    id: str
+    title: str
+    description: Optional[str] = None
+
+class WhatsAppInteractive(BaseModel):
+    type: str
+    button_reply: Optional[WhatsAppReply] = None
+    list_reply: Optional[WhatsAppReply] = None
+
+class WhatsAppButton(BaseModel):
+    """Pulsación de un botón de respuesta rápida de una plantilla"""
+    payload: Optional[str] = None
+    text: str
+
+class WhatsAppMessageContext(BaseModel):
+    from_: Optional[str] = Field(None, alias="from")
+    id: Optional[str] = None
+    forwarded: Optional[bool] = None
+    frequently_forwarded: Optional[bool] = None
+
+class WhatsAppError(BaseModel):
+    code: int
+    title: Optional[str] = None
+    message: Optional[str] = None
+
 class WhatsAppContact(BaseModel):
-    profile: Dict[str, str]
+    profile: Dict[str, str] = Field(default_factory=dict)
     wa_id: str
 
 class WhatsAppMessageMetadata(BaseModel):
     display_phone_number: str
     phone_number_id: str
 
+MEDIA_TYPES = ("image", "audio", "video", "document", "sticker")
+
 class WhatsAppMessage(BaseModel):
     from_: str = Field(..., alias="from")
     id: str
     timestamp: str
     text: Optional[WhatsAppTextMessage] = None
     type: str
+    image: Optional[WhatsAppMedia] = None
+    audio: Optional[WhatsAppMedia] = None
+    video: Optional[WhatsAppMedia] = None
+    document: Optional[WhatsAppMedia] = None
+    sticker: Optional[WhatsAppMedia] = None
+    location: Optional[WhatsAppLocation] = None
+    reaction: Optional[WhatsAppReaction] = None
+    interactive: Optional[WhatsAppInteractive] = None
+    button: Optional[WhatsAppButton] = None
+    contacts: Optional[List[Dict[str, Any]]] = None  # Tarjetas de contacto compartidas
+    context: Optional[WhatsAppMessageContext] = None
+    errors: Optional[List[WhatsAppError]] = None
+
+    @property
+    def media(self) -> Optional[WhatsAppMedia]:
+        """Devuelve el contenido multimedia del mensaje, si lo tiene"""
+        return getattr(self, self.type, None) if self.type in MEDIA_TYPES else None
 
 class WhatsAppPricing(BaseModel):
     billable: bool
@@ -38,15 +155,18 @@ class WhatsAppStatus(BaseModel):
     status: str
     timestamp: str
     recipient_id: str
-    conversation: WhatsAppConversation
-    pricing: WhatsAppPricing
+    # Meta no envía conversation ni pricing en los estados "read"
+    conversation: Optional[WhatsAppConversation] = None
+    pricing: Optional[WhatsAppPricing] = None
+    errors: Optional[List[WhatsAppError]] = None
 
 class WhatsAppValueMessages(BaseModel):
-    messaging_product: str
-    metadata: WhatsAppMessageMetadata
-    contacts: Optional[List[WhatsAppContact]] = None
-    messages: Optional[List[WhatsAppMessage]] = None
-    statuses: Optional[List[WhatsAppStatus]] = None
+    # Opcionales para que los cambios de otros campos (no "messages") también validen
+    messaging_product: Optional[str] = None
+    metadata: Optional[WhatsAppMessageMetadata] = None
+    contacts: Annotated[Optional[List[WhatsAppContact]], SkipInvalid] = None
+    messages: Annotated[Optional[List[WhatsAppMessage]], SkipInvalid] = None
+    statuses: Annotated[Optional[List[WhatsAppStatus]], SkipInvalid] = None
 
 class WhatsAppChange(BaseModel):
     value: WhatsAppValueMessages
@@ -54,11 +174,11 @@ class WhatsAppChange(BaseModel):
 
 class WhatsAppEntry(BaseModel):
     id: str
-    changes: List[WhatsAppChange]
+    changes: Annotated[List[WhatsAppChange], SkipInvalidEach]
 
 class WhatsAppWebhookEvent(BaseModel):
     object: str
-    entry: List[WhatsAppEntry]
+    entry: Annotated[List[WhatsAppEntry], SkipInvalidEach]
 
 
 # Modelos para envío de mensajes
@@ -70,4 +190,19 @@ class WhatsAppSendMessage(BaseModel):
     recipient_type: str = "individual"
     to: str
     type: str = "text"
-    text: WhatsAppTextContent
\ No newline at end of file
+    text: WhatsAppTextContent
+
+class WhatsAppTemplateLanguage(BaseModel):
+    code: str
+
+class WhatsAppTemplateContent(BaseModel):
+    name: str
+    language: WhatsAppTemplateLanguage
+    components: List[Dict[str, Any]] = []
+
+class WhatsAppSendTemplateMessage(BaseModel):
+    messaging_product: str = "whatsapp"
+    recipient_type: str = "individual"
+    to: str
+    type: str = "template"
+    template: WhatsAppTemplateContent
@@ -0,0 +1,214 @@
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.models.analytics import BusinessDailyStats, RollupWatermark
+from app.models.conversation_session import ConversationSession
+from app.models.message import Message
+from app.database.replicas import read_only
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Contadores que se suman al consolidar; ai_latency_ms_max se combina con max
+ADDITIVE_COLUMNS = (
+    "messages_in",
+    "messages_out",
+    "sessions_started",
+    "sessions_timed_out",
+    "sessions_closed_by_user",
+    "ai_replies",
+    "ai_fallbacks",
+    "ai_latency_ms_sum",
+)
+
+
+def _as_date(value: Any) -> date:
+    # SQLite devuelve date() como texto
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+class AnalyticsRepository:
+    """
+    Repositorio de las métricas diarias por negocio (business_daily_stats).
+    
+    El rollup es incremental: cada fuente tiene una marca de agua en
+    rollup_watermarks y solo se agregan las filas nuevas desde la anterior
+    ejecución. Los incrementos y el avance de la marca se confirman en la misma
+    transacción, así que cada fila se contabiliza exactamente una vez.
+    """
+    
+    @staticmethod
+    def _watermark(db: Session, name: str) -> RollupWatermark:
+        watermark = db.query(RollupWatermark).filter(RollupWatermark.name == name).first()
+        if watermark is None:
+            watermark = RollupWatermark(name=name)
+            db.add(watermark)
+        return watermark
+    
+    @staticmethod
+    def _upsert(db: Session, deltas: Iterable[Dict[str, Any]]) -> int:
+        """Suma los incrementos a las filas (business_id, day) existentes o las crea"""
+        merged: Dict[Tuple[int, date], Dict[str, Any]] = {}
+        for delta in deltas:
+            key = (delta["business_id"], _as_date(delta["day"]))
+            row = merged.setdefault(key, {
+                "business_id": key[0], "day": key[1], "ai_latency_ms_max": 0,
+                **{column: 0 for column in ADDITIVE_COLUMNS},
+            })
+            for column in ADDITIVE_COLUMNS:
+                row[column] += int(delta.get(column) or 0)
+            row["ai_latency_ms_max"] = max(row["ai_latency_ms_max"], int(delta.get("ai_latency_ms_max") or 0))
+        if not merged:
+            return 0
+        
+        dialect = db.bind.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            greatest = func.greatest
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            greatest = func.max
+        else:
+            AnalyticsRepository._merge(db, merged)
+            return len(merged)
+        
+        table = BusinessDailyStats.__table__
+        statement = insert(table).values(list(merged.values()))
+        updates = {column: table.c[column] + statement.excluded[column] for column in ADDITIVE_COLUMNS}
+        updates["ai_latency_ms_max"] = greatest(table.c.ai_latency_ms_max, statement.excluded.ai_latency_ms_max)
+        db.execute(statement.on_conflict_do_update(index_elements=["business_id", "day"], set_=updates))
+        return len(merged)
+    
+    @staticmethod
+    def _merge(db: Session, merged: Dict[Tuple[int, date], Dict[str, Any]]) -> None:
+        """
+        Suma los incrementos leyendo las filas existentes (bases de datos sin ON CONFLICT)
+        
+        El rollup lo ejecuta un único worker (el líder), y las filas se bloquean
+        para el resto de la transacción donde la base de datos lo permite.
+        """
+        business_ids = {business_id for business_id, _ in merged}
+        days = {day for _, day in merged}
+        existing = {
+            (row.business_id, row.day): row
+            for row in db.query(BusinessDailyStats)
+            .filter(BusinessDailyStats.business_id.in_(business_ids), BusinessDailyStats.day.in_(days))
+            .with_for_update()
+        }
+        for key, values in merged.items():
+            row = existing.get(key)
+            if row is None:
+                db.add(BusinessDailyStats(**values))
+                continue
+            for column in ADDITIVE_COLUMNS:
+                setattr(row, column, getattr(row, column) + values[column])
+            row.ai_latency_ms_max = max(row.ai_latency_ms_max, values["ai_latency_ms_max"])
+        db.flush()
+    
+    @staticmethod
+    def rollup_messages(db: Session, batch_size: int) -> int:
+        """
+        Consolida los mensajes nuevos por id
+        
+        Solo se consolidan ids hasta el máximo visto en la ejecución anterior:
+        un id asignado por una transacción que aún no había confirmado no se
+        salta, porque las inserciones de mensajes confirman de inmediato y hay
+        un intervalo completo entre ejecuciones.
+        
+        Returns:
+            Número de ids consolidados
+        """
+        watermark = AnalyticsRepository._watermark(db, "messages")
+        current_max = db.query(func.max(Message.id)).scalar() or 0
+        lower = watermark.last_id or 0
+        high = watermark.next_id or 0
+        consolidated = 0
+        while lower < high:
+            upper = min(lower + batch_size, high)
+            rows = (
+                db.query(
+                    ConversationSession.business_id.label("business_id"),
+                    func.date(Message.timestamp).label("day"),
+                    func.sum(case((Message.direction == "incoming", 1), else_=0)).label("messages_in"),
+                    func.sum(case((Message.direction == "outgoing", 1), else_=0)).label("messages_out"),
+                    func.sum(case(((Message.direction == "outgoing") & (Message.ai_processed == True), 1), else_=0)).label("ai_replies"),
+                    func.sum(case((Message.ai_fallback == True, 1), else_=0)).label("ai_fallbacks"),
+                    func.sum(Message.ai_latency_ms).label("ai_latency_ms_sum"),
+                    func.max(Message.ai_latency_ms).label("ai_latency_ms_max"),
+                )
+                .join(ConversationSession, Message.session_id == ConversationSession.id)
+                .filter(Message.id > lower, Message.id <= upper)
+                .filter(ConversationSession.business_id.isnot(None))
+                .group_by(ConversationSession.business_id, func.date(Message.timestamp))
+                .all()
+            )
+            AnalyticsRepository._upsert(db, (dict(row._mapping) for row in rows))
+            watermark.last_id = upper
+            db.commit()
+            consolidated += upper - lower
+            lower = upper
+        watermark.next_id = max(current_max, high)
+        db.commit()
+        return consolidated
+    
+    @staticmethod
+    def rollup_sessions(db: Session, settle_seconds: int) -> int:
+        """
+        Consolida las sesiones iniciadas y cerradas por tiempo (started_at / ended_at)
+        
+        Se deja un margen de `settle_seconds` para no consolidar sesiones cuya
+        transacción aún no ha confirmado.
+        
+        Returns:
+            Número de filas de métricas actualizadas
+        """
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=settle_seconds)
+        updated = 0
+        
+        watermark = AnalyticsRepository._watermark(db, "sessions_started")
+        query = (
+            db.query(
+                ConversationSession.business_id.label("business_id"),
+                func.date(ConversationSession.started_at).label("day"),
+                func.count(ConversationSession.id).label("sessions_started"),
+            )
+            .filter(ConversationSession.business_id.isnot(None))
+            .filter(ConversationSession.started_at < cutoff)
+        )
+        if watermark.last_time is not None:
+            query = query.filter(ConversationSession.started_at >= watermark.last_time)
+        rows = query.group_by(ConversationSession.business_id, func.date(ConversationSession.started_at)).all()
+        updated += AnalyticsRepository._upsert(db, (dict(row._mapping) for row in rows))
+        watermark.last_time = cutoff
+        
+        watermark = AnalyticsRepository._watermark(db, "sessions_ended")
+        query = (
+            db.query(
+                ConversationSession.business_id.label("business_id"),
+                func.date(ConversationSession.ended_at).label("day"),
+                func.sum(case((ConversationSession.status == "timed_out", 1), else_=0)).label("sessions_timed_out"),
+                func.sum(case((ConversationSession.status == "closed_by_user", 1), else_=0)).label("sessions_closed_by_user"),
+            )
+            .filter(ConversationSession.business_id.isnot(None))
+            .filter(ConversationSession.ended_at < cutoff)
+        )
+        if watermark.last_time is not None:
+            query = query.filter(ConversationSession.ended_at >= watermark.last_time)
+        rows = query.group_by(ConversationSession.business_id, func.date(ConversationSession.ended_at)).all()
+        updated += AnalyticsRepository._upsert(db, (dict(row._mapping) for row in rows))
+        watermark.last_time = cutoff
+        
+        db.commit()
+        return updated
+    
+    @staticmethod
+    @read_only
+    def get_daily(db: Session, business_id: int, start: Optional[date] = None, end: Optional[date] = None) -> List[BusinessDailyStats]:
+        """Obtiene las métricas diarias de un negocio (end incluido), en orden cronológico"""
+        query = db.query(BusinessDailyStats).filter(BusinessDailyStats.business_id == business_id)
+        if start is not None:
+            query = query.filter(BusinessDailyStats.day >= start)
+        if end is not None:
+            query = query.filter(BusinessDailyStats.day <= end)
+        return query.order_by(BusinessDailyStats.day).all()
@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.models.api_token import ApiToken
+from app.services.cache_invalidation import invalidation_bus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ApiTokenRepository:
+    """Repositorio para las claves de API"""
+    
+    @staticmethod
+    def create(db: Session, name: str, token_hash: str, business_id: Optional[int] = None) -> ApiToken:
+        """Guarda una clave nueva (ya hasheada)"""
+        token = ApiToken(name=name, token_hash=token_hash, business_id=business_id)
+        db.add(token)
+        db.commit()
+        db.refresh(token)
+        logger.info("Clave de API creada: %s (ID: %s)", token.name, token.id, extra={"business_id": business_id})
+        return token
+    
+    @staticmethod
+    def get_active_by_hash(db: Session, token_hash: str) -> Optional[ApiToken]:
+        """Busca una clave activa por su hash (índice único)"""
+        return db.query(ApiToken).filter(
+            ApiToken.token_hash == token_hash,
+            ApiToken.is_active == True
+        ).first()
+    
+    @staticmethod
+    def get_all(db: Session) -> List[ApiToken]:
+        return db.query(ApiToken).order_by(ApiToken.id).all()
+    
+    @staticmethod
+    def revoke(db: Session, token_id: int) -> bool:
+        """Revoca una clave y la elimina de la caché de todos los workers"""
+        token = db.query(ApiToken).filter(ApiToken.id == token_id).first()
+        if token is None:
+            return False
+        token.is_active = False
+        token.revoked_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        invalidation_bus.publish(db, "api_token", token.token_hash)
+        db.commit()
+        logger.info("Clave de API revocada: %s (ID: %s)", token.name, token.id)
+        return True
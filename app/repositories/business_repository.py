@@ -1,6 +1,11 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
+import csv
+import io
 from app.models.business import Business
+from app.services.cache_invalidation import invalidation_bus
+from app.database.replicas import read_only
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,25 +35,29 @@ class BusinessRepository:
         db.add(business)
         db.commit()
         db.refresh(business)
-        logger.info(f"Nuevo negocio creado: {business.name} (ID: {business.id})")
+        logger.info("Nuevo negocio creado: %s (ID: %s)", business.name, business.id, extra={"business_id": business.id})
         return business
     
     @staticmethod
+    @read_only
     def get_by_id(db: Session, business_id: int) -> Optional[Business]:
         """Obtiene un negocio por su ID"""
         return db.query(Business).filter(Business.id == business_id).first()
     
     @staticmethod
+    @read_only
     def get_by_name(db: Session, name: str) -> Optional[Business]:
         """Obtiene un negocio por su nombre (búsqueda exacta)"""
         return db.query(Business).filter(Business.name == name).first()
     
     @staticmethod
+    @read_only
     def search_by_name(db: Session, name_query: str) -> List[Business]:
         """Busca negocios por nombre (búsqueda parcial)"""
         return db.query(Business).filter(Business.name.ilike(f"%{name_query}%")).all()
     
     @staticmethod
+    @read_only
     def get_all(db: Session, skip: int = 0, limit: int = 100, active_only: bool = True) -> List[Business]:
         """Obtiene todos los negocios"""
         query = db.query(Business)
@@ -76,9 +85,11 @@ class BusinessRepository:
         for key, value in business_data.items():
             setattr(business, key, value)
         
+        # Avisar al resto de workers; se entrega al confirmar la transacción
+        invalidation_bus.publish(db, "business", business_id)
         db.commit()
         db.refresh(business)
-        logger.info(f"Negocio actualizado: {business.name} (ID: {business.id})")
+        logger.info("Negocio actualizado: %s (ID: %s)", business.name, business.id, extra={"business_id": business.id})
         return business
     
     @staticmethod
@@ -103,6 +114,53 @@ class BusinessRepository:
         else:
             business.is_active = False
         
+        invalidation_bus.publish(db, "business", business_id)
         db.commit()
-        logger.info(f"Negocio {'eliminado' if hard_delete else 'desactivado'}: {business.name} (ID: {business.id})")
-        return True
\ No newline at end of file
+        logger.info(
+            "Negocio %s: %s (ID: %s)",
+            "eliminado" if hard_delete else "desactivado",
+            business.name,
+            business_id,
+            extra={"business_id": business_id}
+        )
+        return True
+    
+    # Columnas que se cargan en las importaciones masivas, en el orden del COPY
+    BULK_COLUMNS = (
+        "name", "description", "business_type", "address", "phone", "email",
+        "website", "logo_url", "opening_hours", "system_prompt", "reply_deadline_ms", "holding_message",
+        "late_reply_policy", "inbound_rate_per_minute", "inbound_burst", "intent_fast_path", "created_at",
+        "updated_at", "is_active"
+    )
+    
+    @staticmethod
+    def bulk_insert(db: Session, rows: List[Dict[str, Any]]) -> int:
+        """
+        Inserta muchos negocios de una vez (sin confirmar la transacción).
+        
+        En Postgres usa COPY, que evita el coste por sentencia del INSERT; en el
+        resto de bases de datos, un INSERT con executemany. Las filas deben traer
+        todas las columnas de BULK_COLUMNS; en COPY las cadenas vacías se cargan
+        como NULL.
+        """
+        if not rows:
+            return 0
+        if db.bind.dialect.name != "postgresql":
+            db.execute(insert(Business.__table__), rows)
+            return len(rows)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            # En el formato CSV de COPY un campo vacío sin comillas es NULL
+            writer.writerow([row[column] for column in BusinessRepository.BULK_COLUMNS])
+        buffer.seek(0)
+        cursor = db.connection().connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY businesses ({', '.join(BusinessRepository.BULK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+        return len(rows)
@@ -0,0 +1,246 @@
+from sqlalchemy import func, insert, literal, select, text, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+from app.models.campaign import Campaign, CampaignRecipient
+from app.models.contact import Contact
+from app.database.replicas import read_only
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Reclama destinatarios pendientes (o en envío con el lease caducado: worker
+# caído a mitad de lote) de una campaña, en orden de alta
+_CLAIM_SQL = """
+UPDATE campaign_recipients
+SET status = 'sending',
+    attempts = attempts + 1,
+    locked_until = :locked_until
+WHERE id IN (
+    SELECT r.id FROM campaign_recipients r
+    WHERE r.campaign_id = :campaign_id
+    AND (
+        (r.status = 'pending' AND r.available_at <= :now)
+        OR (r.status = 'sending' AND r.locked_until < :now)
+    )
+    ORDER BY r.id
+    LIMIT :limit
+    {lock_clause}
+)
+RETURNING id, contact_id, wa_id, variables, attempts
+"""
+
+# Estados de entrega que puede tener un destinatario antes de cada estado del
+# webhook: los estados solo avanzan (un "delivered" tardío no pisa un "read")
+_PREVIOUS_STATUSES = {
+    "delivered": ("sent",),
+    "read": ("sent", "delivered"),
+    "failed": ("sent", "delivered"),
+}
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class CampaignRepository:
+    """Repositorio de campañas y de sus destinatarios"""
+    
+    @staticmethod
+    def create(db: Session, campaign_data: Dict[str, Any]) -> Campaign:
+        """Crea la campaña (sin confirmar la transacción, para añadir los destinatarios)"""
+        campaign = Campaign(**campaign_data)
+        db.add(campaign)
+        db.flush()
+        return campaign
+    
+    @staticmethod
+    def add_recipients_from_contacts(
+        db: Session,
+        campaign_id: int,
+        business_id: int,
+        contact_ids: Optional[List[int]] = None
+    ) -> int:
+        """Añade como destinatarios los contactos del negocio (todos o los indicados) con un INSERT ... SELECT"""
+        now = _utcnow()
+        selection = select(
+            literal(campaign_id),
+            Contact.id,
+            Contact.wa_id,
+            literal("pending"),
+            literal(0),
+            literal(now),
+            literal(now)
+        ).where(Contact.business_id == business_id, Contact.wa_id.isnot(None))
+        if contact_ids is not None:
+            selection = selection.where(Contact.id.in_(contact_ids))
+        result = db.execute(
+            insert(CampaignRecipient).from_select(
+                ["campaign_id", "contact_id", "wa_id", "status", "attempts", "available_at", "updated_at"],
+                selection
+            )
+        )
+        return result.rowcount
+    
+    @staticmethod
+    def add_recipients(db: Session, campaign_id: int, business_id: int, variables_by_contact: Dict[int, str]) -> int:
+        """Añade destinatarios con variables propias (JSON); ignora los contactos de otros negocios"""
+        if not variables_by_contact:
+            return 0
+        contacts = db.query(Contact.id, Contact.wa_id).filter(
+            Contact.business_id == business_id,
+            Contact.id.in_(list(variables_by_contact)),
+            Contact.wa_id.isnot(None)
+        ).all()
+        now = _utcnow()
+        rows = [
+            {
+                "campaign_id": campaign_id,
+                "contact_id": contact_id,
+                "wa_id": wa_id,
+                "variables": variables_by_contact[contact_id],
+                "status": "pending",
+                "attempts": 0,
+                "available_at": now,
+                "updated_at": now,
+            }
+            for contact_id, wa_id in contacts
+        ]
+        if rows:
+            db.execute(insert(CampaignRecipient), rows)
+        return len(rows)
+    
+    @staticmethod
+    @read_only
+    def get(db: Session, business_id: int, campaign_id: int) -> Optional[Campaign]:
+        return db.query(Campaign).filter(Campaign.id == campaign_id, Campaign.business_id == business_id).first()
+    
+    @staticmethod
+    @read_only
+    def get_all(db: Session, business_id: int, skip: int = 0, limit: int = 100) -> List[Campaign]:
+        return db.query(Campaign)\
+            .filter(Campaign.business_id == business_id)\
+            .order_by(Campaign.id.desc())\
+            .offset(skip)\
+            .limit(limit)\
+            .all()
+    
+    @staticmethod
+    def get_running(db: Session) -> List[Campaign]:
+        """Campañas en curso, las más antiguas primero"""
+        return db.query(Campaign).filter(Campaign.status == "running").order_by(Campaign.id).all()
+    
+    @staticmethod
+    def get_status(db: Session, campaign_id: int) -> Optional[str]:
+        return db.query(Campaign.status).filter(Campaign.id == campaign_id).scalar()
+    
+    @staticmethod
+    def set_status(db: Session, campaign: Campaign, status: str) -> Campaign:
+        """Cambia el estado de la campaña y confirma"""
+        campaign.status = status
+        if status == "running" and campaign.started_at is None:
+            campaign.started_at = _utcnow()
+        if status in ("completed", "cancelled"):
+            campaign.completed_at = _utcnow()
+        db.commit()
+        db.refresh(campaign)
+        logger.info("Campaña %s: %s", campaign.id, status, extra={"business_id": campaign.business_id})
+        return campaign
+    
+    @staticmethod
+    @read_only
+    def count_by_status(db: Session, campaign_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """Número de destinatarios por estado de cada campaña"""
+        counts: Dict[int, Dict[str, int]] = {campaign_id: {} for campaign_id in campaign_ids}
+        if not campaign_ids:
+            return counts
+        rows = db.query(CampaignRecipient.campaign_id, CampaignRecipient.status, func.count())\
+            .filter(CampaignRecipient.campaign_id.in_(campaign_ids))\
+            .group_by(CampaignRecipient.campaign_id, CampaignRecipient.status)\
+            .all()
+        for campaign_id, status, count in rows:
+            counts[campaign_id][status] = count
+        return counts
+    
+    @staticmethod
+    @read_only
+    def get_recipients(
+        db: Session,
+        campaign_id: int,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[CampaignRecipient]:
+        query = db.query(CampaignRecipient).filter(CampaignRecipient.campaign_id == campaign_id)
+        if status is not None:
+            query = query.filter(CampaignRecipient.status == status)
+        return query.order_by(CampaignRecipient.id).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def claim_recipients(db: Session, campaign_id: int, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """
+        Reclama hasta `limit` destinatarios para enviarles el mensaje y confirma
+        
+        En Postgres usa FOR UPDATE SKIP LOCKED, como la cola de webhooks.
+        """
+        lock_clause = "FOR UPDATE SKIP LOCKED" if db.bind.dialect.name == "postgresql" else ""
+        now = _utcnow()
+        result = db.execute(
+            text(_CLAIM_SQL.format(lock_clause=lock_clause)),
+            {
+                "campaign_id": campaign_id,
+                "now": now,
+                "locked_until": now + timedelta(seconds=lease_seconds),
+                "limit": limit,
+            },
+        )
+        recipients = [dict(row._mapping) for row in result]
+        db.commit()
+        recipients.sort(key=lambda recipient: recipient["id"])
+        return recipients
+    
+    @staticmethod
+    def save_results(db: Session, results: List[Dict[str, Any]]) -> None:
+        """
+        Guarda el resultado de los envíos de un lote en una sola transacción
+        
+        Args:
+            results: diccionarios con id y los campos a actualizar (status,
+                wa_message_id, sent_at, available_at, last_error...)
+        """
+        if not results:
+            return
+        now = _utcnow()
+        db.execute(
+            update(CampaignRecipient),
+            [{**result, "locked_until": None, "updated_at": now} for result in results]
+        )
+        db.commit()
+    
+    @staticmethod
+    def complete_if_finished(db: Session, campaign_id: int) -> bool:
+        """Marca la campaña como completada si no le quedan destinatarios por enviar"""
+        remaining = db.query(CampaignRecipient.id)\
+            .filter(CampaignRecipient.campaign_id == campaign_id)\
+            .filter(CampaignRecipient.status.in_(("pending", "sending")))\
+            .first()
+        if remaining is not None:
+            return False
+        completed = db.query(Campaign)\
+            .filter(Campaign.id == campaign_id, Campaign.status == "running")\
+            .update({"status": "completed", "completed_at": _utcnow()}, synchronize_session=False)
+        db.commit()
+        if completed:
+            logger.info("Campaña %s completada", campaign_id)
+        return completed > 0
+    
+    @staticmethod
+    def update_delivery_status(db: Session, wa_message_id: str, status: str) -> bool:
+        """Aplica un estado del webhook (delivered, read, failed) al destinatario del mensaje"""
+        previous = _PREVIOUS_STATUSES.get(status)
+        if previous is None:
+            return False
+        updated = db.query(CampaignRecipient)\
+            .filter(CampaignRecipient.wa_message_id == wa_message_id)\
+            .filter(CampaignRecipient.status.in_(previous))\
+            .update({"status": status, "updated_at": _utcnow()}, synchronize_session=False)
+        db.commit()
+        return updated > 0
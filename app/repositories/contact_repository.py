@@ -62,7 +62,7 @@ class ContactRepository:
         # Crear nuevo contacto
         new_contact = Contact(
             wa_id=wa_id,
-            phone=phone,
+            phone_number=phone,
             name=name,
             business_id=business_id
         )
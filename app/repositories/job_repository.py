@@ -0,0 +1,184 @@
+from sqlalchemy import text, func
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+from app.models.webhook_job import WebhookJob
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Reclama el siguiente trabajo disponible de cada contacto. Un trabajo solo es
+# reclamable si no hay otro anterior del mismo contacto sin terminar (pendiente,
+# en reintento o en proceso), lo que garantiza el orden por contacto aunque haya
+# varios workers. Los trabajos en proceso cuyo lease ha caducado (worker caído)
+# vuelven a ser reclamables.
+_CLAIM_SQL = """
+UPDATE webhook_jobs
+SET status = 'processing',
+    attempts = attempts + 1,
+    locked_until = :locked_until,
+    locked_by = :worker_id
+WHERE id IN (
+    SELECT j.id FROM webhook_jobs j
+    WHERE (
+        (j.status = 'pending' AND j.available_at <= :now)
+        OR (j.status = 'processing' AND j.locked_until < :now)
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM webhook_jobs p
+        WHERE p.ordering_key = j.ordering_key
+          AND p.id < j.id
+          AND p.status IN ('pending', 'processing')
+    )
+    ORDER BY j.id
+    LIMIT :limit
+    {lock_clause}
+)
+RETURNING id, kind, business_id, payload, attempts, max_attempts
+"""
+
+
+def _utcnow() -> datetime:
+    # Las columnas DateTime de la cola no llevan zona horaria: se guardan en UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobRepository:
+    """Repositorio de la cola de trabajos del webhook (tabla webhook_jobs)"""
+    
+    @staticmethod
+    def enqueue_many(db: Session, jobs: List[Dict[str, Any]], max_attempts: int = 5) -> int:
+        """
+        Inserta varios trabajos en una sola sentencia y confirma la transacción
+        
+        Args:
+            jobs: diccionarios con kind, ordering_key, business_id y payload (JSON)
+        """
+        if not jobs:
+            return 0
+        now = _utcnow()
+        rows = [
+            {
+                "kind": job["kind"],
+                "ordering_key": job["ordering_key"] or "",
+                "business_id": job.get("business_id"),
+                "payload": job["payload"],
+                "status": "pending",
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "available_at": now,
+                "created_at": now,
+            }
+            for job in jobs
+        ]
+        db.execute(WebhookJob.__table__.insert(), rows)
+        db.commit()
+        return len(rows)
+    
+    @staticmethod
+    def claim_batch(db: Session, worker_id: str, limit: int, visibility_timeout: float) -> List[Dict[str, Any]]:
+        """
+        Reclama hasta `limit` trabajos para este worker durante `visibility_timeout` segundos
+        
+        En Postgres usa FOR UPDATE SKIP LOCKED para que varios workers reclamen
+        lotes distintos sin bloquearse; en SQLite (un único escritor) no hace falta.
+        """
+        lock_clause = "FOR UPDATE SKIP LOCKED" if db.bind.dialect.name == "postgresql" else ""
+        now = _utcnow()
+        result = db.execute(
+            text(_CLAIM_SQL.format(lock_clause=lock_clause)),
+            {
+                "now": now,
+                "locked_until": now + timedelta(seconds=visibility_timeout),
+                "worker_id": worker_id,
+                "limit": limit,
+            },
+        )
+        jobs = [dict(row._mapping) for row in result]
+        db.commit()
+        jobs.sort(key=lambda job: job["id"])
+        return jobs
+    
+    @staticmethod
+    def complete(db: Session, job_id: int, worker_id: str) -> bool:
+        """Elimina un trabajo terminado; devuelve False si el lease lo tenía otro worker"""
+        deleted = (
+            db.query(WebhookJob)
+            .filter(WebhookJob.id == job_id, WebhookJob.locked_by == worker_id)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted > 0
+    
+    @staticmethod
+    def fail(db: Session, job: Dict[str, Any], worker_id: str, error: str, retry_base_seconds: float) -> str:
+        """
+        Registra un fallo: programa un reintento con backoff exponencial o, si se
+        han agotado los intentos, mueve el trabajo a dead (dead-letter)
+        
+        Returns:
+            El nuevo estado del trabajo ("pending" o "dead")
+        """
+        if job["attempts"] >= job["max_attempts"]:
+            status = "dead"
+            available_at = _utcnow()
+        else:
+            status = "pending"
+            delay = min(retry_base_seconds * 2 ** (job["attempts"] - 1), 3600)
+            available_at = _utcnow() + timedelta(seconds=delay)
+        db.query(WebhookJob).filter(
+            WebhookJob.id == job["id"], WebhookJob.locked_by == worker_id
+        ).update(
+            {
+                "status": status,
+                "available_at": available_at,
+                "locked_until": None,
+                "locked_by": None,
+                "last_error": error[:2000],
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        return status
+    
+    @staticmethod
+    def get_dead(db: Session, limit: int = 100) -> List[WebhookJob]:
+        """Obtiene los trabajos en dead-letter, más antiguos primero"""
+        return (
+            db.query(WebhookJob)
+            .filter(WebhookJob.status == "dead")
+            .order_by(WebhookJob.id)
+            .limit(limit)
+            .all()
+        )
+    
+    @staticmethod
+    def requeue_dead(db: Session, job_id: Optional[int] = None) -> int:
+        """Devuelve a la cola los trabajos en dead-letter (uno o todos)"""
+        query = db.query(WebhookJob).filter(WebhookJob.status == "dead")
+        if job_id is not None:
+            query = query.filter(WebhookJob.id == job_id)
+        count = query.update(
+            {"status": "pending", "attempts": 0, "available_at": _utcnow()},
+            synchronize_session=False,
+        )
+        db.commit()
+        return count
+    
+    @staticmethod
+    def get_stats(db: Session) -> Dict[str, Any]:
+        """Número de trabajos por estado y antigüedad del pendiente más antiguo"""
+        counts = dict(
+            db.query(WebhookJob.status, func.count(WebhookJob.id)).group_by(WebhookJob.status).all()
+        )
+        oldest = (
+            db.query(func.min(WebhookJob.created_at))
+            .filter(WebhookJob.status.in_(["pending", "processing"]))
+            .scalar()
+        )
+        return {
+            "pending": counts.get("pending", 0),
+            "processing": counts.get("processing", 0),
+            "dead": counts.get("dead", 0),
+            "oldest_pending_age_s": round((_utcnow() - oldest).total_seconds(), 1) if oldest else None,
+        }
@@ -0,0 +1,119 @@
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.knowledge import KnowledgeItem
+from app.services.cache_invalidation import invalidation_bus
+from app.database.replicas import read_only
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class KnowledgeRepository:
+    """
+    Repositorio de la base de conocimiento de los negocios.
+    
+    Las escrituras invalidan el índice BM25 del negocio en todos los workers
+    (caché "knowledge_index"); al volver a cargarlo solo se indexa lo que ha cambiado.
+    """
+    
+    @staticmethod
+    def create(db: Session, business_id: int, item_data: Dict[str, Any]) -> KnowledgeItem:
+        """Crea un elemento de la base de conocimiento"""
+        item = KnowledgeItem(business_id=business_id, **item_data)
+        db.add(item)
+        invalidation_bus.publish(db, "knowledge_index", business_id)
+        db.commit()
+        db.refresh(item)
+        return item
+    
+    @staticmethod
+    @read_only
+    def get_by_id(db: Session, business_id: int, item_id: int) -> Optional[KnowledgeItem]:
+        """Obtiene un elemento del negocio por su ID"""
+        return db.query(KnowledgeItem).filter(
+            KnowledgeItem.business_id == business_id,
+            KnowledgeItem.id == item_id
+        ).first()
+    
+    @staticmethod
+    @read_only
+    def get_page(db: Session, business_id: int, skip: int = 0, limit: int = 100, source: Optional[str] = None) -> List[KnowledgeItem]:
+        """Lista los elementos del negocio en orden de alta"""
+        query = db.query(KnowledgeItem).filter(KnowledgeItem.business_id == business_id)
+        if source is not None:
+            query = query.filter(KnowledgeItem.source == source)
+        return query.order_by(KnowledgeItem.id).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def get_versions(db: Session, business_id: int) -> Dict[int, datetime]:
+        """Versión (updated_at) de cada elemento del negocio, sin el contenido"""
+        rows = db.execute(
+            select(KnowledgeItem.id, KnowledgeItem.updated_at).where(KnowledgeItem.business_id == business_id)
+        )
+        return {item_id: updated_at for item_id, updated_at in rows}
+    
+    @staticmethod
+    def get_many(db: Session, item_ids: List[int]) -> List[Tuple[int, Optional[str], str, datetime]]:
+        """Contenido de los elementos indicados: (id, title, content, updated_at)"""
+        if not item_ids:
+            return []
+        return [tuple(row) for row in db.execute(
+            select(KnowledgeItem.id, KnowledgeItem.title, KnowledgeItem.content, KnowledgeItem.updated_at)
+            .where(KnowledgeItem.id.in_(item_ids))
+        )]
+    
+    @staticmethod
+    def update(db: Session, business_id: int, item_id: int, item_data: Dict[str, Any]) -> Optional[KnowledgeItem]:
+        """Actualiza un elemento del negocio"""
+        item = db.query(KnowledgeItem).filter(
+            KnowledgeItem.business_id == business_id,
+            KnowledgeItem.id == item_id
+        ).first()
+        if item is None:
+            return None
+        for key, value in item_data.items():
+            setattr(item, key, value)
+        invalidation_bus.publish(db, "knowledge_index", business_id)
+        db.commit()
+        db.refresh(item)
+        return item
+    
+    @staticmethod
+    def delete(db: Session, business_id: int, item_id: int) -> bool:
+        """Elimina un elemento del negocio"""
+        deleted = db.execute(
+            delete(KnowledgeItem).where(KnowledgeItem.business_id == business_id, KnowledgeItem.id == item_id)
+        ).rowcount
+        if deleted:
+            invalidation_bus.publish(db, "knowledge_index", business_id)
+        db.commit()
+        return bool(deleted)
+    
+    @staticmethod
+    def replace_source(db: Session, business_id: int, source: str, items: List[Dict[str, Any]]) -> int:
+        """
+        Sustituye los fragmentos de un documento por los nuevos en una transacción
+        
+        Returns:
+            Número de fragmentos de la versión anterior que se han eliminado
+        """
+        replaced = db.execute(
+            delete(KnowledgeItem).where(KnowledgeItem.business_id == business_id, KnowledgeItem.source == source)
+        ).rowcount
+        if items:
+            now = _utcnow()
+            db.execute(insert(KnowledgeItem), [
+                {**item, "business_id": business_id, "source": source, "created_at": now, "updated_at": now}
+                for item in items
+            ])
+        invalidation_bus.publish(db, "knowledge_index", business_id)
+        db.commit()
+        logger.info(
+            "Documento %s del negocio %s: %d fragmentos (%d sustituidos)",
+            source, business_id, len(items), replaced, extra={"business_id": business_id}
+        )
+        return replaced
@@ -1,7 +1,10 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, load_only
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from app.models.message import Message
+from app.database.replicas import read_only
 
 class MessageRepository:
     """Repositorio para operaciones con mensajes en la base de datos"""
@@ -18,7 +21,9 @@ class MessageRepository:
         status: str = "received",
         ai_processed: bool = False,
         ai_response: Optional[str] = None,
-        session_id: Optional[int] = None  # Nuevo parámetro
+        session_id: Optional[int] = None,  # Nuevo parámetro
+        ai_latency_ms: Optional[int] = None,
+        ai_fallback: Optional[bool] = None
     ):
         """Crea un nuevo mensaje en la base de datos"""
         message = Message(
@@ -31,7 +36,9 @@ class MessageRepository:
             status=status,
             ai_processed=ai_processed,
             ai_response=ai_response,
-            session_id=session_id  # Añadir a la creación
+            session_id=session_id,  # Añadir a la creación
+            ai_latency_ms=ai_latency_ms,
+            ai_fallback=ai_fallback
         )
         db.add(message)
         db.commit()
@@ -40,7 +47,13 @@ class MessageRepository:
     
     @staticmethod
     def get_by_wa_id(db: Session, wa_message_id: str):
-        """Obtiene un mensaje por su ID de WhatsApp"""
+        """
+        Obtiene un mensaje por su ID de WhatsApp
+
+        No es @read_only: la deduplicación de entrantes y update_status leen
+        antes de escribir, y la lectura tiene que ir al escritor (en SQLite,
+        dentro de su BEGIN IMMEDIATE; nunca a una réplica con retraso).
+        """
         return db.query(Message).filter(Message.wa_message_id == wa_message_id).first()
     
     @staticmethod
@@ -54,6 +67,13 @@ class MessageRepository:
         return message
     
     @staticmethod
+    def set_media(db: Session, message_id: int, **media_fields) -> None:
+        """Enlaza un mensaje con su medio descargado (media_id, media_sha256, media_path...)"""
+        db.query(Message).filter(Message.id == message_id).update(media_fields, synchronize_session=False)
+        db.commit()
+    
+    @staticmethod
+    @read_only
     def get_conversation_history(db: Session, contact_id: int, limit: int = 5) -> List[Message]:
         """Obtiene el historial de conversación para un contacto"""
         return (
@@ -65,6 +85,7 @@ class MessageRepository:
         )
     
     @staticmethod
+    @read_only
     def get_session_history(db: Session, session_id: int, limit: int = 10) -> List[Message]:
         """Obtiene el historial de mensajes de una sesión específica"""
         return (
@@ -73,4 +94,76 @@ class MessageRepository:
             .order_by(Message.timestamp.asc())  # Orden cronológico: del más antiguo al más reciente
             .limit(limit)
             .all()
-        )
\ No newline at end of file
+        )
+    
+    @staticmethod
+    @read_only
+    def get_session_page(db: Session, session_id: int, skip: int = 0, limit: int = 100) -> List[Message]:
+        """Página de mensajes de una sesión en orden cronológico, solo con las columnas del historial"""
+        return (
+            db.query(Message)
+            .options(load_only(
+                Message.id,
+                Message.session_id,
+                Message.direction,
+                Message.message_type,
+                Message.content,
+                Message.timestamp,
+                Message.status,
+                Message.media_mime_type
+            ))
+            .filter(Message.session_id == session_id)
+            .order_by(Message.timestamp, Message.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+    
+    @staticmethod
+    def iter_for_sessions(db: Session, session_ids: List[int], chunk_size: int = 1000) -> Iterator[Message]:
+        """Recorre los mensajes de varias sesiones por sesión y en orden cronológico, por bloques"""
+        return (
+            db.query(Message)
+            .filter(Message.session_id.in_(session_ids))
+            .order_by(Message.session_id, Message.timestamp, Message.id)
+            .yield_per(chunk_size)
+        )
+    
+    @staticmethod
+    def get_recent_for_sessions(db: Session, session_ids: List[int], per_session: int) -> List[Row]:
+        """
+        Últimos `per_session` mensajes de cada sesión, en una sola consulta
+        
+        Numera los mensajes de cada sesión del más reciente al más antiguo con
+        row_number() y se queda con los primeros. Devuelve filas (session_id,
+        direction, content) por sesión y en orden cronológico.
+        """
+        ranked = (
+            select(
+                Message.session_id,
+                Message.direction,
+                Message.content,
+                Message.timestamp,
+                Message.id,
+                func.row_number().over(
+                    partition_by=Message.session_id,
+                    order_by=(Message.timestamp.desc(), Message.id.desc())
+                ).label("position"),
+            )
+            .where(Message.session_id.in_(session_ids))
+            .subquery()
+        )
+        return db.execute(
+            select(ranked.c.session_id, ranked.c.direction, ranked.c.content)
+            .where(ranked.c.position <= per_session)
+            .order_by(ranked.c.session_id, ranked.c.timestamp, ranked.c.id)
+        ).all()
+    
+    @staticmethod
+    def delete_for_sessions(db: Session, session_ids: List[int]) -> int:
+        """Elimina los mensajes de varias sesiones (sin confirmar la transacción)"""
+        return (
+            db.query(Message)
+            .filter(Message.session_id.in_(session_ids))
+            .delete(synchronize_session=False)
+        )
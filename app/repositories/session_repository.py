@@ -1,7 +1,12 @@
-from sqlalchemy.orm import Session as DBSession
+from sqlalchemy import or_
+from sqlalchemy.orm import Session as DBSession, joinedload, load_only, selectinload
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List
+from typing import Dict, Optional, List
+from app.models.business import Business
+from app.models.contact import Contact
 from app.models.conversation_session import ConversationSession
+from app.models.message import Message
+from app.database.replicas import read_only
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,7 +32,7 @@ class SessionRepository:
         db.add(session)
         db.commit()
         db.refresh(session)
-        logger.info(f"Creada nueva sesión {session.id} para el contacto {contact_id}")
+        logger.info("Creada nueva sesión %s para el contacto %s", session.id, contact_id)
         return session
     
     @staticmethod
@@ -67,14 +72,15 @@ class SessionRepository:
                 session.context = context
             db.commit()
             db.refresh(session)
-            logger.info(f"Sesión {session_id} cerrada con estado: {status}")
+            logger.info("Sesión %s cerrada con estado: %s", session_id, status)
         return session
     
     @staticmethod
     def get_or_create_active_session(
         db: DBSession, 
         contact_id: int,
-        business_id: Optional[int] = None
+        business_id: Optional[int] = None,
+        timeout_minutes: Optional[int] = None
     ) -> ConversationSession:
         """
         Obtiene la sesión activa o crea una nueva si no existe
@@ -83,11 +89,24 @@ class SessionRepository:
             db: Sesión de base de datos
             contact_id: ID del contacto
             business_id: ID del negocio (opcional)
+            timeout_minutes: Si se indica, una sesión activa sin actividad durante
+                más tiempo se cierra como "timed_out" y se crea una nueva
             
         Returns:
             ConversationSession: Sesión activa
         """
         active_session = SessionRepository.get_active_session(db, contact_id)
+        if active_session and timeout_minutes is not None:
+            last_activity = active_session.last_activity
+            if last_activity.tzinfo is None:
+                last_activity = last_activity.replace(tzinfo=timezone.utc)
+            if last_activity < datetime.now(timezone.utc) - timedelta(minutes=timeout_minutes):
+                active_session.is_active = False
+                active_session.ended_at = datetime.now(timezone.utc)
+                active_session.status = "timed_out"
+                db.commit()
+                logger.info("Sesión %s expirada para el contacto %s", active_session.id, contact_id)
+                active_session = None
         if not active_session:
             active_session = ConversationSession(
                 contact_id=contact_id,
@@ -100,7 +119,7 @@ class SessionRepository:
             db.add(active_session)
             db.commit()
             db.refresh(active_session)
-            logger.info(f"Creada nueva sesión {active_session.id} para el contacto {contact_id}")
+            logger.info("Creada nueva sesión %s para el contacto %s", active_session.id, contact_id)
         return active_session
     
     @staticmethod
@@ -132,14 +151,187 @@ class SessionRepository:
         
         if closed_count > 0:
             db.commit()
-            logger.info(f"Cerradas {closed_count} sesiones inactivas")
+            logger.info("Cerradas %d sesiones inactivas", closed_count)
         
         return closed_count
     
     @staticmethod
+    @read_only
     def get_session_messages(db: DBSession, session_id: int) -> List:
-        """Obtiene todos los mensajes de una sesión específica"""
-        session = db.query(ConversationSession).filter(ConversationSession.id == session_id).first()
-        if session:
-            return session.messages
-        return []
\ No newline at end of file
+        """Obtiene todos los mensajes de una sesión específica, en orden cronológico"""
+        return db.query(Message)\
+            .filter(Message.session_id == session_id)\
+            .order_by(Message.timestamp, Message.id)\
+            .all()
+    
+    @staticmethod
+    def _history_options(with_messages: bool) -> list:
+        """
+        Carga de las relaciones para las vistas de historial en un número fijo de
+        consultas: contacto y negocio con JOIN, mensajes con un único SELECT ... IN
+        para toda la página. Solo se cargan las columnas que se muestran.
+        """
+        options = [
+            load_only(
+                ConversationSession.id,
+                ConversationSession.contact_id,
+                ConversationSession.business_id,
+                ConversationSession.started_at,
+                ConversationSession.last_activity,
+                ConversationSession.ended_at,
+                ConversationSession.is_active,
+                ConversationSession.status,
+                ConversationSession.context,
+                ConversationSession.archived_at
+            ),
+            joinedload(ConversationSession.contact).load_only(
+                Contact.id, Contact.wa_id, Contact.name
+            ),
+            joinedload(ConversationSession.business).load_only(Business.id, Business.name),
+        ]
+        if with_messages:
+            options.append(
+                selectinload(ConversationSession.messages).load_only(
+                    Message.id,
+                    Message.session_id,
+                    Message.direction,
+                    Message.message_type,
+                    Message.content,
+                    Message.timestamp,
+                    Message.status,
+                    Message.media_mime_type
+                )
+            )
+        return options
+    
+    @staticmethod
+    @read_only
+    def get_history_page(
+        db: DBSession,
+        business_id: int,
+        skip: int = 0,
+        limit: int = 50,
+        active: Optional[bool] = None,
+        with_messages: bool = False
+    ) -> List[ConversationSession]:
+        """
+        Página de sesiones de un negocio, más recientes primero, con su contacto y,
+        opcionalmente, sus mensajes. Siempre 1 consulta (2 con mensajes),
+        independientemente del tamaño de la página.
+        """
+        query = db.query(ConversationSession)\
+            .options(*SessionRepository._history_options(with_messages))\
+            .filter(ConversationSession.business_id == business_id)
+        if active is not None:
+            query = query.filter(ConversationSession.is_active == active)
+        return query\
+            .order_by(ConversationSession.started_at.desc(), ConversationSession.id.desc())\
+            .offset(skip)\
+            .limit(limit)\
+            .all()
+    
+    @staticmethod
+    @read_only
+    def belongs_to_business(db: DBSession, session_id: int, business_id: int) -> bool:
+        """Comprueba que la sesión existe y es del negocio"""
+        return db.query(ConversationSession.id)\
+            .filter(ConversationSession.id == session_id)\
+            .filter(ConversationSession.business_id == business_id)\
+            .first() is not None
+    
+    @staticmethod
+    @read_only
+    def get_history_detail(db: DBSession, business_id: int, session_id: int) -> Optional[ConversationSession]:
+        """Una sesión del negocio con contacto, negocio y mensajes (2 consultas)"""
+        return db.query(ConversationSession)\
+            .options(*SessionRepository._history_options(True))\
+            .filter(ConversationSession.id == session_id)\
+            .filter(ConversationSession.business_id == business_id)\
+            .first()
+    
+    @staticmethod
+    def get_archive_candidates(db: DBSession, closed_before: datetime, limit: int) -> List[ConversationSession]:
+        """Obtiene sesiones cerradas antes de `closed_before` que aún no se han archivado"""
+        return db.query(ConversationSession)\
+            .filter(ConversationSession.is_active == False)\
+            .filter(ConversationSession.ended_at < closed_before)\
+            .filter(ConversationSession.archive_path.is_(None))\
+            .filter(ConversationSession.summarized_at.isnot(None))\
+            .order_by(ConversationSession.id)\
+            .limit(limit)\
+            .all()
+    
+    @staticmethod
+    def mark_archived(db: DBSession, session_ids: List[int], archive_path: str) -> int:
+        """Registra el fichero de archivo de las sesiones (sin confirmar la transacción)"""
+        return db.query(ConversationSession)\
+            .filter(ConversationSession.id.in_(session_ids))\
+            .update(
+                {"archive_path": archive_path, "archived_at": datetime.now(timezone.utc).replace(tzinfo=None)},
+                synchronize_session=False
+            )
+    
+    @staticmethod
+    @read_only
+    def get_archived_by_contact(db: DBSession, contact_id: int, skip: int = 0, limit: int = 100) -> List[ConversationSession]:
+        """Obtiene las sesiones archivadas de un contacto, más recientes primero"""
+        return db.query(ConversationSession)\
+            .filter(ConversationSession.contact_id == contact_id)\
+            .filter(ConversationSession.archive_path.isnot(None))\
+            .order_by(ConversationSession.started_at.desc())\
+            .offset(skip)\
+            .limit(limit)\
+            .all()
+    
+    @staticmethod
+    def get_pending_summaries(db: DBSession, limit: int) -> List[ConversationSession]:
+        """Obtiene sesiones cerradas pendientes de resumen, las más antiguas primero (sin las que esperan reintento)"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return db.query(ConversationSession)\
+            .filter(ConversationSession.summarized_at.is_(None))\
+            .filter(ConversationSession.is_active == False)\
+            .filter(or_(ConversationSession.summary_retry_at.is_(None), ConversationSession.summary_retry_at <= now))\
+            .order_by(ConversationSession.ended_at)\
+            .limit(limit)\
+            .all()
+    
+    @staticmethod
+    def save_summaries(db: DBSession, summaries: Dict[int, Optional[str]]) -> int:
+        """Guarda los resúmenes en context y marca las sesiones como resumidas"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for session_id, summary in summaries.items():
+            values = {"summarized_at": now}
+            if summary:
+                values["context"] = summary[:500]
+            db.query(ConversationSession)\
+                .filter(ConversationSession.id == session_id)\
+                .update(values, synchronize_session=False)
+        db.commit()
+        return len(summaries)
+    
+    @staticmethod
+    def defer_summaries(db: DBSession, attempts: Dict[int, int], max_attempts: int, base_seconds: int) -> int:
+        """
+        Aplaza las sesiones que Gemini no ha resumido, con espera exponencial
+        
+        `attempts` son los intentos de cada sesión (id -> summary_attempts) antes
+        de este. Al agotar `max_attempts` la sesión se da por resumida sin
+        contexto, para que no bloquee la cabeza de la cola.
+        
+        Returns:
+            Número de sesiones abandonadas
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        abandoned = 0
+        for session_id, previous in attempts.items():
+            values = {"summary_attempts": previous + 1}
+            if previous + 1 >= max_attempts:
+                values["summarized_at"] = now
+                abandoned += 1
+            else:
+                values["summary_retry_at"] = now + timedelta(seconds=base_seconds * 2 ** previous)
+            db.query(ConversationSession)\
+                .filter(ConversationSession.id == session_id)\
+                .update(values, synchronize_session=False)
+        db.commit()
+        return abandoned
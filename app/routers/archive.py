@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from app.database.db import get_db
+from app.controllers.archive_controller import ArchiveController
+from app.schemas.archive import ArchivedSession, ArchivedSessionSummary
+from app.auth.auth import require_business_access
+
+router = APIRouter(
+    dependencies=[Depends(require_business_access)],
+    prefix="/archive",
+    tags=["archive"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/sessions/{session_id}", response_model=ArchivedSession)
+def get_archived_session(
+    session_id: int,
+    db: Session = Depends(get_db)
+):
+    """Obtiene una sesión archivada con todos sus mensajes"""
+    session = ArchiveController.get_archived_session(db, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Sesión archivada no encontrada")
+    return session
+
+@router.get("/contacts/{contact_id}/sessions", response_model=List[ArchivedSessionSummary])
+def get_archived_sessions_by_contact(
+    contact_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Lista las sesiones archivadas de un contacto"""
+    return ArchiveController.get_archived_sessions_by_contact(db, contact_id, skip, limit)
@@ -1,11 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database.db import get_db
+from datetime import date, datetime
+import tempfile
+from typing import List, Literal, Optional
+from app.database.db import get_db, get_read_db
+from app.controllers.analytics_controller import AnalyticsController
 from app.controllers.business_controller import BusinessController
-from app.schemas.business import BusinessCreate, BusinessUpdate, BusinessInDB
+from app.controllers.history_controller import HistoryController
+from app.schemas.analytics import BusinessAnalytics
+from app.config import settings
+from app.schemas.business import BusinessCreate, BusinessImportResult, BusinessUpdate, BusinessInDB
+from app.schemas.history import HistoryMessage, HistorySession, HistorySessionDetail
+from app.services.business_import import BusinessImportService
+from app.services.export_service import ExportService
+from app.auth.auth import require_business_access
 
 router = APIRouter(
+    dependencies=[Depends(require_business_access)],
     prefix="/businesses",
     tags=["businesses"],
     responses={404: {"description": "Not found"}},
@@ -19,10 +32,32 @@ def create_business(
     """Crea un nuevo negocio"""
     return BusinessController.create_business(db, business)
 
+@router.post("/import", response_model=BusinessImportResult)
+async def import_businesses(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Por defecto, según el Content-Type"),
+    dry_run: bool = Query(False, description="Solo validar, sin guardar"),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa negocios en bloque desde el cuerpo de la petición (NDJSON o CSV con
+    cabecera). Devuelve el número de filas importadas y los errores por fila.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    
+    # El cuerpo se vuelca a un temporal (en memoria hasta IMPORT_SPOOL_MAX_BYTES,
+    # después en disco) a medida que llega, sin cargar la subida entera en memoria
+    with tempfile.SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_MAX_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        return await run_in_threadpool(BusinessImportService.import_file, db, upload, format, dry_run)
+
 @router.get("/{business_id}", response_model=BusinessInDB)
 def get_business(
     business_id: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene un negocio específico por su ID"""
     business = BusinessController.get_business(db, business_id)
@@ -30,12 +65,86 @@ def get_business(
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
     return business
 
+@router.get("/{business_id}/analytics", response_model=BusinessAnalytics)
+def get_business_analytics(
+    business_id: int,
+    start: Optional[date] = Query(None, description="Primer día (incluido)"),
+    end: Optional[date] = Query(None, description="Último día (incluido)"),
+    db: Session = Depends(get_read_db)
+):
+    """Métricas diarias del negocio: mensajes, sesiones, latencia y fallbacks de la IA"""
+    if BusinessController.get_business(db, business_id) is None:
+        raise HTTPException(status_code=404, detail="Negocio no encontrado")
+    return AnalyticsController.get_business_analytics(db, business_id, start, end)
+
+@router.get("/{business_id}/export")
+def export_business_conversations(
+    business_id: int,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    start: Optional[datetime] = Query(None, description="Desde (incluido), por timestamp del mensaje"),
+    end: Optional[datetime] = Query(None, description="Hasta (excluido), por timestamp del mensaje"),
+    db: Session = Depends(get_db)
+):
+    """Exporta en streaming todos los mensajes de las conversaciones de un negocio"""
+    if BusinessController.get_business(db, business_id) is None:
+        raise HTTPException(status_code=404, detail="Negocio no encontrado")
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"business-{business_id}-messages.{format}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        ExportService.iter_export(business_id, format, start, end, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{business_id}/sessions", response_model=List[HistorySession])
+def get_business_sessions(
+    business_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    active: Optional[bool] = Query(None, description="Solo sesiones activas (true) o cerradas (false)"),
+    include_messages: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """Lista las sesiones de conversación del negocio, más recientes primero, con su contacto"""
+    return HistoryController.get_sessions(db, business_id, skip, limit, active, include_messages)
+
+@router.get("/{business_id}/sessions/{session_id}", response_model=HistorySessionDetail)
+def get_business_session(
+    business_id: int,
+    session_id: int,
+    db: Session = Depends(get_read_db)
+):
+    """Obtiene una sesión de conversación del negocio con todos sus mensajes"""
+    session = HistoryController.get_session(db, business_id, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Sesión no encontrada")
+    return session
+
+@router.get("/{business_id}/sessions/{session_id}/messages", response_model=List[HistoryMessage])
+def get_business_session_messages(
+    business_id: int,
+    session_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """Página de mensajes de una sesión, en orden cronológico"""
+    messages = HistoryController.get_session_messages(db, business_id, session_id, skip, limit)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Sesión no encontrada")
+    return messages
+
 @router.get("/", response_model=List[BusinessInDB])
 def get_businesses(
     skip: int = 0, 
     limit: int = 100, 
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene una lista de negocios"""
     return BusinessController.get_businesses(db, skip, limit, active_only)
@@ -67,7 +176,7 @@ def delete_business(
 @router.get("/search/", response_model=List[BusinessInDB])
 def search_businesses(
     query: str = Query(..., min_length=1, description="Término de búsqueda"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Busca negocios por nombre"""
     return BusinessController.search_businesses(db, query)
\ No newline at end of file
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from app.auth.auth import require_business_access
+from app.database.db import get_db, get_read_db
+from app.controllers.business_controller import BusinessController
+from app.controllers.campaign_controller import CampaignController, CampaignTransitionError
+from app.schemas.campaign import CampaignCreate, CampaignInDB, CampaignRecipientOut
+from app.services.campaign_service import TemplateVariableError
+
+router = APIRouter(
+    dependencies=[Depends(require_business_access)],
+    prefix="/businesses/{business_id}/campaigns",
+    tags=["campaigns"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.post("/", response_model=CampaignInDB, status_code=status.HTTP_201_CREATED)
+def create_campaign(
+    business_id: int,
+    campaign: CampaignCreate,
+    db: Session = Depends(get_db)
+):
+    """Crea una campaña para los contactos del negocio (y la inicia si start=true)"""
+    if BusinessController.get_business(db, business_id) is None:
+        raise HTTPException(status_code=404, detail="Negocio no encontrado")
+    try:
+        return CampaignController.create_campaign(db, business_id, campaign)
+    except TemplateVariableError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/", response_model=List[CampaignInDB])
+def get_campaigns(
+    business_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_read_db)
+):
+    """Lista las campañas del negocio con su progreso"""
+    return CampaignController.get_campaigns(db, business_id, skip, limit)
+
+@router.get("/{campaign_id}", response_model=CampaignInDB)
+def get_campaign(
+    business_id: int,
+    campaign_id: int,
+    db: Session = Depends(get_read_db)
+):
+    """Obtiene una campaña con el número de destinatarios en cada estado"""
+    campaign = CampaignController.get_campaign(db, business_id, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaña no encontrada")
+    return campaign
+
+@router.post("/{campaign_id}/{action}", response_model=CampaignInDB)
+def change_campaign_status(
+    business_id: int,
+    campaign_id: int,
+    action: Literal["start", "pause", "cancel"],
+    db: Session = Depends(get_db)
+):
+    """Inicia (o reanuda), pausa o cancela una campaña"""
+    try:
+        campaign = CampaignController.change_status(db, business_id, campaign_id, action)
+    except CampaignTransitionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaña no encontrada")
+    return campaign
+
+@router.get("/{campaign_id}/recipients", response_model=List[CampaignRecipientOut])
+def get_campaign_recipients(
+    business_id: int,
+    campaign_id: int,
+    status: Optional[str] = Query(None, description="pending, sending, sent, delivered, read o failed"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """Progreso por destinatario de una campaña"""
+    recipients = CampaignController.get_recipients(db, business_id, campaign_id, status, skip, limit)
+    if recipients is None:
+        raise HTTPException(status_code=404, detail="Campaña no encontrada")
+    return recipients
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from app.middleware.profiling import profiler
+from app.schemas.profiling import ProfilingConfig, ProfilingConfigUpdate
+from app.auth.auth import require_business_access
+
+router = APIRouter(
+    dependencies=[Depends(require_business_access)],
+    prefix="/debug",
+    tags=["Debug"]
+)
+
+@router.get("/profiling", response_model=ProfilingConfig)
+def get_profiling_config():
+    """Devuelve la configuración actual del profiler"""
+    return profiler.get_config()
+
+@router.put("/profiling", response_model=ProfilingConfig)
+def update_profiling_config(config: ProfilingConfigUpdate):
+    """Activa, desactiva o ajusta el profiler sin reiniciar el servicio"""
+    return profiler.configure(**config.model_dump(exclude_unset=True))
@@ -1,7 +1,57 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app import logging_config
+from app.database.db import get_db
+from app.database.replicas import replica_router
+from app.repositories.job_repository import JobRepository
+from app.services.ai_reply_service import AIReplyService
+from app.services.intent_matcher import IntentService
+from app.services.rate_limiter import inbound_limiter
+from app.services.webhook_recorder import webhook_recorder
+from app.tasks.scheduler import scheduler
 
 router = APIRouter(tags=["Health"])
 
 @router.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@router.get("/health/jobs")
+async def jobs_status():
+    """Estado de los trabajos periódicos en este worker (liderazgo y duraciones)"""
+    return scheduler.get_stats()
+
+@router.get("/health/queue")
+async def queue_status(db: Session = Depends(get_db)):
+    """Profundidad de la cola de webhooks (pendientes, en proceso y dead-letter)"""
+    return JobRepository.get_stats(db)
+
+@router.get("/health/ai")
+async def ai_status():
+    """Circuit breaker de Gemini y respuestas alternativas servidas por este worker"""
+    return AIReplyService.stats()
+
+@router.get("/health/intents")
+async def intents_status():
+    """Mensajes respondidos con los datos del negocio sin llamar a Gemini (tasa de acierto)"""
+    return IntentService.stats()
+
+@router.get("/health/replicas")
+async def replicas_status():
+    """Réplicas de lectura: salud, retraso medido y lecturas desviadas al primario"""
+    return replica_router.stats()
+
+@router.get("/health/rate-limits")
+async def rate_limits_status():
+    """Limitador de mensajes entrantes por contacto en este worker"""
+    return inbound_limiter.stats()
+
+@router.get("/health/logging")
+async def logging_status():
+    """Cola de logs de este worker: registros descartados por cola llena y pendientes"""
+    return logging_config.stats()
+
+@router.get("/health/recording")
+async def recording_status():
+    """Grabación de webhooks en este worker: grabados, descartados y pendientes"""
+    return webhook_recorder.stats()
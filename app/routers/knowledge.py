@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.auth.auth import require_business_access
+from app.config import settings
+from app.database.db import get_db, get_read_db
+from app.controllers.business_controller import BusinessController
+from app.controllers.knowledge_controller import KnowledgeController
+from app.schemas.knowledge import (
+    KnowledgeDocumentResult,
+    KnowledgeItemCreate,
+    KnowledgeItemInDB,
+    KnowledgeItemUpdate,
+    KnowledgeSearchResult
+)
+
+router = APIRouter(
+    dependencies=[Depends(require_business_access)],
+    prefix="/businesses/{business_id}/knowledge",
+    tags=["knowledge"],
+    responses={404: {"description": "Not found"}},
+)
+
+def _require_business(db: Session, business_id: int) -> None:
+    if BusinessController.get_business(db, business_id) is None:
+        raise HTTPException(status_code=404, detail="Negocio no encontrado")
+
+@router.post("/", response_model=KnowledgeItemInDB, status_code=status.HTTP_201_CREATED)
+def create_knowledge_item(
+    business_id: int,
+    item: KnowledgeItemCreate,
+    db: Session = Depends(get_db)
+):
+    """Añade un elemento a la base de conocimiento (un plato, un producto, una pregunta frecuente...)"""
+    _require_business(db, business_id)
+    return KnowledgeController.create_item(db, business_id, item)
+
+@router.get("/", response_model=List[KnowledgeItemInDB])
+def get_knowledge_items(
+    business_id: int,
+    source: Optional[str] = Query(None, description="Solo los fragmentos de este documento"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """Lista la base de conocimiento del negocio"""
+    return KnowledgeController.get_items(db, business_id, skip, limit, source)
+
+@router.get("/search", response_model=KnowledgeSearchResult)
+def search_knowledge(
+    business_id: int,
+    q: str = Query(..., min_length=1, description="Mensaje o consulta"),
+    k: int = Query(settings.KNOWLEDGE_TOP_K, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Fragmentos que se añadirían al prompt para la consulta, con su puntuación BM25"""
+    return KnowledgeController.search(db, business_id, q, k)
+
+@router.put("/documents/{source}", response_model=KnowledgeDocumentResult)
+async def put_knowledge_document(
+    business_id: int,
+    source: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Sube un documento de texto (carta, catálogo, preguntas frecuentes) en el
+    cuerpo de la petición. Se divide en fragmentos por párrafos; si el
+    documento ya existía, sus fragmentos se sustituyen.
+    """
+    _require_business(db, business_id)
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > settings.KNOWLEDGE_MAX_DOCUMENT_BYTES:
+            raise HTTPException(status_code=413, detail="Documento demasiado grande")
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=422, detail="El documento debe ser texto UTF-8")
+    return await run_in_threadpool(KnowledgeController.put_document, db, business_id, source[:200], text)
+
+@router.put("/{item_id}", response_model=KnowledgeItemInDB)
+def update_knowledge_item(
+    business_id: int,
+    item_id: int,
+    item: KnowledgeItemUpdate,
+    db: Session = Depends(get_db)
+):
+    """Actualiza un elemento de la base de conocimiento"""
+    updated = KnowledgeController.update_item(db, business_id, item_id, item)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Elemento no encontrado")
+    return updated
+
+@router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_knowledge_item(
+    business_id: int,
+    item_id: int,
+    db: Session = Depends(get_db)
+):
+    """Elimina un elemento de la base de conocimiento"""
+    if not KnowledgeController.delete_item(db, business_id, item_id):
+        raise HTTPException(status_code=404, detail="Elemento no encontrado")
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 import logging
 from app.controllers.whatsapp_controller import WhatsAppController
 from app.database.db import get_db
-from app.repositories.business_repository import BusinessRepository
+from app.services.business_cache import BusinessCache
+from app.services.webhook_recorder import webhook_recorder
+from app.models.whatsapp_model import WhatsAppWebhookEvent
 
 router = APIRouter(
     prefix="/whatsapp",
@@ -20,7 +23,7 @@ async def verify_webhook(request: Request):
     hub_verify_token = params.get("hub.verify_token")
     hub_challenge = params.get("hub.challenge")
     
-    logger.info(f"Verifying webhook with mode: {hub_mode}")
+    logger.info("Verifying webhook with mode: %s", hub_mode)
     
     result = WhatsAppController.verify_webhook(hub_mode, hub_verify_token, hub_challenge)
     if result is not None:
@@ -35,12 +38,18 @@ async def verify_webhook(request: Request):
 async def receive_message(request: Request, db: Session = Depends(get_db)):
     """Recibe y procesa los eventos del webhook de WhatsApp"""
     try:
-        webhook_data = await request.json()
+        body = await request.body()
+        webhook_recorder.record(body, request.url.path)
+        # Validar el cuerpo una sola vez, directamente desde bytes a modelos tipados
+        event = WhatsAppWebhookEvent.model_validate_json(body)
         logger.info("Received webhook data")
         
-        return await WhatsAppController.handle_webhook_data(webhook_data, db)
+        return await WhatsAppController.handle_webhook_data(event, db)
+    except ValidationError as e:
+        logger.warning("Invalid webhook payload: %d errors", e.error_count())
+        return {"status": "error", "message": "Invalid webhook payload"}
     except Exception as e:
-        logger.error(f"Error processing webhook: {str(e)}", exc_info=True)
+        logger.error("Error processing webhook: %s", e, exc_info=True)
         return {"status": "error", "message": str(e)}
 
 @router.post("/webhook/{business_id}")
@@ -52,12 +61,19 @@ async def webhook_business(
     """
     Webhook para recibir mensajes de WhatsApp para un negocio específico
     """
+    body = await request.body()
+    webhook_recorder.record(body, request.url.path)
+    
     # Verificar que el negocio existe
-    business = BusinessRepository.get_by_id(db, business_id)
+    business = BusinessCache.get(db, business_id)
     if not business:
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
     
     # Procesar la solicitud de webhook
-    data = await request.json()
-    result = await WhatsAppController.handle_webhook_data(data, db, business_id)
+    try:
+        event = WhatsAppWebhookEvent.model_validate_json(body)
+    except ValidationError as e:
+        logger.warning("Invalid webhook payload for business %s: %d errors", business_id, e.error_count(), extra={"business_id": business_id})
+        return {"status": "error", "message": "Invalid webhook payload"}
+    result = await WhatsAppController.handle_webhook_data(event, db, business_id)
     return result
\ No newline at end of file
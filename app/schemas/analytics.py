@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+class StatsTotals(BaseModel):
+    """Métricas agregadas de un periodo"""
+    messages_in: int = 0
+    messages_out: int = 0
+    sessions_started: int = 0
+    sessions_timed_out: int = 0
+    sessions_closed_by_user: int = 0
+    ai_replies: int = 0
+    ai_fallbacks: int = 0
+    ai_latency_ms_avg: Optional[float] = None
+    ai_latency_ms_max: int = 0
+    ai_fallback_rate: Optional[float] = None
+
+class DailyStats(StatsTotals):
+    """Métricas de un día"""
+    day: date
+
+class BusinessAnalytics(BaseModel):
+    """Métricas diarias de un negocio y sus totales en el periodo"""
+    business_id: int
+    start: Optional[date] = None
+    end: Optional[date] = None
+    days: List[DailyStats]
+    totals: StatsTotals
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class ArchivedMessage(BaseModel):
+    """Mensaje leído del archivo en frío"""
+    id: int
+    wa_message_id: Optional[str] = None
+    direction: Optional[str] = None
+    message_type: Optional[str] = None
+    content: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    status: Optional[str] = None
+    ai_processed: Optional[bool] = None
+    ai_response: Optional[str] = None
+    media_id: Optional[str] = None
+    media_sha256: Optional[str] = None
+    media_mime_type: Optional[str] = None
+    media_size: Optional[int] = None
+    media_path: Optional[str] = None
+
+class ArchivedSessionSummary(BaseModel):
+    """Sesión archivada (sin mensajes)"""
+    id: int
+    contact_id: Optional[int] = None
+    business_id: Optional[int] = None
+    status: Optional[str] = None
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class ArchivedSession(ArchivedSessionSummary):
+    """Sesión archivada con sus mensajes"""
+    context: Optional[str] = None
+    messages: List[ArchivedMessage] = []
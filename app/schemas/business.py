@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class BusinessBase(BaseModel):
@@ -12,7 +12,17 @@ class BusinessBase(BaseModel):
     email: Optional[EmailStr] = None
     website: Optional[str] = None  # Cambiado de HttpUrl a str
     logo_url: Optional[str] = None  # Cambiado de HttpUrl a str
+    opening_hours: Optional[str] = Field(None, max_length=255)
     system_prompt: Optional[str] = None
+    # Respuestas de IA: plazo, mensaje de espera y qué hacer con una respuesta tardía
+    reply_deadline_ms: Optional[int] = Field(None, ge=100, le=120000)
+    holding_message: Optional[str] = Field(None, min_length=1, max_length=4096)
+    late_reply_policy: Optional[Literal["deliver", "discard"]] = None
+    # Límite de mensajes entrantes por contacto
+    inbound_rate_per_minute: Optional[int] = Field(None, ge=1, le=6000)
+    inbound_burst: Optional[int] = Field(None, ge=1, le=1000)
+    # False: no responder a las preguntas sobre sus datos sin la IA (IntentService)
+    intent_fast_path: Optional[bool] = None
 
 class BusinessCreate(BusinessBase):
     """Esquema para crear un nuevo negocio"""
@@ -31,4 +41,19 @@ class BusinessInDB(BusinessBase):
     is_active: bool
     
     class Config:
-        from_attributes = True  # Corregido para Pydantic V2
\ No newline at end of file
+        from_attributes = True  # Corregido para Pydantic V2
+
+class BusinessImportRowError(BaseModel):
+    """Fila rechazada en una importación masiva"""
+    row: int  # número de registro (1 = primer registro tras la cabecera en CSV)
+    errors: List[str]
+
+class BusinessImportResult(BaseModel):
+    """Resultado de una importación masiva de negocios"""
+    total_rows: int
+    imported: int
+    failed: int
+    dry_run: bool = False
+    errors: List[BusinessImportRowError] = []
+    errors_truncated: bool = False  # hay más filas rechazadas que las listadas
+    elapsed_ms: float
@@ -0,0 +1,61 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+class CampaignRecipientIn(BaseModel):
+    """Destinatario con variables propias para la plantilla"""
+    contact_id: int
+    variables: Dict[str, str] = {}
+
+class CampaignCreate(BaseModel):
+    """
+    Esquema para crear una campaña.
+    
+    Se envía la plantilla aprobada `template_name` en `template_language`.
+    `template_components` sigue el formato de la Graph API, por ejemplo
+    [{"type": "body", "parameters": [{"type": "text", "text": "{name}"}]}]; sus
+    textos pueden usar {name}, {wa_id}, {business} y cualquier variable de
+    `variables` o del destinatario.
+
+    Destinatarios: `recipients` (con variables propias), `contact_ids`, o si no
+    se indica ninguno, todos los contactos del negocio.
+    """
+    name: str = Field(..., min_length=1, max_length=100)
+    template_name: str = Field(..., min_length=1, max_length=512)
+    template_language: str = Field("es", min_length=2, max_length=20)
+    template_components: List[Dict[str, Any]] = []
+    variables: Dict[str, str] = {}
+    rate_per_second: float = Field(10.0, gt=0)
+    contact_ids: Optional[List[int]] = None
+    recipients: Optional[List[CampaignRecipientIn]] = None
+    start: bool = False
+
+class CampaignInDB(BaseModel):
+    """Campaña con el número de destinatarios en cada estado"""
+    id: int
+    business_id: int
+    name: str
+    template_name: Optional[str] = None
+    template_language: str
+    status: str
+    rate_per_second: float
+    total_recipients: int
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    progress: Dict[str, int] = {}  # pending, sending, sent, delivered, read, failed
+
+class CampaignRecipientOut(BaseModel):
+    """Progreso de un destinatario"""
+    id: int
+    contact_id: int
+    wa_id: str
+    status: str
+    attempts: int
+    wa_message_id: Optional[str] = None
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
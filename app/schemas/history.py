@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class HistoryContact(BaseModel):
+    """Contacto de una sesión (solo lo que muestra la vista de historial)"""
+    id: int
+    wa_id: Optional[str] = None
+    name: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class HistoryBusiness(BaseModel):
+    id: int
+    name: str
+    
+    class Config:
+        from_attributes = True
+
+class HistoryMessage(BaseModel):
+    """Mensaje de una sesión en la vista de historial"""
+    id: int
+    direction: Optional[str] = None
+    message_type: Optional[str] = None
+    content: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    status: Optional[str] = None
+    media_mime_type: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class HistorySession(BaseModel):
+    """Sesión de conversación con su contacto y, si se piden, sus mensajes"""
+    id: int
+    status: Optional[str] = None
+    is_active: Optional[bool] = None
+    started_at: Optional[datetime] = None
+    last_activity: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    context: Optional[str] = None
+    archived: bool = False  # los mensajes de las sesiones archivadas están en /archive
+    contact: Optional[HistoryContact] = None
+    messages: Optional[List[HistoryMessage]] = None
+
+class HistorySessionDetail(HistorySession):
+    business: Optional[HistoryBusiness] = None
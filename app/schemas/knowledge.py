@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class KnowledgeItemBase(BaseModel):
+    """Esquema base para los elementos de la base de conocimiento"""
+    title: Optional[str] = Field(None, max_length=200)
+    content: str = Field(..., min_length=1, max_length=20000)
+
+class KnowledgeItemCreate(KnowledgeItemBase):
+    """Esquema para crear un elemento (un plato, un producto, una pregunta frecuente...)"""
+    pass
+
+class KnowledgeItemUpdate(BaseModel):
+    """Esquema para actualizar un elemento existente"""
+    title: Optional[str] = Field(None, max_length=200)
+    content: Optional[str] = Field(None, min_length=1, max_length=20000)
+
+class KnowledgeItemInDB(KnowledgeItemBase):
+    """Elemento de la base de conocimiento tal como está guardado"""
+    id: int
+    business_id: int
+    source: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class KnowledgeDocumentResult(BaseModel):
+    """Resultado de subir un documento: los fragmentos en que se ha dividido"""
+    source: str
+    items: int
+    replaced: int  # fragmentos de una versión anterior del documento
+
+class KnowledgeSearchHit(BaseModel):
+    """Fragmento recuperado para una consulta, con su puntuación BM25"""
+    id: int
+    title: Optional[str] = None
+    content: str
+    score: float
+
+class KnowledgeSearchResult(BaseModel):
+    query: str
+    hits: List[KnowledgeSearchHit]
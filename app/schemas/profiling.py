@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ProfilingConfig(BaseModel):
+    """Esquema con la configuración actual del profiler"""
+    enabled: bool
+    sample_rate: float
+    latency_threshold_ms: float
+    interval_ms: float
+    path_prefix: str
+    output_dir: str
+    max_files: int
+    profiles_written: int
+    skipped_concurrent: int
+
+class ProfilingConfigUpdate(BaseModel):
+    """Esquema para modificar el profiler en caliente"""
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(None, ge=0.0, le=1.0)
+    latency_threshold_ms: Optional[float] = Field(None, ge=0.0)
+    interval_ms: Optional[float] = Field(None, gt=0.0)
+    path_prefix: Optional[str] = None
+    max_files: Optional[int] = Field(None, ge=1)
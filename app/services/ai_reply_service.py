@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.config import settings
+from app.services.cache import LocalCache
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.gemini_service import GeminiService
+
+logger = logging.getLogger(__name__)
+
+# Última respuesta de la IA a cada pregunta (por negocio, prompt y fragmentos de
+# conocimiento), para responder al instante cuando Gemini no llega a tiempo o
+# está caído. Se comparte entre contactos: ver AIReplyService._cache_key
+reply_cache = LocalCache(
+    "ai_reply",
+    maxsize=settings.AI_REPLY_CACHE_MAX_SIZE,
+    ttl=settings.AI_REPLY_CACHE_TTL_SECONDS
+)
+
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=settings.AI_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.AI_BREAKER_RESET_SECONDS
+)
+
+# Hilos propios para las llamadas a Gemini: una llamada que supera el plazo
+# sigue ocupando su hilo, y no debe quitárselo a la base de datos
+_executor = ThreadPoolExecutor(settings.AI_MAX_CONCURRENT_CALLS, thread_name_prefix="gemini")
+
+_late_tasks: Set[asyncio.Task] = set()
+_counters: Counter = Counter()
+_counters_lock = threading.Lock()
+
+LateReplyHandler = Callable[[str], Awaitable[None]]
+
+
+def _count(key: str) -> None:
+    with _counters_lock:
+        _counters[key] += 1
+
+
+@dataclass
+class AIReply:
+    """Respuesta para el usuario y de dónde sale"""
+    text: str
+    source: str  # ai | cache | holding
+    reason: Optional[str] = None  # si no es de la IA: timeout | error | circuit_open
+
+
+class AIReplyService:
+    """
+    Respuestas de IA con plazo máximo.
+
+    La llamada a Gemini se ejecuta en un hilo y se espera como mucho el plazo
+    del negocio (reply_deadline_ms). Si no llega a tiempo, si falla o si el
+    circuit breaker está abierto, se responde al momento con la respuesta
+    cacheada a la misma pregunta (solo las que se entienden sin la
+    conversación) o, si no hay, con el mensaje de espera del negocio. La
+    llamada que superó el plazo no se cancela: su respuesta se guarda en la
+    caché y, según late_reply_policy, se entrega al usuario (solo si recibió
+    el mensaje de espera) o se descarta.
+
+    El circuit breaker cuenta los errores de Gemini, no la lentitud: una
+    llamada fuera de plazo cuenta como fallo solo si acaba fallando o supera
+    AI_LATE_REPLY_MAX_SECONDS.
+    """
+
+    @staticmethod
+    def _cache_key(
+        business: Optional[Any],
+        content: str,
+        conversation_history: List[Dict[str, str]],
+        knowledge: Optional[List[str]]
+    ) -> Optional[Tuple[Optional[int], int, int, str]]:
+        """
+        Clave de la respuesta en la caché, o None si no se debe cachear
+
+        La caché se comparte entre los contactos del negocio, así que solo se
+        guardan respuestas a preguntas que se entienden solas: primer mensaje
+        de la sesión (el historial ya incluye el actual) y al menos
+        AI_REPLY_CACHE_MIN_CHARS caracteres. La respuesta a "sí" o "¿y el
+        precio?" depende de la conversación y puede llevar datos de otro contacto.
+        """
+        text = " ".join(content.lower().split())
+        if len(conversation_history) > 1 or len(text) < settings.AI_REPLY_CACHE_MIN_CHARS:
+            return None
+        # El prompt y los fragmentos de conocimiento forman parte de la clave: al cambiar no se reutilizan respuestas
+        system_prompt = getattr(business, "system_prompt", None)
+        return (getattr(business, "id", None), hash(system_prompt), hash(tuple(knowledge or ())), text)
+
+    @staticmethod
+    def _setting(business: Optional[Any], name: str, default: Any) -> Any:
+        value = getattr(business, name, None)
+        return default if value is None else value
+
+    @staticmethod
+    def _fallback(business: Optional[Any], key: Optional[Tuple], reason: str) -> AIReply:
+        _count(f"fallback_{reason}")
+        cached = reply_cache.get(key) if key is not None else None
+        if cached is not None:
+            _count("fallback_cached")
+            return AIReply(cached, "cache", reason)
+        _count("fallback_holding")
+        holding = AIReplyService._setting(business, "holding_message", settings.AI_HOLDING_MESSAGE)
+        return AIReply(holding, "holding", reason)
+
+    @staticmethod
+    async def reply(
+        content: str,
+        conversation_history: List[Dict[str, str]],
+        business: Optional[Any] = None,
+        on_late_reply: Optional[LateReplyHandler] = None,
+        knowledge: Optional[List[str]] = None
+    ) -> AIReply:
+        """
+        Genera la respuesta al mensaje dentro del plazo del negocio.
+
+        knowledge son los fragmentos de la base de conocimiento del negocio
+        que se añaden al prompt.
+
+        on_late_reply se llama con la respuesta tardía si la política del
+        negocio es entregarla y el usuario recibió el mensaje de espera.
+        """
+        key = AIReplyService._cache_key(business, content, conversation_history, knowledge)
+        if not gemini_breaker.allow():
+            return AIReplyService._fallback(business, key, "circuit_open")
+
+        prompt = GeminiService.build_prompt(
+            content,
+            conversation_history,
+            system_prompt=getattr(business, "system_prompt", None),
+            knowledge=knowledge
+        )
+        deadline = AIReplyService._setting(business, "reply_deadline_ms", settings.AI_REPLY_DEADLINE_MS) / 1000
+        started = time.monotonic()
+        future = asyncio.get_running_loop().run_in_executor(_executor, GeminiService.generate_text, prompt)
+        try:
+            text = await asyncio.wait_for(asyncio.shield(future), deadline)
+        except asyncio.TimeoutError:
+            # La lentitud la resuelve el plazo; el breaker cuenta el resultado cuando llegue
+            logger.warning("Gemini no respondió en %.1f s: respuesta alternativa", deadline)
+            fallback = AIReplyService._fallback(business, key, "timeout")
+            policy = AIReplyService._setting(business, "late_reply_policy", settings.AI_LATE_REPLY_POLICY)
+            deliver = on_late_reply if policy == "deliver" and fallback.source == "holding" else None
+            task = asyncio.create_task(AIReplyService._await_late(future, key, started, deliver))
+            _late_tasks.add(task)
+            task.add_done_callback(_late_tasks.discard)
+            return fallback
+        except Exception as e:
+            gemini_breaker.record_failure()
+            logger.error("Error generating response with Gemini: %s", e)
+            return AIReplyService._fallback(business, key, "error")
+
+        gemini_breaker.record_success()
+        if key is not None:
+            reply_cache.set(key, text)
+        _count("replies_ai")
+        return AIReply(text, "ai")
+
+    @staticmethod
+    async def _await_late(
+        future: asyncio.Future,
+        key: Optional[Tuple],
+        started: float,
+        deliver: Optional[LateReplyHandler]
+    ) -> None:
+        """Espera la respuesta que superó el plazo, la cachea y la entrega o la descarta"""
+        remaining = settings.AI_LATE_REPLY_MAX_SECONDS - (time.monotonic() - started)
+        try:
+            text = await asyncio.wait_for(future, max(remaining, 0))
+        except Exception as e:
+            # Incluye superar AI_LATE_REPLY_MAX_SECONDS (el hilo termina por su cuenta)
+            gemini_breaker.record_failure()
+            _count("late_failed")
+            logger.info("Respuesta tardía de Gemini perdida: %s", type(e).__name__)
+            return
+        gemini_breaker.record_success()
+        if key is not None:
+            reply_cache.set(key, text)
+        if deliver is None:
+            _count("late_discarded")
+            return
+        try:
+            await deliver(text)
+            _count("late_delivered")
+        except Exception as e:
+            _count("late_failed")
+            logger.error("Error entregando una respuesta tardía: %s", e, exc_info=True)
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Estado del circuit breaker y contadores de respuestas en este worker"""
+        with _counters_lock:
+            counters = dict(_counters)
+        return {
+            "breaker": gemini_breaker.stats(),
+            "replies": counters,
+            "late_pending": len(_late_tasks),
+            "cache": reply_cache.stats(),
+        }
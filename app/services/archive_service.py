@@ -0,0 +1,157 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.conversation_session import ConversationSession
+from app.models.message import Message
+from app.repositories.message_repository import MessageRepository
+from app.repositories.session_repository import SessionRepository
+
+logger = logging.getLogger(__name__)
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+class ArchiveService:
+    """
+    Archivo en frío de las sesiones cerradas.
+    
+    Los mensajes de las sesiones cerradas hace más de ARCHIVE_RETENTION_DAYS se
+    escriben en ficheros JSONL comprimidos con gzip bajo ARCHIVE_DIR (una línea
+    por sesión) y se eliminan de la tabla messages. La sesión conserva la ruta
+    del fichero en archive_path, así que el archivo sigue siendo consultable.
+    """
+    
+    @staticmethod
+    def _session_record(session: ConversationSession, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # session_id va primero: read_session lo busca como prefijo de la línea
+        return {
+            "session_id": session.id,
+            "contact_id": session.contact_id,
+            "business_id": session.business_id,
+            "status": session.status,
+            "context": session.context,
+            "started_at": _iso(session.started_at),
+            "ended_at": _iso(session.ended_at),
+            "messages": messages,
+        }
+    
+    @staticmethod
+    def _message_record(message: Message) -> Dict[str, Any]:
+        return {
+            "id": message.id,
+            "wa_message_id": message.wa_message_id,
+            "direction": message.direction,
+            "message_type": message.message_type,
+            "content": message.content,
+            "timestamp": _iso(message.timestamp),
+            "status": message.status,
+            "ai_processed": message.ai_processed,
+            "ai_response": message.ai_response,
+            # El archivo es la única referencia al medio guardado cuando se borran los mensajes
+            "media_id": message.media_id,
+            "media_sha256": message.media_sha256,
+            "media_mime_type": message.media_mime_type,
+            "media_size": message.media_size,
+            "media_path": message.media_path,
+        }
+    
+    @staticmethod
+    def _write_batch(db: Session, sessions: List[ConversationSession]) -> str:
+        """Escribe el lote en un fichero nuevo y devuelve su ruta relativa a ARCHIVE_DIR"""
+        now = datetime.now(timezone.utc)
+        relative_path = os.path.join(
+            f"{now:%Y}", f"{now:%m}", f"sessions-{sessions[0].id}-{sessions[-1].id}-{now:%Y%m%dT%H%M%S}.jsonl.gz"
+        )
+        final_path = os.path.join(settings.ARCHIVE_DIR, relative_path)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        
+        by_id = {session.id: session for session in sessions}
+        written = set()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(final_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as out:
+                current_id = None
+                current: List[Dict[str, Any]] = []
+                
+                def flush():
+                    out.write(json.dumps(
+                        ArchiveService._session_record(by_id[current_id], current), ensure_ascii=False
+                    ).encode("utf-8") + b"\n")
+                    written.add(current_id)
+                
+                # Los mensajes llegan ordenados por sesión: se escribe una línea por sesión
+                for message in MessageRepository.iter_for_sessions(db, list(by_id)):
+                    if message.session_id != current_id:
+                        if current_id is not None:
+                            flush()
+                        current_id, current = message.session_id, []
+                    current.append(ArchiveService._message_record(message))
+                if current_id is not None:
+                    flush()
+                # Sesiones sin mensajes
+                for session in sessions:
+                    if session.id not in written:
+                        current_id, current = session.id, []
+                        flush()
+                out.flush()
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return relative_path
+    
+    @staticmethod
+    def archive_closed_sessions(
+        db: Session,
+        retention_days: int,
+        batch_size: int,
+        max_batches: int
+    ) -> int:
+        """
+        Archiva sesiones cerradas hace más de `retention_days` días, por lotes
+        
+        El fichero se escribe y sincroniza antes de borrar los mensajes; si el
+        proceso cae entre ambos pasos, el lote se vuelve a archivar en la
+        siguiente ejecución (el fichero huérfano no se referencia).
+        
+        Returns:
+            Número de sesiones archivadas
+        """
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=retention_days)
+        archived = 0
+        for _ in range(max_batches):
+            sessions = SessionRepository.get_archive_candidates(db, cutoff, batch_size)
+            if not sessions:
+                break
+            session_ids = [session.id for session in sessions]
+            relative_path = ArchiveService._write_batch(db, sessions)
+            SessionRepository.mark_archived(db, session_ids, relative_path)
+            deleted = MessageRepository.delete_for_sessions(db, session_ids)
+            db.commit()
+            archived += len(session_ids)
+            logger.info("Archivadas %d sesiones (%d mensajes) en %s", len(session_ids), deleted, relative_path)
+            if len(sessions) < batch_size:
+                break
+        return archived
+    
+    @staticmethod
+    def read_session(archive_path: str, session_id: int) -> Optional[Dict[str, Any]]:
+        """Lee una sesión archivada de su fichero"""
+        path = os.path.normpath(os.path.join(settings.ARCHIVE_DIR, archive_path))
+        if not path.startswith(os.path.normpath(settings.ARCHIVE_DIR) + os.sep) or not os.path.exists(path):
+            logger.warning("Fichero de archivo no disponible: %s", archive_path)
+            return None
+        prefix = f'{{"session_id": {session_id},'.encode()
+        with gzip.open(path, "rb") as archive:
+            for line in archive:
+                if line.startswith(prefix):
+                    return json.loads(line)
+        return None
@@ -0,0 +1,25 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.repositories.business_repository import BusinessRepository
+from app.schemas.business import BusinessInDB
+from app.services.cache import LocalCache
+
+# Instantáneas de negocios por ID; el bus de invalidación las elimina al modificarlos
+business_cache = LocalCache(
+    "business",
+    maxsize=settings.BUSINESS_CACHE_MAX_SIZE,
+    ttl=settings.BUSINESS_CACHE_TTL_SECONDS
+)
+
+class BusinessCache:
+    """Acceso cacheado a los negocios para el camino caliente del webhook"""
+    
+    @staticmethod
+    def get(db: Session, business_id: int) -> Optional[BusinessInDB]:
+        """Obtiene una instantánea del negocio, cargándola de la BD si no está en caché"""
+        def load() -> Optional[BusinessInDB]:
+            business = BusinessRepository.get_by_id(db, business_id)
+            return BusinessInDB.model_validate(business) if business else None
+        
+        return business_cache.get_or_load(business_id, load)
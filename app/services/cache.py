@@ -0,0 +1,71 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from cachetools import TTLCache
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Caché en memoria del proceso con TTL y tamaño máximo, segura entre hilos.
+
+    Las cachés se registran por nombre para que el bus de invalidación pueda
+    eliminar claves cuando otro worker modifica los datos.
+
+    Cada invalidación avanza una generación: un get_or_load que empezó a cargar
+    antes no guarda su valor, que puede ser la versión anterior de los datos.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._data: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        cache_registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado o lo carga; los None no se cachean"""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            generation = self._generation
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if self._generation == generation:
+                    self._data[key] = value
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Elimina una clave, o toda la caché si key es None"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+cache_registry: Dict[str, LocalCache] = {}
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from typing import Any, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from app.config import settings
+from app.services.cache import cache_registry
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+
+# Claves publicadas en la transacción en curso de cada sesión (en Session.info)
+_PENDING = "cache_invalidation_pending"
+
+
+class InvalidationBus:
+    """
+    Bus de invalidación de cachés entre workers basado en LISTEN/NOTIFY de Postgres.
+
+    Los escritores llaman a publish() dentro de su transacción: la caché local se
+    invalida en el acto y otra vez al confirmar (una lectura concurrente entre
+    ambos momentos todavía ve la fila anterior y podría volver a cachearla), y
+    pg_notify se entrega al resto de workers solo si la transacción se confirma.
+    Cada worker mantiene un hilo con una conexión dedicada en LISTEN que elimina
+    las claves afectadas de sus cachés; sus propios eventos los ignora, porque
+    ya los ha aplicado al confirmar. Sin Postgres (SQLite) solo hay un proceso
+    y basta con la invalidación local.
+    Si la conexión se pierde, al reconectar se vacían todas las cachés, porque
+    se han podido perder eventos.
+    """
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.database_url = database_url or settings.DATABASE_URL
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.received = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.database_url.startswith("postgresql")
+
+    def publish(self, db: Session, cache_name: str, key: Any = None) -> None:
+        """Invalida una clave (o toda la caché si key es None) en todos los workers"""
+        self._evict(cache_name, key)
+        db.info.setdefault(_PENDING, set()).add((cache_name, key))
+        # Se decide por el engine de la sesión, no por DATABASE_URL: una sesión
+        # contra SQLite (p. ej. en un benchmark) no tiene pg_notify
+        if db.get_bind().dialect.name != "postgresql":
+            return
+        payload = json.dumps({"cache": cache_name, "key": key, "origin": self.origin})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+    def start(self) -> None:
+        """Arranca el hilo que escucha las invalidaciones"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen_loop, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @staticmethod
+    def _evict(cache_name: str, key: Any) -> None:
+        cache = cache_registry.get(cache_name)
+        if cache is not None:
+            cache.invalidate(key)
+
+    def _handle(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Evento de invalidación no válido: %s", payload)
+            return
+        self.received += 1
+        if event.get("origin") != self.origin:
+            self._evict(event.get("cache"), event.get("key"))
+
+    def _listen_loop(self) -> None:
+        engine = create_engine(self.database_url, poolclass=NullPool)
+        connected_before = False
+        while not self._stop.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                if connected_before:
+                    # Pudimos perder eventos mientras estábamos desconectados
+                    for cache in cache_registry.values():
+                        cache.invalidate()
+                connected_before = True
+                logger.info("Escuchando invalidaciones de caché en el canal %s", CHANNEL)
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._handle(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning("Listener de invalidación desconectado: %s", e)
+                self._stop.wait(settings.CACHE_LISTENER_RETRY_SECONDS)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+        engine.dispose()
+
+
+invalidation_bus = InvalidationBus()
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_after_commit(session: Session) -> None:
+    for cache_name, key in session.info.pop(_PENDING, ()):
+        InvalidationBus._evict(cache_name, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
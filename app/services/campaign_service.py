@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+import requests
+from app.config import settings
+from app.database.db import SessionLocal
+from app.models.business import Business
+from app.models.campaign import Campaign
+from app.models.contact import Contact
+from app.models.whatsapp_model import WhatsAppSendTemplateMessage, WhatsAppTemplateContent, WhatsAppTemplateLanguage
+from app.repositories.campaign_repository import CampaignRepository
+from app.services.graph_http import get_graph_session
+
+logger = logging.getLogger(__name__)
+
+_VARIABLE = re.compile(r"\{(\w+)\}")
+
+# Variables que se rellenan siempre con los datos del contacto y del negocio
+BUILTIN_VARIABLES = {"name", "wa_id", "business"}
+
+class TemplateVariableError(Exception):
+    """La plantilla usa una variable sin valor para el destinatario"""
+
+class PermanentSendError(Exception):
+    """La Graph API rechazó el mensaje (4xx): reintentar no sirve"""
+
+def template_variables(components: Any) -> List[str]:
+    """Variables {nombre} que usan los textos de los componentes de una plantilla"""
+    if isinstance(components, str):
+        return sorted(set(_VARIABLE.findall(components)))
+    if isinstance(components, dict):
+        components = list(components.values())
+    if not isinstance(components, list):
+        return []
+    return sorted({name for value in components for name in template_variables(value)})
+
+def render_template(components: Any, variables: Dict[str, Any]) -> Any:
+    """
+    Sustituye las variables {nombre} en todos los textos de los componentes
+    (parámetros de cabecera, cuerpo y botones); el resto se deja tal cual
+    """
+    if isinstance(components, dict):
+        return {key: render_template(value, variables) for key, value in components.items()}
+    if isinstance(components, list):
+        return [render_template(value, variables) for value in components]
+    if not isinstance(components, str):
+        return components
+
+    def replace(match: re.Match) -> str:
+        value = variables.get(match.group(1))
+        if value is None:
+            raise TemplateVariableError(f"Falta la variable {match.group(1)}")
+        return str(value)
+    return _VARIABLE.sub(replace, components)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class _Pacer:
+    """Reparte los envíos a intervalos regulares (rate envíos por segundo)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+
+    async def wait(self) -> None:
+        # El hueco se reserva antes de dormir: con varios envíos esperando a la
+        # vez cada uno obtiene el suyo. Sin ráfagas tras una pausa: el
+        # siguiente hueco cuenta desde ahora
+        now = time.monotonic()
+        slot = max(self._next, now)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class CampaignDispatcher:
+    """
+    Envía los mensajes de las campañas en curso.
+
+    Cada mensaje es una plantilla aprobada en WhatsApp Business (template_name
+    y template_language), la única forma de escribir a un contacto fuera de la
+    ventana de 24 horas; los textos de sus componentes se rellenan con las
+    variables de cada destinatario.
+    Cada campaña reclama lotes de destinatarios (lease en la base de datos) y
+    los envía a su ritmo (rate_per_second), con un tope global de
+    CAMPAIGN_MAX_RATE_PER_SECOND y CAMPAIGN_MAX_CONCURRENCY envíos simultáneos
+    entre todas las campañas. El resultado de cada lote se guarda en una sola
+    transacción. Todo el estado está en la base de datos: tras un reinicio los
+    lotes a medias se reclaman de nuevo al caducar su lease (entrega al menos
+    una vez) y las campañas en curso continúan.
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None):
+        self.max_seconds = max_seconds if max_seconds is not None else settings.CAMPAIGN_DISPATCH_MAX_SECONDS
+        self._semaphore = asyncio.Semaphore(settings.CAMPAIGN_MAX_CONCURRENCY)
+        # Hilos propios: el executor por defecto de asyncio (cpus + 4) limitaría la concurrencia
+        self._executor = ThreadPoolExecutor(settings.CAMPAIGN_MAX_CONCURRENCY, thread_name_prefix="campaign-send")
+        self._global_pacer = _Pacer(settings.CAMPAIGN_MAX_RATE_PER_SECOND)
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    # Accesos a la base de datos (síncronos, se ejecutan en hilos)
+
+    @staticmethod
+    def _running() -> List[Dict[str, Any]]:
+        with SessionLocal() as db:
+            campaigns = CampaignRepository.get_running(db)
+            names = dict(
+                db.query(Business.id, Business.name)
+                .filter(Business.id.in_({campaign.business_id for campaign in campaigns}))
+                .all()
+            ) if campaigns else {}
+            return [
+                {
+                    "id": campaign.id,
+                    "template_name": campaign.template_name,
+                    "template_language": campaign.template_language,
+                    "components": json.loads(campaign.template_components or "[]"),
+                    "variables": json.loads(campaign.variables or "{}"),
+                    "rate_per_second": campaign.rate_per_second,
+                    "business": names.get(campaign.business_id),
+                }
+                for campaign in campaigns
+            ]
+
+    @staticmethod
+    def _claim(campaign: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Reclama un lote; None si la campaña ya no está en curso"""
+        with SessionLocal() as db:
+            if CampaignRepository.get_status(db, campaign["id"]) != "running":
+                return None
+            lease = settings.CAMPAIGN_LEASE_SECONDS + settings.CAMPAIGN_BATCH_SIZE / campaign["rate_per_second"]
+            recipients = CampaignRepository.claim_recipients(db, campaign["id"], settings.CAMPAIGN_BATCH_SIZE, lease)
+            if not recipients:
+                CampaignRepository.complete_if_finished(db, campaign["id"])
+                return recipients
+            names = dict(
+                db.query(Contact.id, Contact.name)
+                .filter(Contact.id.in_([recipient["contact_id"] for recipient in recipients]))
+                .all()
+            )
+            for recipient in recipients:
+                recipient["name"] = names.get(recipient["contact_id"])
+            return recipients
+
+    @staticmethod
+    def _save(results: List[Dict[str, Any]]) -> None:
+        with SessionLocal() as db:
+            CampaignRepository.save_results(db, results)
+
+    # Envío
+
+    @staticmethod
+    def _post(wa_id: str, template: WhatsAppTemplateContent) -> str:
+        """Envía el mensaje de plantilla y devuelve su wa_message_id"""
+        message = WhatsAppSendTemplateMessage(to=wa_id, template=template)
+        response = get_graph_session().post(
+            f"{settings.WHATSAPP_API_URL}/{settings.WHATSAPP_PHONE_ID}/messages",
+            json=message.model_dump(by_alias=True),
+            timeout=settings.CAMPAIGN_SEND_TIMEOUT_SECONDS
+        )
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            raise PermanentSendError(f"HTTP {response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+        return response.json()["messages"][0]["id"]
+
+    def _result(self, campaign: Dict[str, Any], recipient: Dict[str, Any], send_error: Optional[Exception], wa_message_id: Optional[str]) -> Dict[str, Any]:
+        if send_error is None:
+            self.sent += 1
+            return {"id": recipient["id"], "status": "sent", "wa_message_id": wa_message_id, "sent_at": _utcnow(), "last_error": None}
+        error = f"{type(send_error).__name__}: {send_error}"[:1000]
+        retryable = isinstance(send_error, requests.RequestException)
+        if retryable and recipient["attempts"] < settings.CAMPAIGN_MAX_ATTEMPTS:
+            self.retried += 1
+            delay = min(settings.CAMPAIGN_RETRY_BASE_SECONDS * 2 ** (recipient["attempts"] - 1), 3600)
+            return {"id": recipient["id"], "status": "pending", "available_at": _utcnow() + timedelta(seconds=delay), "last_error": error}
+        self.failed += 1
+        logger.warning("Campaña %s: envío a %s fallido: %s", campaign["id"], recipient["wa_id"], error)
+        return {"id": recipient["id"], "status": "failed", "last_error": error}
+
+    async def _send(self, campaign: Dict[str, Any], recipient: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            if not campaign["template_name"]:
+                raise PermanentSendError("La campaña no tiene plantilla de WhatsApp (template_name)")
+            variables = {
+                **campaign["variables"],
+                "name": recipient["name"],
+                "wa_id": recipient["wa_id"],
+                "business": campaign["business"],
+                **json.loads(recipient["variables"] or "{}"),
+            }
+            template = WhatsAppTemplateContent(
+                name=campaign["template_name"],
+                language=WhatsAppTemplateLanguage(code=campaign["template_language"]),
+                components=render_template(campaign["components"], variables),
+            )
+            wa_message_id = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._post, recipient["wa_id"], template
+            )
+            return self._result(campaign, recipient, None, wa_message_id)
+        except Exception as e:
+            return self._result(campaign, recipient, e, None)
+        finally:
+            self._semaphore.release()
+
+    async def _run_campaign(self, campaign: Dict[str, Any], deadline: float) -> None:
+        pacer = _Pacer(min(campaign["rate_per_second"], settings.CAMPAIGN_MAX_RATE_PER_SECOND))
+        while time.monotonic() < deadline:
+            recipients = await asyncio.to_thread(self._claim, campaign)
+            if not recipients:
+                return
+            tasks = []
+            for recipient in recipients:
+                await self._semaphore.acquire()
+                try:
+                    await pacer.wait()
+                    await self._global_pacer.wait()
+                    tasks.append(asyncio.create_task(self._send(campaign, recipient)))
+                except BaseException:
+                    # _send libera el semáforo; si no llega a crearse (cancelación), se libera aquí
+                    self._semaphore.release()
+                    raise
+            results = await asyncio.gather(*tasks)
+            await asyncio.to_thread(self._save, results)
+
+    async def run_once(self) -> int:
+        """Envía las campañas en curso durante como mucho max_seconds; devuelve los mensajes enviados"""
+        campaigns = await asyncio.to_thread(self._running)
+        if not campaigns:
+            return 0
+        sent_before = self.sent
+        deadline = time.monotonic() + self.max_seconds
+        await asyncio.gather(*(self._run_campaign(campaign, deadline) for campaign in campaigns))
+        sent = self.sent - sent_before
+        logger.info("Campañas: %d mensajes enviados en esta pasada (%d campañas)", sent, len(campaigns))
+        return sent
@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database.db import SessionLocal
+from app.database.replicas import read_only
+from app.models.contact import Contact
+from app.models.conversation_session import ConversationSession
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    "message_id",
+    "wa_message_id",
+    "session_id",
+    "contact_wa_id",
+    "contact_name",
+    "direction",
+    "message_type",
+    "content",
+    "timestamp",
+    "status",
+    "ai_processed",
+)
+
+class ExportService:
+    """
+    Exportación en streaming de las conversaciones de un negocio.
+    
+    Lee las filas con un cursor del servidor (stream_results) en bloques de
+    `chunk_size` y serializa cada bloque por separado, así que la memoria no
+    depende del tamaño de la exportación. Se seleccionan columnas, no objetos
+    ORM, para no llenar el identity map.
+    """
+    
+    @staticmethod
+    def _naive_utc(value: datetime) -> datetime:
+        # Las columnas DateTime no llevan zona horaria y se guardan en UTC
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    
+    @staticmethod
+    def _query(business_id: int, start: Optional[datetime], end: Optional[datetime]):
+        query = (
+            select(
+                Message.id,
+                Message.wa_message_id,
+                Message.session_id,
+                Contact.wa_id,
+                Contact.name,
+                Message.direction,
+                Message.message_type,
+                Message.content,
+                Message.timestamp,
+                Message.status,
+                Message.ai_processed,
+            )
+            .join(ConversationSession, Message.session_id == ConversationSession.id)
+            .join(Contact, Message.contact_id == Contact.id)
+            .where(ConversationSession.business_id == business_id)
+        )
+        # Los filtros por timestamp permiten descartar particiones en Postgres
+        if start is not None:
+            query = query.where(Message.timestamp >= ExportService._naive_utc(start))
+        if end is not None:
+            query = query.where(Message.timestamp < ExportService._naive_utc(end))
+        return query.order_by(Message.id)
+    
+    @staticmethod
+    def _ndjson_chunk(rows) -> bytes:
+        lines = []
+        for row in rows:
+            record = dict(zip(EXPORT_COLUMNS, row))
+            if record["timestamp"] is not None:
+                record["timestamp"] = record["timestamp"].isoformat()
+            lines.append(json.dumps(record, ensure_ascii=False))
+        return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+    
+    @staticmethod
+    def _csv_chunk(rows, header: bool = False) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+        return buffer.getvalue().encode("utf-8")
+    
+    @staticmethod
+    @read_only
+    def _connection(db: Session, query):
+        """Conexión para la consulta (en SQLite, una de lectura: la exportación no ocupa la de escritura)"""
+        return db.connection(bind_arguments={"clause": query})
+    
+    @staticmethod
+    def iter_export(
+        business_id: int,
+        fmt: str = "ndjson",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        compress: bool = False,
+        chunk_size: int = 2000
+    ) -> Iterator[bytes]:
+        """
+        Genera la exportación por bloques de bytes (NDJSON o CSV, opcionalmente gzip)
+        
+        Abre su propia sesión de base de datos: la respuesta se sigue enviando
+        después de que termine la petición que la creó.
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: formato gzip
+        
+        def emit(data: bytes) -> bytes:
+            return compressor.compress(data) if compressor else data
+        
+        db = SessionLocal()
+        exported = 0
+        try:
+            if fmt == "csv":
+                yield emit(ExportService._csv_chunk([], header=True))
+            # Ejecución Core (sin la capa de carga del ORM): solo tuplas de columnas
+            query = ExportService._query(business_id, start, end).execution_options(
+                stream_results=True, yield_per=chunk_size
+            )
+            result = ExportService._connection(db, query).execute(query)
+            for rows in result.partitions():
+                exported += len(rows)
+                data = ExportService._csv_chunk(rows) if fmt == "csv" else ExportService._ndjson_chunk(rows)
+                chunk = emit(data)
+                if chunk:
+                    yield chunk
+            if compressor:
+                yield compressor.flush()
+            logger.info("Exportados %d mensajes del negocio %s", exported, business_id, extra={"business_id": business_id})
+        finally:
+            db.close()
@@ -1,12 +1,39 @@
-import google.generativeai as genai
+import asyncio
+import json
 import logging
+import threading
 from typing import List, Dict, Optional
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Configurar API key de Google Gemini
-genai.configure(api_key=settings.GOOGLE_GEMINI)
+_genai = None
+_genai_lock = threading.Lock()
+
+def _get_genai():
+    """
+    Importa y configura google.generativeai la primera vez que se necesita.
+    
+    La importación arrastra gRPC y protobuf, así que se difiere para no
+    penalizar el arranque de la API.
+    """
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                
+                # Configurar API key de Google Gemini
+                if settings.GOOGLE_GEMINI_API_ENDPOINT:
+                    genai.configure(
+                        api_key=settings.GOOGLE_GEMINI,
+                        transport="rest",
+                        client_options={"api_endpoint": settings.GOOGLE_GEMINI_API_ENDPOINT}
+                    )
+                else:
+                    genai.configure(api_key=settings.GOOGLE_GEMINI)
+                _genai = genai
+    return _genai
 
 # Definir el prompt del sistema directamente en el código si no está en settings
 DEFAULT_SYSTEM_CONTEXT = """
@@ -15,8 +42,75 @@ Puedes ayudar con información sobre el menú, precios, horarios, y tomar pedido
 Sé amable y entusiasta sobre nuestros platos.
 """
 
+# Respuesta que se envía cuando Gemini falla (se contabiliza como fallback)
+FALLBACK_RESPONSE = "Lo siento, no puedo procesar tu solicitud en este momento."
+
 class GeminiService:
     """Servicio para interactuar con la API de Google Gemini."""
+    @staticmethod
+    def warm_up() -> None:
+        """Carga el cliente de Gemini por adelantado (se llama en segundo plano al arrancar)"""
+        try:
+            _get_genai()
+        except Exception as e:
+            logger.warning("No se pudo precargar el cliente de Gemini: %s", e)
+    
+    @staticmethod
+    def build_prompt(
+        message: str,
+        conversation_history: List[Dict[str, str]] = None,
+        system_prompt: Optional[str] = None,
+        knowledge: Optional[List[str]] = None
+    ) -> str:
+        """
+        Construye el prompt con el contexto del negocio, los fragmentos de su
+        base de conocimiento relevantes para el mensaje, el historial y el mensaje actual
+        """
+        # Usar el prompt personalizado o el predeterminado
+        system_context = system_prompt if system_prompt else getattr(
+            settings, 
+            "GEMINI_SYSTEM_CONTEXT", 
+            DEFAULT_SYSTEM_CONTEXT
+        )
+        
+        # Construir el prompt completo:
+        full_prompt = f"{system_context}\n\n"
+        
+        if knowledge:
+            full_prompt += "Información del negocio relevante para la pregunta:\n"
+            for snippet in knowledge:
+                full_prompt += f"- {snippet}\n"
+            full_prompt += "\n"
+        
+        # Añadir historial de conversación si existe
+        if conversation_history:
+            full_prompt += "Historial de conversación:\n"
+            for msg in conversation_history:
+                role = "Usuario" if msg["role"] == "user" else "Asistente"
+                full_prompt += f"{role}: {msg['content']}\n"
+            full_prompt += "\n"
+        
+        # Añadir el mensaje actual
+        full_prompt += f"Usuario: {message}\nAsistente:"
+        return full_prompt
+    
+    @staticmethod
+    def generate_text(prompt: str) -> str:
+        """
+        Llama a Gemini y devuelve el texto generado.
+        
+        Es síncrono y propaga los errores (incluida una respuesta vacía): quien
+        llama decide el plazo y la respuesta alternativa.
+        """
+        logger.debug("Prompt enviado a Gemini (%d caracteres): %s", len(prompt), prompt)
+        model = _get_genai().GenerativeModel(settings.GOOGLE_GEMINI_MODEL)
+        response = model.generate_content(prompt, stream=False)
+        ai_response = response.text.strip()
+        if not ai_response:
+            raise ValueError("Gemini devolvió una respuesta vacía")
+        logger.debug("Respuesta de Gemini: %s", ai_response)
+        return ai_response
+    
     @staticmethod
     async def generate_response(
         message: str, 
@@ -24,42 +118,56 @@ class GeminiService:
         system_prompt: Optional[str] = None
     ) -> str:
         """Genera una respuesta usando Google Gemini basada en el mensaje y el historial de conversación."""
+        prompt = GeminiService.build_prompt(message, conversation_history, system_prompt)
         try:
-            # Inicializar modelo
-            model = genai.GenerativeModel(settings.GOOGLE_GEMINI_MODEL)
-            
-            # Usar el prompt personalizado o el predeterminado
-            system_context = system_prompt if system_prompt else getattr(
-                settings, 
-                "GEMINI_SYSTEM_CONTEXT", 
-                DEFAULT_SYSTEM_CONTEXT
-            )
-            
-            # Construir el prompt completo:
-            full_prompt = f"{system_context}\n\n"
-            
-            # Añadir historial de conversación si existe
-            if conversation_history:
-                full_prompt += "Historial de conversación:\n"
-                for msg in conversation_history:
-                    role = "Usuario" if msg["role"] == "user" else "Asistente"
-                    full_prompt += f"{role}: {msg['content']}\n"
-                full_prompt += "\n"
-            
-            # Añadir el mensaje actual
-            full_prompt += f"Usuario: {message}\nAsistente:"
-            
-            logger.info(f"Prompt enviado a Gemini: {full_prompt}")
-            
-            # Generar respuesta
-            response = model.generate_content(full_prompt, stream=False)
-            
-            # Obtener respuesta generada
-            ai_response = response.text.strip()
-            logger.info(f"Respuesta de Gemini: {ai_response}")
-            
-            return ai_response
+            return await asyncio.to_thread(GeminiService.generate_text, prompt)
+        except Exception as e:
+            logger.error("Error generating response with Gemini: %s", e)
+            return FALLBACK_RESPONSE
+    
+    @staticmethod
+    def summarize_conversations(conversations: Dict[int, str]) -> Dict[int, str]:
+        """
+        Resume varias conversaciones en una sola llamada a Gemini.
         
+        Es síncrono: lo usa el trabajo de resúmenes en segundo plano, que se
+        ejecuta en un hilo. Pide la respuesta en JSON ({id de sesión: resumen}) y
+        devuelve solo los resúmenes recibidos; si la llamada falla o la
+        respuesta no es válida devuelve un diccionario vacío.
+        """
+        if not conversations:
+            return {}
+        prompt = (
+            "Por favor, genera un resumen conciso de cada una de las siguientes conversaciones "
+            "entre un usuario y un asistente.\n"
+            "Resalta: 1) El propósito principal de la conversación, 2) Cualquier decisión o información "
+            "importante compartida, 3) Si se completó alguna tarea o transacción. "
+            "Limita cada resumen a 2-3 frases cortas.\n"
+            "Responde únicamente con un objeto JSON cuyas claves sean los números de sesión "
+            "y cuyos valores sean los resúmenes.\n\n"
+        )
+        prompt += "\n".join(
+            f"### Sesión {session_id}\n{text}" for session_id, text in conversations.items()
+        )
+        try:
+            model = _get_genai().GenerativeModel(settings.GOOGLE_GEMINI_MODEL)
+            response = model.generate_content(
+                prompt,
+                generation_config={"response_mime_type": "application/json"}
+            )
+            summaries = json.loads(response.text)
         except Exception as e:
-            logger.error(f"Error generating response with Gemini: {e}")
-            return "Lo siento, no puedo procesar tu solicitud en este momento."
\ No newline at end of file
+            logger.error("Error summarizing %d conversations with Gemini: %s", len(conversations), e)
+            return {}
+        if not isinstance(summaries, dict):
+            logger.warning("Gemini devolvió un resumen por lotes no válido")
+            return {}
+        result = {}
+        for key, summary in summaries.items():
+            try:
+                session_id = int(key)
+            except (TypeError, ValueError):
+                continue
+            if session_id in conversations and isinstance(summary, str) and summary.strip():
+                result[session_id] = summary.strip()
+        return result
@@ -0,0 +1,25 @@
+import threading
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import settings
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+def get_graph_session() -> requests.Session:
+    """
+    Sesión HTTP compartida para la Graph API: reutiliza conexiones (keep-alive)
+    entre hilos y lleva ya la cabecera de autorización.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=settings.GRAPH_HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["Authorization"] = f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}"
+                _session = session
+    return _session
@@ -0,0 +1,241 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.cache import LocalCache
+
+# Frases (sin tildes; se normalizan como los mensajes) que identifican cada intención,
+# el campo del negocio que la responde y la plantilla de la respuesta. Nada de
+# palabras sueltas que aparecen igual en quejas o avisos ("web", "correo",
+# "esta abierto"): "no me funciona la web" no pregunta por la web
+INTENTS: Dict[str, Dict[str, Any]] = {
+    "address": {
+        "field": "address",
+        "template": "Estamos en {address}.",
+        "phrases": [
+            "direccion", "donde estais", "donde estan", "donde esta el local", "donde os encuentro",
+            "ubicacion", "como llego", "como llegar",
+        ],
+    },
+    "phone": {
+        "field": "phone",
+        "template": "Puedes llamarnos al {phone}.",
+        "phrases": ["telefono", "numero de telefono", "llamaros", "llamarles", "os puedo llamar"],
+    },
+    "email": {
+        "field": "email",
+        "template": "Puedes escribirnos a {email}.",
+        "phrases": ["email", "e mail", "correo electronico", "direccion de correo", "os escribo"],
+    },
+    "website": {
+        "field": "website",
+        "template": "Nuestra web es {website}.",
+        "phrases": ["pagina web", "sitio web", "vuestra web", "vuestra pagina"],
+    },
+    "opening_hours": {
+        "field": "opening_hours",
+        "template": "Nuestro horario: {opening_hours}.",
+        "phrases": [
+            "horario", "horarios", "a que hora abris", "a que hora abren", "a que hora cerrais",
+            "a que hora cierran", "cuando abris", "cuando abren", "estais abiertos", "abris hoy",
+        ],
+    },
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9ñ]+")
+
+# Comienzos (normalizados) de un mensaje que es una pregunta aunque no lleve "?"
+_QUESTION_STARTS = (
+    " donde ", " cual ", " cuales ", " que ", " a que ", " cuando ", " como ", " cuanto ",
+    " teneis ", " tienen ", " tienes ", " hay ", " podeis ", " pueden ", " puedo ",
+    " me dais ", " me das ", " me pasas ", " me pasais ",
+)
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin tildes ni signos, con un espacio a cada lado (límites de palabra)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower().replace("ñ", "\0"))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c)).replace("\0", "ñ")
+    return f" {_NON_WORD.sub(' ', stripped).strip()} "
+
+
+class AhoCorasick:
+    """
+    Autómata de Aho–Corasick: busca todas las frases en una sola pasada por el texto.
+
+    Se construye una vez (trie con enlaces de fallo) y cada búsqueda es lineal
+    en la longitud del texto, independientemente del número de frases.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # patterns: frase -> etiqueta
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, int]]] = [[]]
+        for phrase, label in patterns.items():
+            node = 0
+            for char in phrase:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._out[node].append((label, len(phrase)))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                # Los hijos de la raíz fallan a la raíz
+                self._fail[child] = self._goto[fail].get(char, 0) if node else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search(self, text: str) -> List[Tuple[str, int, int]]:
+        """Frases encontradas como (etiqueta, inicio, fin), en orden de aparición"""
+        found: List[Tuple[str, int, int]] = []
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for label, length in self._out[node]:
+                found.append((label, end - length, end))
+        return found
+
+
+class IntentMatcher:
+    """Intenciones que un negocio concreto puede responder con sus propios datos"""
+
+    def __init__(self, answers: Dict[str, str]):
+        self.answers = answers
+        self._automaton = AhoCorasick({
+            normalize(phrase): intent
+            for intent in answers
+            for phrase in INTENTS[intent]["phrases"]
+        })
+
+    @staticmethod
+    def _resolve(found: List[Tuple[str, int, int]]) -> List[Tuple[str, int, int]]:
+        """
+        Frases sin solapar, de izquierda a derecha y la más larga en cada posición
+
+        En "dirección de correo" se queda "direccion de correo" (email) y se
+        descarta "direccion" (address). Las frases llevan un espacio a cada
+        lado, así que dos frases seguidas comparten ese espacio sin solaparse.
+        """
+        resolved: List[Tuple[str, int, int]] = []
+        for hit in sorted(found, key=lambda hit: (hit[1], hit[1] - hit[2])):
+            if not resolved or hit[1] >= resolved[-1][2] - 1:
+                resolved.append(hit)
+        return resolved
+
+    def match(self, content: str) -> List[str]:
+        """
+        Intenciones del mensaje, sin repetir y en orden de aparición
+
+        Solo si el mensaje es una pregunta ("?", "¿" o un comienzo como "dónde"
+        o "a qué hora") o si las frases encontradas ocupan casi todo el mensaje
+        ("teléfono", "el horario"): "he llamado al teléfono y nadie
+        contesta" no pregunta por el teléfono.
+        """
+        text = normalize(content)
+        found = self._resolve(self._automaton.search(text))
+        if not found:
+            return []
+        if not ("?" in content or "¿" in content or text.startswith(_QUESTION_STARTS)):
+            # Caracteres del mensaje (sin espacios) que forman parte de alguna frase
+            covered = {i for _, start, end in found for i in range(start, end) if text[i] != " "}
+            if len(covered) < settings.INTENT_MIN_COVERAGE * (len(text) - text.count(" ")):
+                return []
+        intents: List[str] = []
+        for intent, _, _ in found:
+            if intent not in intents:
+                intents.append(intent)
+        return intents
+
+
+# Autómatas compilados, por los valores de los campos del negocio: si el negocio
+# cambia, su instantánea en BusinessCache trae otros valores y se compila uno nuevo
+matcher_cache = LocalCache(
+    "intent_matcher",
+    maxsize=settings.BUSINESS_CACHE_MAX_SIZE,
+    ttl=settings.BUSINESS_CACHE_TTL_SECONDS
+)
+
+_counters: Counter = Counter()
+_counters_lock = threading.Lock()
+
+
+def _count(*keys: str) -> None:
+    with _counters_lock:
+        for key in keys:
+            _counters[key] += 1
+
+
+class IntentService:
+    """
+    Respuestas inmediatas a preguntas sobre los datos del negocio.
+
+    Preguntas como "¿dirección?" o "¿a qué hora abrís?" se responden con una
+    plantilla y los campos del negocio (address, phone, email, website,
+    opening_hours), sin llamar a Gemini. Solo se consideran mensajes cortos
+    y con forma de pregunta (ver IntentMatcher.match): en uno largo, o en una
+    queja que menciona el teléfono, la pregunta suele necesitar la IA. Cada
+    negocio puede desactivarlo (intent_fast_path = False).
+    """
+
+    @staticmethod
+    def _matcher(business: Any) -> Optional[IntentMatcher]:
+        values: Tuple = tuple(getattr(business, INTENTS[intent]["field"], None) for intent in INTENTS)
+        if not any(values):
+            return None
+
+        def build() -> IntentMatcher:
+            answers = {
+                intent: spec["template"].format(**{spec["field"]: value.strip().rstrip(".")})
+                for (intent, spec), value in zip(INTENTS.items(), values)
+                if value and value.strip()
+            }
+            return IntentMatcher(answers)
+
+        return matcher_cache.get_or_load(values, build)
+
+    @staticmethod
+    def answer(content: str, business: Optional[Any]) -> Optional[str]:
+        """Respuesta con los datos del negocio, o None si el mensaje necesita la IA"""
+        if not settings.INTENT_FAST_PATH_ENABLED or business is None:
+            return None
+        if getattr(business, "intent_fast_path", None) is False:
+            return None
+        _count("checked")
+        if len(content.split()) > settings.INTENT_MAX_MESSAGE_WORDS:
+            return None
+        matcher = IntentService._matcher(business)
+        if matcher is None:
+            return None
+        intents = matcher.match(content)
+        if not intents:
+            return None
+        _count("matched", *(f"intent_{intent}" for intent in intents))
+        return "\n".join(matcher.answers[intent] for intent in intents)
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Mensajes comprobados, respondidos sin IA y tasa de acierto en este worker"""
+        with _counters_lock:
+            counters = dict(_counters)
+        checked = counters.get("checked", 0)
+        return {
+            "checked": checked,
+            "matched": counters.get("matched", 0),
+            "match_rate": round(counters.get("matched", 0) / checked, 4) if checked else 0.0,
+            "intents": {key[len("intent_"):]: value for key, value in counters.items() if key.startswith("intent_")},
+            "cache": matcher_cache.stats(),
+        }
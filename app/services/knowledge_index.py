@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.db import SessionLocal
+from app.repositories.knowledge_repository import KnowledgeRepository
+from app.services.cache import LocalCache
+from app.services.intent_matcher import normalize
+
+logger = logging.getLogger(__name__)
+
+# Versión del formato de los ficheros del índice; si cambia se reconstruyen
+INDEX_FORMAT = 1
+
+# Fragmentos que se leen por consulta al poner al día un índice
+LOAD_BATCH_SIZE = 1000
+
+# Palabras demasiado frecuentes para distinguir un fragmento de otro
+STOPWORDS = frozenset("""
+a al algo como con cual cuales de del donde e el en es esa ese eso esta este esto fue ha hay la las le les lo los
+me mi mis muy no o os para pero por que se si sin su sus te tiene teneis tienen tu un una unas uno unos y ya yo
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9ñ]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Términos del texto: normalizado, sin palabras vacías y con el plural recortado"""
+    terms = []
+    for token in _TOKEN.findall(normalize(text)):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("es"):
+            token = token[:-2]
+        elif len(token) > 3 and token.endswith("s"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class BM25Index:
+    """
+    Índice invertido con puntuación BM25 para los fragmentos de un negocio.
+
+    Admite altas y bajas sueltas: cada fragmento guarda sus frecuencias de
+    términos, así que quitarlo solo toca sus propias entradas en el índice.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self):
+        # id -> (título, contenido, updated_at, frecuencias de términos, longitud)
+        self.docs: Dict[int, Tuple[Optional[str], str, datetime, Dict[str, int], int]] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def versions(self) -> Dict[int, datetime]:
+        return {doc_id: doc[2] for doc_id, doc in self.docs.items()}
+
+    def add(self, doc_id: int, title: Optional[str], content: str, updated_at: datetime) -> None:
+        """Indexa un fragmento (sustituye la versión anterior si ya estaba)"""
+        freqs = dict(Counter(tokenize(f"{title or ''} {content}")))
+        length = sum(freqs.values())
+        with self._lock:
+            self._remove(doc_id)
+            self.docs[doc_id] = (title, content, updated_at, freqs, length)
+            self.total_length += length
+            for term, freq in freqs.items():
+                self.postings.setdefault(term, {})[doc_id] = freq
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        freqs = doc[3]
+        self.total_length -= doc[4]
+        for term in freqs:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Los k fragmentos con mayor puntuación para la consulta: (id, puntuación)"""
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self.docs)
+            if not count or not terms:
+                return []
+            average = self.total_length / count or 1.0
+            scores: Dict[int, float] = {}
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, freq in posting.items():
+                    norm = freq + self.K1 * (1 - self.B + self.B * self.docs[doc_id][4] / average)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.K1 + 1) / norm
+        return sorted(scores.items(), key=lambda hit: hit[1], reverse=True)[:k]
+
+    def snippet(self, doc_id: int) -> Tuple[Optional[str], str]:
+        title, content = self.docs[doc_id][:2]
+        return title, content
+
+
+# Índices cargados en este worker; el repositorio los invalida en todos los
+# workers al modificar la base de conocimiento del negocio
+index_cache = LocalCache(
+    "knowledge_index",
+    maxsize=settings.KNOWLEDGE_INDEX_CACHE_SIZE,
+    ttl=settings.BUSINESS_CACHE_TTL_SECONDS
+)
+
+
+class KnowledgeIndexService:
+    """
+    Recuperación de fragmentos de la base de conocimiento para el prompt.
+
+    Cada negocio tiene un índice BM25 en memoria que se guarda en
+    KNOWLEDGE_INDEX_DIR para recargarlo rápido (al arrancar o tras una
+    invalidación). Al cargarlo se compara la versión (updated_at) de cada
+    fragmento con la de la base de datos, sin leer el contenido, y solo se
+    indexan los fragmentos nuevos o modificados y se quitan los eliminados.
+    """
+
+    @staticmethod
+    def _path(business_id: int) -> str:
+        return os.path.join(settings.KNOWLEDGE_INDEX_DIR, f"{business_id}.pickle")
+
+    @staticmethod
+    def _read(business_id: int) -> BM25Index:
+        try:
+            with open(KnowledgeIndexService._path(business_id), "rb") as f:
+                data = pickle.load(f)
+            if data.get("format") == INDEX_FORMAT:
+                return data["index"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Índice de conocimiento del negocio %s ilegible, se reconstruye: %s", business_id, e)
+        return BM25Index()
+
+    @staticmethod
+    def _write(business_id: int, index: BM25Index) -> None:
+        """Guarda el índice de forma atómica (fichero temporal y rename)"""
+        os.makedirs(settings.KNOWLEDGE_INDEX_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=settings.KNOWLEDGE_INDEX_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with index._lock:
+                    pickle.dump({"format": INDEX_FORMAT, "index": index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, KnowledgeIndexService._path(business_id))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def load(db: Session, business_id: int) -> BM25Index:
+        """Carga el índice guardado y lo pone al día con la base de datos"""
+        index = KnowledgeIndexService._read(business_id)
+        current = KnowledgeRepository.get_versions(db, business_id)
+        indexed = index.versions()
+        removed = [doc_id for doc_id in indexed if doc_id not in current]
+        changed = [doc_id for doc_id, version in current.items() if indexed.get(doc_id) != version]
+        for doc_id in removed:
+            index.remove(doc_id)
+        for start in range(0, len(changed), LOAD_BATCH_SIZE):
+            for doc_id, title, content, updated_at in KnowledgeRepository.get_many(db, changed[start:start + LOAD_BATCH_SIZE]):
+                index.add(doc_id, title, content, updated_at)
+        if removed or changed:
+            KnowledgeIndexService._write(business_id, index)
+            logger.info(
+                "Índice de conocimiento del negocio %s: %d indexados, %d eliminados",
+                business_id, len(changed), len(removed), extra={"business_id": business_id}
+            )
+        return index
+
+    @staticmethod
+    def get(db: Session, business_id: int) -> BM25Index:
+        return index_cache.get_or_load(business_id, lambda: KnowledgeIndexService.load(db, business_id))
+
+    @staticmethod
+    def search(db: Session, business_id: int, query: str, k: Optional[int] = None) -> List[Tuple[int, float]]:
+        return KnowledgeIndexService.get(db, business_id).search(query, k or settings.KNOWLEDGE_TOP_K)
+
+    @staticmethod
+    async def snippets(business_id: int, query: str) -> List[str]:
+        """
+        Fragmentos más relevantes para el mensaje, recortados para el prompt
+
+        Se ejecuta en un hilo con su propia sesión: cargar el índice (leer el
+        fichero, comparar versiones con la BD y reindexar) no debe bloquear el
+        bucle de eventos durante el webhook.
+        """
+        return await asyncio.to_thread(KnowledgeIndexService._snippets, business_id, query)
+
+    @staticmethod
+    def _snippets(business_id: int, query: str) -> List[str]:
+        db = SessionLocal()
+        try:
+            index = KnowledgeIndexService.get(db, business_id)
+        finally:
+            db.close()
+        snippets = []
+        for doc_id, _ in index.search(query, settings.KNOWLEDGE_TOP_K):
+            title, content = index.snippet(doc_id)
+            text = f"{title}: {content}" if title else content
+            if len(text) > settings.KNOWLEDGE_SNIPPET_MAX_CHARS:
+                text = text[:settings.KNOWLEDGE_SNIPPET_MAX_CHARS].rsplit(" ", 1)[0] + "…"
+            snippets.append(text)
+        return snippets
+
+    @staticmethod
+    def refresh(db: Session, business_id: int) -> None:
+        """Pone al día el índice tras modificar la base de conocimiento (en el worker que la modificó)"""
+        index_cache.set(business_id, KnowledgeIndexService.load(db, business_id))
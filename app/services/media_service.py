@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional, Set
+from app.config import settings
+from app.database.db import SessionLocal
+from app.models.whatsapp_model import WhatsAppMedia
+from app.repositories.message_repository import MessageRepository
+from app.services.graph_http import get_graph_session
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+class MediaTooLargeError(Exception):
+    """El medio supera MEDIA_MAX_BYTES"""
+
+@dataclass
+class StoredMedia:
+    """Medio guardado en disco, direccionado por su contenido"""
+    media_id: str
+    sha256: str
+    path: str  # relativo a MEDIA_DIR
+    mime_type: Optional[str]
+    size: int
+    deduplicated: bool
+
+_semaphore: Optional[asyncio.Semaphore] = None
+_background_tasks: Set[asyncio.Task] = set()
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.MEDIA_MAX_CONCURRENT_DOWNLOADS)
+    return _semaphore
+
+class MediaService:
+    """
+    Descarga de los medios de los mensajes entrantes (imágenes, audio, documentos...).
+    
+    Resuelve el media id en la Graph API, descarga el fichero en streaming a un
+    temporal (por bloques, con límite de tamaño y calculando el sha256 sobre la
+    marcha) y lo guarda en MEDIA_DIR/ab/cd/<sha256>. Un mismo contenido se guarda
+    una sola vez: si el sha256 que anuncia la Graph API ya está en disco, ni
+    siquiera se descarga. Las descargas se ejecutan en hilos, como mucho
+    MEDIA_MAX_CONCURRENT_DOWNLOADS a la vez por proceso.
+    """
+    
+    @staticmethod
+    def relative_path(sha256: str) -> str:
+        return os.path.join(sha256[:2], sha256[2:4], sha256)
+    
+    @staticmethod
+    def _resolve(media_id: str) -> dict:
+        """Obtiene la URL temporal y los metadatos del medio"""
+        response = get_graph_session().get(f"{settings.WHATSAPP_API_URL}/{media_id}", timeout=10)
+        response.raise_for_status()
+        return response.json()
+    
+    @staticmethod
+    def download(media_id: str, mime_type: Optional[str] = None) -> StoredMedia:
+        """Descarga (si hace falta) y guarda un medio; síncrono, se ejecuta en un hilo"""
+        info = MediaService._resolve(media_id)
+        mime_type = info.get("mime_type") or mime_type
+        file_size = info.get("file_size")
+        if file_size and int(file_size) > settings.MEDIA_MAX_BYTES:
+            raise MediaTooLargeError(f"Media {media_id} is {file_size} bytes")
+        
+        announced = info.get("sha256")
+        if announced:
+            existing = os.path.join(settings.MEDIA_DIR, MediaService.relative_path(announced))
+            if os.path.exists(existing):
+                return StoredMedia(media_id, announced, MediaService.relative_path(announced),
+                                   mime_type, os.path.getsize(existing), True)
+        
+        tmp_dir = os.path.join(settings.MEDIA_DIR, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out, get_graph_session().get(info["url"], stream=True, timeout=30) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > settings.MEDIA_MAX_BYTES:
+                        raise MediaTooLargeError(f"Media {media_id} exceeds {settings.MEDIA_MAX_BYTES} bytes")
+                    digest.update(chunk)
+                    out.write(chunk)
+            sha256 = digest.hexdigest()
+            if announced and announced != sha256:
+                logger.warning("sha256 del medio %s no coincide con el anunciado por la Graph API", media_id)
+            relative_path = MediaService.relative_path(sha256)
+            final_path = os.path.join(settings.MEDIA_DIR, relative_path)
+            deduplicated = os.path.exists(final_path)
+            if deduplicated:
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return StoredMedia(media_id, sha256, relative_path, mime_type, size, deduplicated)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
+    @staticmethod
+    def _store_for_message(message_id: int, media: WhatsAppMedia) -> StoredMedia:
+        stored = MediaService.download(media.id, media.mime_type)
+        db = SessionLocal()
+        try:
+            MessageRepository.set_media(
+                db,
+                message_id,
+                media_id=stored.media_id,
+                media_sha256=stored.sha256,
+                media_mime_type=stored.mime_type,
+                media_size=stored.size,
+                media_path=stored.path
+            )
+        finally:
+            db.close()
+        logger.info(
+            "Media %s stored as %s (%d bytes%s)",
+            stored.media_id, stored.sha256[:12], stored.size, ", deduplicated" if stored.deduplicated else ""
+        )
+        return stored
+    
+    @staticmethod
+    async def store_for_message(message_id: int, media: WhatsAppMedia) -> StoredMedia:
+        """Descarga el medio de un mensaje guardado y lo enlaza; como mucho N descargas a la vez"""
+        async with _get_semaphore():
+            return await asyncio.to_thread(MediaService._store_for_message, message_id, media)
+    
+    @staticmethod
+    def schedule(message_id: int, media: WhatsAppMedia) -> None:
+        """Lanza la descarga en segundo plano sin esperar (procesamiento inline del webhook)"""
+        async def run():
+            try:
+                await MediaService.store_for_message(message_id, media)
+            except Exception as e:
+                logger.error("Error downloading media %s: %s", media.id, e)
+        
+        task = asyncio.get_running_loop().create_task(run())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
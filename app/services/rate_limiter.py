@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from app.config import settings
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "rate", "burst", "notified")
+
+    def __init__(self, burst: int, rate: float, updated: float):
+        self.tokens = float(burst)
+        self.updated = updated
+        self.rate = rate  # fichas por segundo
+        self.burst = burst
+        self.notified = False  # ya se avisó al contacto en esta racha de exceso
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class TokenBucketLimiter:
+    """
+    Limitador token bucket por clave (p. ej. negocio y wa_id de un contacto), seguro entre hilos.
+
+    Cada clave tiene un cubo de burst fichas que se rellena a rate_per_minute;
+    cada mensaje consume una. El estado está acotado a max_keys cubos en orden
+    LRU: al insertar un cubo nuevo se descartan, desde el menos reciente, los
+    que ya se habrían rellenado (equivalen a uno nuevo) y, si aún no hay
+    sitio, los menos recientes aunque no estén llenos.
+    El estado es del proceso: con varios workers el límite efectivo se
+    multiplica por su número.
+    """
+
+    def __init__(self, name: str, max_keys: int):
+        self.name = name
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, _Bucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = 0
+        self.evicted = 0
+
+    def acquire(self, key: Hashable, rate_per_minute: float, burst: int) -> Optional[bool]:
+        """
+        Consume una ficha del cubo de la clave.
+
+        Returns:
+            None si hay ficha; si no, True la primera vez que se excede el
+            límite en la racha (para avisar una sola vez) y False las siguientes.
+        """
+        now = time.monotonic()
+        rate = rate_per_minute / 60.0
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._make_room(now)
+                bucket = self._buckets[key] = _Bucket(burst, rate, now)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.refill(now)
+                # El negocio puede haber cambiado sus límites
+                bucket.rate, bucket.burst = rate, burst
+            if bucket.tokens >= 1.0:
+                bucket.tokens -= 1.0
+                bucket.notified = False
+                self.allowed += 1
+                return None
+            self.throttled += 1
+            first = not bucket.notified
+            bucket.notified = True
+            return first
+
+    def _make_room(self, now: float) -> None:
+        """Descarta cubos hasta que cabe uno nuevo (con el lock tomado)"""
+        if len(self._buckets) < self.max_keys:
+            return
+        # Se recorre desde el menos reciente y se para en el primero que no
+        # está lleno: la inserción no recorre todo el diccionario
+        while self._buckets:
+            oldest = next(iter(self._buckets.values()))
+            if not oldest.is_full(now):
+                break
+            self._buckets.popitem(last=False)
+            self.evicted += 1
+        while len(self._buckets) >= self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evicted += 1
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        """Elimina el cubo de una clave, o todos si key es None"""
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "keys": len(self._buckets),
+                "max_keys": self.max_keys,
+                "allowed": self.allowed,
+                "throttled": self.throttled,
+                "evicted": self.evicted,
+            }
+
+
+# Mensajes entrantes por (business_id, wa_id); los límites los fija cada negocio
+inbound_limiter = TokenBucketLimiter("inbound", max_keys=settings.INBOUND_LIMITER_MAX_CONTACTS)
@@ -0,0 +1,82 @@
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.conversation_session import ConversationSession
+from app.repositories.message_repository import MessageRepository
+from app.repositories.session_repository import SessionRepository
+from app.services.gemini_service import GeminiService
+
+logger = logging.getLogger(__name__)
+
+# Longitud máxima de cada mensaje dentro del prompt de resumen
+MAX_MESSAGE_CHARS = 500
+
+class SummaryService:
+    """
+    Resúmenes de sesiones en segundo plano.
+    
+    Las sesiones cerradas (por el usuario o por inactividad) quedan en cola con
+    summarized_at nulo. El trabajo periódico las toma por lotes y resume varias
+    por cada llamada a Gemini; el resumen se guarda en ConversationSession.context.
+    Las que Gemini no devuelve se reintentan con espera exponencial, hasta
+    SUMMARY_MAX_ATTEMPTS veces.
+    """
+    
+    @staticmethod
+    def _transcripts(db: Session, sessions: List[ConversationSession], max_messages: int) -> Dict[int, str]:
+        """Últimos `max_messages` mensajes de cada sesión, en texto; omite las sesiones vacías"""
+        recent: Dict[int, List[str]] = {}
+        rows = MessageRepository.get_recent_for_sessions(db, [session.id for session in sessions], max_messages)
+        for session_id, direction, content in rows:
+            role = "Usuario" if direction == "incoming" else "Asistente"
+            recent.setdefault(session_id, []).append(f"{role}: {(content or '')[:MAX_MESSAGE_CHARS]}")
+        return {session_id: "\n".join(lines) for session_id, lines in recent.items()}
+    
+    @staticmethod
+    def summarize_pending(db: Session, batch_size: int, sessions_per_call: int, max_messages: int) -> int:
+        """
+        Resume hasta `batch_size` sesiones pendientes, `sessions_per_call` por llamada
+        
+        Las sesiones sin mensajes se marcan como resumidas sin contexto. Las que
+        Gemini no devuelve se aplazan (SessionRepository.defer_summaries).
+        
+        Returns:
+            Número de sesiones marcadas como resumidas
+        """
+        sessions = SessionRepository.get_pending_summaries(db, batch_size)
+        if not sessions:
+            db.commit()
+            return 0
+        transcripts = SummaryService._transcripts(db, sessions, max_messages)
+        empty: Dict[int, Optional[str]] = {session.id: None for session in sessions if session.id not in transcripts}
+        # Intentos previos de las que van a Gemini, por si hay que aplazarlas
+        attempts = {session.id: session.summary_attempts or 0 for session in sessions if session.id in transcripts}
+        # Guardar las vacías confirma la transacción de lectura: ninguna sigue
+        # abierta durante las llamadas a Gemini (en SQLite retendría la única
+        # conexión de escritura; en Postgres, una conexión "idle in transaction")
+        SessionRepository.save_summaries(db, empty)
+        summarized = len(empty)
+        
+        pending = list(transcripts.items())
+        calls = 0
+        for start in range(0, len(pending), sessions_per_call):
+            chunk = dict(pending[start:start + sessions_per_call])
+            summaries = GeminiService.summarize_conversations(chunk)
+            calls += 1
+            # Una transacción corta por lote
+            summarized += SessionRepository.save_summaries(db, summaries)
+            for session_id in summaries:
+                attempts.pop(session_id, None)
+            missing = len(chunk) - len(summaries)
+            if missing:
+                logger.warning("Gemini no devolvió %d de %d resúmenes; se reintentarán", missing, len(chunk))
+        
+        if attempts:
+            abandoned = SessionRepository.defer_summaries(
+                db, attempts, settings.SUMMARY_MAX_ATTEMPTS, settings.SUMMARY_RETRY_BASE_SECONDS
+            )
+            if abandoned:
+                logger.warning("%d sesiones sin resumen tras %d intentos; se dan por resumidas", abandoned, settings.SUMMARY_MAX_ATTEMPTS)
+        logger.info("Resumidas %d sesiones con %d llamadas a Gemini", summarized, calls)
+        return summarized
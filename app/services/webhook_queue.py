@@ -0,0 +1,84 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.whatsapp_model import (
+    WhatsAppMessage,
+    WhatsAppStatus,
+    WhatsAppValueMessages,
+    WhatsAppWebhookEvent
+)
+from app.repositories.job_repository import JobRepository
+from app.services.whatsapp_service import WhatsAppService
+
+logger = logging.getLogger(__name__)
+
+class WebhookQueueService:
+    """
+    Encola los eventos del webhook en webhook_jobs y los procesa desde los workers.
+    
+    La petición HTTP solo valida y persiste (una inserción multi-fila por
+    webhook); el procesamiento (Gemini, envío de respuestas) lo hacen los
+    procesos de python -m app.tasks.queue_worker, que escalan por separado.
+    """
+    
+    @staticmethod
+    def build_jobs(event: WhatsAppWebhookEvent, business_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Convierte un evento del webhook en un trabajo por mensaje y por estado"""
+        jobs = []
+        if event.object != "whatsapp_business_account":
+            return jobs
+        for entry in event.entry:
+            for change in entry.changes:
+                if change.field != "messages":
+                    continue
+                value = change.value
+                # El value se guarda sin las listas de mensajes/estados: cada
+                # trabajo solo necesita metadata y contactos además de su elemento
+                context = value.model_dump(
+                    mode="json", by_alias=True, exclude_none=True, exclude={"messages", "statuses"}
+                )
+                for message in value.messages or []:
+                    jobs.append({
+                        "kind": "message",
+                        "ordering_key": message.from_,
+                        "business_id": business_id,
+                        "payload": json.dumps({
+                            "message": message.model_dump(mode="json", by_alias=True, exclude_none=True),
+                            "value": context,
+                        }),
+                    })
+                for status in value.statuses or []:
+                    jobs.append({
+                        "kind": "status",
+                        "ordering_key": status.recipient_id,
+                        "business_id": business_id,
+                        "payload": json.dumps({
+                            "status": status.model_dump(mode="json", by_alias=True, exclude_none=True),
+                        }),
+                    })
+        return jobs
+    
+    @staticmethod
+    def enqueue_event(event: WhatsAppWebhookEvent, db: Session, business_id: Optional[int] = None) -> int:
+        """Persiste los trabajos del evento; devuelve cuántos se han encolado"""
+        jobs = WebhookQueueService.build_jobs(event, business_id)
+        return JobRepository.enqueue_many(db, jobs, max_attempts=settings.QUEUE_MAX_ATTEMPTS)
+    
+    @staticmethod
+    async def process_job(job: Dict[str, Any], db: Session) -> None:
+        """Procesa un trabajo reclamado; lanza la excepción si falla para que se reintente"""
+        payload = json.loads(job["payload"])
+        if job["kind"] == "message":
+            message = WhatsAppMessage.model_validate(payload["message"])
+            value = WhatsAppValueMessages.model_validate(payload["value"])
+            # attempts ya cuenta el intento en curso (se incrementa al reclamarlo)
+            await WhatsAppService.process_message(
+                message, value, db, job["business_id"], raise_errors=True, retry=job["attempts"] > 1
+            )
+        elif job["kind"] == "status":
+            status = WhatsAppStatus.model_validate(payload["status"])
+            await WhatsAppService.process_status_update(status, db, raise_errors=True)
+        else:
+            raise ValueError(f"Tipo de trabajo desconocido: {job['kind']}")
@@ -0,0 +1,243 @@
+import atexit
+import glob
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import os
+import queue
+import re
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = "webhooks-*.ndjson.gz"
+
+# Campos del payload de Meta con números de teléfono y con texto de los usuarios
+_PHONE_FIELDS = frozenset({"wa_id", "from", "recipient_id", "phone_number", "display_phone_number"})
+_BODY_FIELDS = frozenset({"body", "caption", "title", "description", "name", "address", "emoji", "filename"})
+_DIGITS = re.compile(r"\d")
+
+# Ids de mensaje (en mensajes, estados, context.id y reaction.message_id): el
+# base64 de un wamid lleva el número del contacto
+_ID_FIELDS = frozenset({"id", "message_id"})
+MESSAGE_ID_PREFIX = "wamid."
+_ALNUM = string.ascii_letters + string.digits
+
+
+def pseudonymize_phone(number: str) -> str:
+    """Sustituye un número por otro estable (el mismo contacto se sigue reconociendo)"""
+    digest = hashlib.sha256(f"{settings.SECRET_KEY}:{number}".encode()).hexdigest()
+    digits = iter(str(int(digest, 16)))
+    return _DIGITS.sub(lambda _: next(digits), number)
+
+
+def pseudonymize_message_id(message_id: str, key: Optional[str] = None) -> str:
+    """
+    Sustituye un wamid por otro estable con la misma forma y longitud
+
+    Se conservan el prefijo y los signos (+, /, =...): un estado o una
+    respuesta (context.id) sigue apuntando al mismo mensaje. key es
+    SECRET_KEY por defecto; la reproducción usa otra para generar ids nuevos.
+    """
+    body = message_id[len(MESSAGE_ID_PREFIX):]
+    stream = hashlib.shake_256(f"{key or settings.SECRET_KEY}:{message_id}".encode()).digest(len(body))
+    return MESSAGE_ID_PREFIX + "".join(
+        _ALNUM[byte % len(_ALNUM)] if char.isascii() and char.isalnum() else char
+        for char, byte in zip(body, stream)
+    )
+
+
+def scrub(value: Any, phones: bool, bodies: bool, key: Optional[str] = None) -> Any:
+    """Copia del payload sin números de teléfono y/o sin textos, conservando su forma y longitud"""
+    if isinstance(value, dict):
+        if key == "profile" and bodies:
+            return {k: ("x" * len(v) if isinstance(v, str) else v) for k, v in value.items()}
+        return {k: scrub(v, phones, bodies, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [scrub(item, phones, bodies, key) for item in value]
+    if isinstance(value, str):
+        if phones and key in _PHONE_FIELDS:
+            return pseudonymize_phone(value)
+        if phones and key in _ID_FIELDS and value.startswith(MESSAGE_ID_PREFIX):
+            return pseudonymize_message_id(value)
+        if bodies and key in _BODY_FIELDS:
+            return "x" * len(value)
+    return value
+
+
+class WebhookRecorder:
+    """
+    Grabación opcional del tráfico real del webhook para reproducirlo después.
+
+    En la petición solo se encola el cuerpo tal como llegó, con su instante y
+    su ruta; un hilo en segundo plano lo anonimiza si se ha configurado y lo
+    añade al segmento en curso (NDJSON comprimido con gzip). Los segmentos
+    rotan por tamaño o por antigüedad; mientras se escriben tienen la
+    extensión .part y se renombran al cerrarse, así que la herramienta de
+    reproducción solo ve segmentos completos. Si la cola está llena, el cuerpo
+    se descarta: grabar no debe frenar la ingesta.
+    """
+
+    def __init__(self):
+        self.recorded = 0
+        self.dropped = 0
+        self.segments = 0
+        self._queue: "queue.Queue[Optional[Tuple[float, str, bytes]]]" = queue.Queue(
+            maxsize=settings.WEBHOOK_RECORDING_QUEUE_SIZE
+        )
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[str] = None
+        self._opened_at = 0.0
+        self._written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.WEBHOOK_RECORDING_ENABLED
+
+    def record(self, body: bytes, path: str) -> None:
+        """Encola un cuerpo de webhook (sin coste si la grabación está desactivada)"""
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((time.time(), path, body))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            os.makedirs(settings.WEBHOOK_RECORDING_DIR, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="webhook-recorder", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Escribe lo pendiente y cierra el segmento en curso"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=10)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = ()
+            try:
+                if item is None:
+                    self._close_segment()
+                    return
+                if item:
+                    self._write(*item)
+                elif self._file is not None and time.time() - self._opened_at >= settings.WEBHOOK_RECORDING_SEGMENT_SECONDS:
+                    # Sin tráfico: el segmento se cierra igualmente al cumplir su antigüedad
+                    self._close_segment()
+            except Exception as e:
+                logger.error("Error grabando un webhook: %s", e, exc_info=True)
+
+    def _write(self, received_at: float, path: str, body: bytes) -> None:
+        text = body.decode("utf-8", errors="replace")
+        phones, bodies = settings.WEBHOOK_RECORDING_SCRUB_PHONES, settings.WEBHOOK_RECORDING_SCRUB_BODIES
+        if phones or bodies:
+            try:
+                text = json.dumps(scrub(json.loads(text), phones, bodies), ensure_ascii=False, separators=(",", ":"))
+            except ValueError:
+                # Un cuerpo que no es JSON no se puede anonimizar: no se guarda
+                self.dropped += 1
+                return
+        line = json.dumps({"ts": received_at, "path": path, "body": text}, ensure_ascii=False) + "\n"
+        data = line.encode("utf-8")
+        if self._file is None:
+            self._open_segment(received_at)
+        self._file.write(data)
+        self._written += len(data)
+        self.recorded += 1
+        if (
+            self._written >= settings.WEBHOOK_RECORDING_SEGMENT_BYTES
+            or received_at - self._opened_at >= settings.WEBHOOK_RECORDING_SEGMENT_SECONDS
+        ):
+            self._close_segment()
+
+    def _open_segment(self, started_at: float) -> None:
+        stamp = datetime.fromtimestamp(started_at, timezone.utc).strftime("%Y%m%dT%H%M%S")
+        name = f"webhooks-{stamp}-{os.getpid()}-{self.segments:04d}.ndjson.gz"
+        self._path = os.path.join(settings.WEBHOOK_RECORDING_DIR, name)
+        self._file = gzip.open(f"{self._path}.part", "wb", compresslevel=6)
+        self._opened_at = time.time()
+        self._written = 0
+        self.segments += 1
+
+    def _close_segment(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(f"{self._path}.part", self._path)
+        self._file = None
+        self._prune()
+
+    @staticmethod
+    def _prune() -> None:
+        """Elimina los segmentos más antiguos por encima de WEBHOOK_RECORDING_MAX_SEGMENTS"""
+        segments = list_segments(settings.WEBHOOK_RECORDING_DIR)
+        for path in segments[:max(0, len(segments) - settings.WEBHOOK_RECORDING_MAX_SEGMENTS)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # otro worker ya lo ha eliminado
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize(),
+            "segments_written": self.segments,
+        }
+
+
+def list_segments(directory: str) -> List[str]:
+    """Segmentos completos del directorio, del más antiguo al más reciente"""
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+
+def _read_segment(path: str) -> Iterator[Tuple[float, str, str]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield record["ts"], record["path"], record["body"]
+
+
+def read_segments(paths: List[str]) -> Iterator[Tuple[float, str, str]]:
+    """
+    Webhooks grabados en orden de llegada: (instante, ruta, cuerpo)
+
+    Con varios workers cada uno graba sus propios segmentos: se mezclan por
+    instante sin cargarlos en memoria.
+    """
+    by_worker: Dict[str, List[str]] = {}
+    for path in paths:
+        # webhooks-<inicio>-<pid>-<n>.ndjson.gz: los de un mismo pid van seguidos
+        worker = os.path.basename(path).split("-")[2]
+        by_worker.setdefault(worker, []).append(path)
+    streams = [
+        (record for path in sorted(worker_paths) for record in _read_segment(path))
+        for worker_paths in by_worker.values()
+    ]
+    return heapq.merge(*streams, key=lambda record: record[0])
+
+
+webhook_recorder = WebhookRecorder()
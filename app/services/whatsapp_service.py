@@ -1,18 +1,29 @@
 import requests
 import logging
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from app.config import settings
+from app.database.db import SessionLocal
+from app.logging_config import log_context
+from app.repositories.campaign_repository import CampaignRepository
 from app.repositories.contact_repository import ContactRepository
 from app.repositories.message_repository import MessageRepository
 from app.models.whatsapp_model import (
+    WhatsAppMessage,
     WhatsAppSendMessage,
-    WhatsAppTextContent
+    WhatsAppStatus,
+    WhatsAppTextContent,
+    WhatsAppValueMessages
 )
-from app.services.gemini_service import GeminiService
+from app.services.ai_reply_service import AIReplyService
 from app.repositories.session_repository import SessionRepository
-from app.repositories.business_repository import BusinessRepository
+from app.services.business_cache import BusinessCache
+from app.services.intent_matcher import IntentService
+from app.services.knowledge_index import KnowledgeIndexService
+from app.services.media_service import MediaService
+from app.services.rate_limiter import inbound_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -20,92 +31,131 @@ class WhatsAppService:
     """ Servicio para interactuar con la API de WhatsApp """
     
     @staticmethod
-    async def process_message(message: Dict[str, Any], value: Dict[str, Any], db: Session, business_id: int = None):
-        """ Procesa los mensajes entrantes de WhatsApp """
-        try:
-            # Extraer información básica del mensaje
-            message_data = WhatsAppService._extract_message_data(message)
-            
-            # Obtener información del perfil del remitente
-            profile_name = WhatsAppService._extract_profile_info(value, message_data["sender_id"])
+    async def process_message(
+        message: WhatsAppMessage,
+        value: WhatsAppValueMessages,
+        db: Session,
+        business_id: Optional[int] = None,
+        raise_errors: bool = False,
+        retry: bool = False
+    ):
+        """
+        Procesa los mensajes entrantes de WhatsApp
+        
+        Con raise_errors=True (workers de la cola) los errores se propagan para
+        que el trabajo se reintente en lugar de darse por procesado. Un
+        reintento (retry=True) ya pasó el límite por contacto en su primer
+        intento: no vuelve a consumir ficha ni se puede marcar como throttled.
+        """
+        with log_context(message_id=message.id, wa_id=message.from_, business_id=business_id):
+            try:
+                # Extraer información básica del mensaje
+                message_data = WhatsAppService._extract_message_data(message)
             
-            # Verificar y validar el business_id
-            business = WhatsAppService._validate_business(db, business_id)
+                # Obtener información del perfil del remitente
+                profile_name = WhatsAppService._extract_profile_info(value, message_data["sender_id"])
             
-            # Obtener o crear contacto
-            contact = ContactRepository.get_or_create(
-                db=db, 
-                wa_id=message_data["sender_id"], 
-                phone=message_data["sender_id"], 
-                name=profile_name, 
-                business_id=business.id if business else None
-            )
+                # Verificar y validar el business_id
+                business = WhatsAppService._validate_business(db, business_id)
+                
+                # Límite por contacto antes de tocar la BD o la IA; el cubo es
+                # por negocio, porque cada uno fija sus propios límites
+                first_throttled = None if retry else inbound_limiter.acquire(
+                    (business_id, message_data["sender_id"]),
+                    WhatsAppService._business_setting(business, "inbound_rate_per_minute", settings.INBOUND_RATE_PER_MINUTE),
+                    WhatsAppService._business_setting(business, "inbound_burst", settings.INBOUND_BURST)
+                )
+                if first_throttled is not None:
+                    await WhatsAppService._handle_throttled(
+                        db, message, message_data, profile_name, business, notify=first_throttled
+                    )
+                    return
             
-            # Gestionar sesiones
-            session = WhatsAppService._manage_session(db, contact, business)
+                # Obtener o crear contacto
+                contact = ContactRepository.get_or_create(
+                    db=db, 
+                    wa_id=message_data["sender_id"], 
+                    phone=message_data["sender_id"], 
+                    name=profile_name, 
+                    business_id=business.id if business else None
+                )
             
-            # Procesar el contenido del mensaje
-            content = WhatsAppService._process_message_content(message_data, message)
+                # Gestionar sesiones
+                session = WhatsAppService._manage_session(db, contact, business)
             
-            # Comprobar comandos especiales
-            if await WhatsAppService._check_special_commands(content, message_data["sender_id"], db):
-                return  # Comando especial procesado, terminar
+                # Procesar el contenido del mensaje
+                content = WhatsAppService._process_message_content(message_data, message)
             
-            # Guardar mensaje en la base de datos
-            saved_message = WhatsAppService._save_incoming_message(
-                db, 
-                message_data, 
-                contact, 
-                content, 
-                session
-            )
+                # Comprobar comandos especiales
+                if await WhatsAppService._check_special_commands(content, message_data["sender_id"], db):
+                    return  # Comando especial procesado, terminar
             
-            # Procesar con IA si es un mensaje de texto
-            if message_data["message_type"] == "text":
-                await WhatsAppService._process_with_ai(
+                # Guardar mensaje en la base de datos
+                saved_message = WhatsAppService._save_incoming_message(
                     db, 
                     message_data, 
                     contact, 
                     content, 
-                    session, 
-                    business
+                    session
                 )
+            
+                # Descargar el medio adjunto (imagen, audio, documento...)
+                media = message.media
+                if media and saved_message.media_path is None:
+                    if raise_errors:
+                        # En la cola, un fallo de descarga reintenta el trabajo. La
+                        # transacción no sigue abierta durante la descarga
+                        message_id = saved_message.id
+                        db.commit()
+                        await MediaService.store_for_message(message_id, media)
+                    else:
+                        MediaService.schedule(saved_message.id, media)
+            
+                # Procesar con IA si es un mensaje de texto
+                if message_data["message_type"] == "text":
+                    await WhatsAppService._process_with_ai(
+                        db, 
+                        message_data, 
+                        contact, 
+                        content, 
+                        session, 
+                        business
+                    )
                 
-        except Exception as e:
-            logger.error(f"Error processing message: {str(e)}", exc_info=True)
+            except Exception as e:
+                logger.error("Error processing message: %s", e, exc_info=True)
+                if raise_errors:
+                    raise
     
     # Métodos auxiliares para dividir la lógica
     
     @staticmethod
-    def _extract_message_data(message: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_message_data(message: WhatsAppMessage) -> Dict[str, Any]:
         """Extrae la información básica del mensaje"""
-        message_type = message.get("type")
-        sender_id = message.get("from")
-        wa_message_id = message.get("id")
-        timestamp_str = message.get("timestamp")
-        
         # Convertir timestamp a datetime
-        timestamp = datetime.fromtimestamp(int(timestamp_str)) if timestamp_str else datetime.now(timezone.utc)
+        timestamp = (
+            datetime.fromtimestamp(int(message.timestamp))
+            if message.timestamp
+            else datetime.now(timezone.utc)
+        )
         
         return {
-            "message_type": message_type,
-            "sender_id": sender_id,
-            "wa_message_id": wa_message_id,
+            "message_type": message.type,
+            "sender_id": message.from_,
+            "wa_message_id": message.id,
             "timestamp": timestamp
         }
     
     @staticmethod
-    def _extract_profile_info(value: Dict[str, Any], sender_id: str) -> str:
+    def _extract_profile_info(value: WhatsAppValueMessages, sender_id: str) -> str:
         """Extrae la información del perfil del remitente"""
         try:
-            contacts = value.get("contacts", [])
-            if contacts:
-                for contact_info in contacts:
-                    if contact_info.get("wa_id") == sender_id:
-                        return contact_info.get("profile", {}).get("name", "Unknown")
+            for contact_info in value.contacts or []:
+                if contact_info.wa_id == sender_id:
+                    return contact_info.profile.get("name", "Unknown")
             return "Unknown"
         except Exception as e:
-            logger.warning(f"Error extracting profile info: {e}", exc_info=True)
+            logger.warning("Error extracting profile info: %s", e, exc_info=True)
             return "Unknown"
     
     @staticmethod
@@ -114,24 +164,71 @@ class WhatsAppService:
         if not business_id:
             return None
             
-        business = BusinessRepository.get_by_id(db, business_id)
+        business = BusinessCache.get(db, business_id)
         if not business:
-            logger.warning(f"Business ID {business_id} no encontrado, usando configuración predeterminada")
+            logger.warning("Business ID %s no encontrado, usando configuración predeterminada", business_id)
         
         return business
     
+    @staticmethod
+    def _business_setting(business: Optional[Any], name: str, default: Any) -> Any:
+        value = getattr(business, name, None)
+        return default if value is None else value
+    
+    @staticmethod
+    async def _handle_throttled(
+        db: Session,
+        message: WhatsAppMessage,
+        message_data: Dict[str, Any],
+        profile_name: str,
+        business: Optional[Any],
+        notify: bool
+    ) -> None:
+        """
+        Camino barato para un mensaje por encima del límite del contacto
+        
+        Sin sesión, sin descarga de medios y sin IA. Con
+        INBOUND_THROTTLE_ACTION=persist el mensaje se guarda para el historial;
+        con drop solo se registra en el log. El aviso se envía una vez por racha.
+        """
+        sender_id = message_data["sender_id"]
+        logger.warning("Inbound rate limit exceeded for %s", sender_id)
+        if notify and settings.INBOUND_THROTTLE_NOTICE:
+            db.commit()  # sin transacción abierta durante el envío (ver _process_with_ai)
+            await WhatsAppService.send_message(sender_id, settings.INBOUND_THROTTLE_NOTICE)
+        if settings.INBOUND_THROTTLE_ACTION != "persist":
+            return
+        contact = ContactRepository.get_or_create(
+            db=db,
+            wa_id=sender_id,
+            phone=sender_id,
+            name=profile_name,
+            business_id=business.id if business else None
+        )
+        if MessageRepository.get_by_wa_id(db, message_data["wa_message_id"]):
+            return
+        MessageRepository.create(
+            db=db,
+            wa_message_id=message_data["wa_message_id"],
+            contact_id=contact.id,
+            direction="incoming",
+            message_type=message_data["message_type"],
+            content=WhatsAppService._process_message_content(message_data, message),
+            timestamp=message_data["timestamp"],
+            status="throttled"
+        )
+    
     @staticmethod
     def _manage_session(db: Session, contact: Any, business: Optional[Any]) -> Any:
         """Gestiona las sesiones del usuario"""
-        # Cerrar sesiones inactivas
-        SessionRepository.close_inactive_sessions(db, timeout_minutes=30)
-        
-        # Obtener o crear sesión activa
+        # Obtener o crear sesión activa; solo se comprueba la expiración de la
+        # sesión de este contacto (el barrido global lo hace el trabajo periódico)
         business_id = business.id if business else None
         active_session = SessionRepository.get_or_create_active_session(
             db, 
             contact.id, 
-            business_id=business_id
+            business_id=business_id,
+            timeout_minutes=settings.SESSION_TIMEOUT_MINUTES
         )
         
         # Actualizar última actividad
@@ -140,16 +237,33 @@ class WhatsAppService:
         return active_session
     
     @staticmethod
-    def _process_message_content(message_data: Dict[str, Any], message: Dict[str, Any]) -> str:
+    def _process_message_content(message_data: Dict[str, Any], message: WhatsAppMessage) -> str:
         """Procesa y extrae el contenido del mensaje"""
-        if message_data["message_type"] == "text" and "text" in message:
-            content = message.get("text", {}).get("body", "")
-            logger.info(f"Received text message from {message_data['sender_id']}: {content}")
-            return content
-        else:
-            content = f"Mensaje de tipo {message_data['message_type']} recibido"
-            logger.info(f"Received non-text message: {message_data['message_type']}")
+        if message.type == "text" and message.text:
+            content = message.text.body
+            logger.info("Received text message from %s", message_data["sender_id"])
+            logger.debug("Text message content: %s", content)
             return content
+        
+        # Respuestas a botones y listas: el título elegido es el contenido
+        if message.interactive:
+            reply = message.interactive.button_reply or message.interactive.list_reply
+            if reply:
+                return reply.title
+        if message.button:
+            return message.button.text
+        
+        content = f"Mensaje de tipo {message.type} recibido"
+        media = message.media
+        if media and media.caption:
+            content = f"{content}: {media.caption}"
+        elif message.location:
+            location = message.location
+            content = f"{content}: {location.name or location.address or ''} ({location.latitude}, {location.longitude})"
+        elif message.reaction and message.reaction.emoji:
+            content = f"{content}: {message.reaction.emoji}"
+        logger.info("Received non-text message: %s", message.type)
+        return content
     
     @staticmethod
     async def _check_special_commands(content: str, sender_id: str, db: Session) -> bool:
@@ -168,6 +282,10 @@ class WhatsAppService:
         session: Any
     ) -> Any:
         """Guarda el mensaje entrante en la base de datos"""
+        # Un reintento (cola o reenvío de Meta) puede traer un mensaje ya guardado
+        existing = MessageRepository.get_by_wa_id(db, message_data["wa_message_id"])
+        if existing:
+            return existing
         return MessageRepository.create(
             db=db,
             wa_message_id=message_data["wa_message_id"],
@@ -189,7 +307,27 @@ class WhatsAppService:
         session: Any, 
         business: Optional[Any]
     ) -> None:
-        """Procesa el mensaje con IA y envía respuesta"""
+        """
+        Procesa el mensaje con IA y envía respuesta
+        
+        Las preguntas sobre los datos del negocio (dirección, teléfono,
+        horario...) se responden con IntentService sin llamar a Gemini. Si
+        Gemini no responde dentro del plazo del negocio (o está caído) se
+        envía la respuesta alternativa de AIReplyService; la respuesta tardía,
+        si la política del negocio es entregarla, se envía después.
+        """
+        started = time.perf_counter()
+        sender_id = message_data["sender_id"]
+        contact_id, session_id = contact.id, session.id
+        
+        # Respuesta inmediata con los datos del negocio, sin historial ni Gemini
+        answer = IntentService.answer(content, business)
+        if answer is not None:
+            db.commit()  # sin transacción abierta durante el envío
+            response_data = await WhatsAppService.send_message(sender_id, answer)
+            WhatsAppService._save_ai_reply(db, contact_id, session_id, response_data, answer, started, fallback=False)
+            return
+        
         # Obtener historial de la sesión actual
         messages = MessageRepository.get_session_history(db, session.id, limit=5)
         
@@ -202,49 +340,79 @@ class WhatsAppService:
                 "content": msg.content
             })
         
-        # Obtener prompt personalizado del negocio si existe
-        system_prompt = business.system_prompt if business and hasattr(business, 'system_prompt') else None
+        # Sin transacción abierta mientras se espera al índice y a Gemini: no
+        # retiene una conexión (ni, en SQLite, la única de escritura del proceso,
+        # que el hilo del índice puede necesitar)
+        db.commit()
+        
+        # Solo los fragmentos de la base de conocimiento relevantes para el mensaje
+        knowledge = await KnowledgeIndexService.snippets(business.id, content) if business else None
         
-        # Generar respuesta
-        ai_response = await GeminiService.generate_response(
+        async def deliver_late_reply(text: str) -> None:
+            # La sesión de la petición ya puede estar cerrada: se abre una propia
+            response_data = await WhatsAppService.send_message(sender_id, text)
+            with SessionLocal() as late_db:
+                WhatsAppService._save_ai_reply(late_db, contact_id, session_id, response_data, text, started, fallback=False)
+        
+        # Generar respuesta (el negocio define el prompt, el plazo y el mensaje de espera)
+        reply = await AIReplyService.reply(
             content, 
             conversation_history, 
-            system_prompt=system_prompt
+            business=business,
+            on_late_reply=deliver_late_reply,
+            knowledge=knowledge
         )
         
         # Enviar respuesta
-        response_data = await WhatsAppService.send_message(message_data["sender_id"], ai_response)
+        response_data = await WhatsAppService.send_message(sender_id, reply.text)
         
-        # Guardar respuesta en BD
-        if response_data and "messages" in response_data:
-            outgoing_wa_id = response_data.get("messages", [{}])[0].get("id", "unknown")
-            MessageRepository.create(
-                db=db,
-                wa_message_id=outgoing_wa_id,
-                contact_id=contact.id,
-                direction="outgoing",
-                message_type="text",
-                content=ai_response,
-                timestamp=datetime.now(timezone.utc),
-                status="sent",
-                ai_processed=True,
-                ai_response=ai_response,
-                session_id=session.id
-            )
+        # Guardar respuesta en BD (con latencia y fallback para las métricas diarias)
+        WhatsAppService._save_ai_reply(db, contact_id, session_id, response_data, reply.text, started, fallback=reply.source != "ai")
+    
+    @staticmethod
+    def _save_ai_reply(
+        db: Session,
+        contact_id: int,
+        session_id: int,
+        response_data: Optional[Dict[str, Any]],
+        text: str,
+        started: float,
+        fallback: bool
+    ) -> None:
+        """Guarda una respuesta enviada por la IA (o su alternativa) si la Graph API la aceptó"""
+        if not response_data or "messages" not in response_data:
+            return
+        outgoing_wa_id = response_data.get("messages", [{}])[0].get("id", "unknown")
+        MessageRepository.create(
+            db=db,
+            wa_message_id=outgoing_wa_id,
+            contact_id=contact_id,
+            direction="outgoing",
+            message_type="text",
+            content=text,
+            timestamp=datetime.now(timezone.utc),
+            status="sent",
+            ai_processed=True,
+            ai_response=text,
+            session_id=session_id,
+            ai_latency_ms=int((time.perf_counter() - started) * 1000),
+            ai_fallback=fallback
+        )
     
     @staticmethod
-    async def process_status_update(status: Dict[str, Any], db: Session):
+    async def process_status_update(status: WhatsAppStatus, db: Session, raise_errors: bool = False):
         """ Procesa las actualizaciones de estado de los mensajes """
         try:
-            wa_message_id = status.get("id")
-            status_value = status.get("status")
+            wa_message_id = status.id
+            status_value = status.status
             
-            # Actualizar estado del mensaje en la base de datos
-            MessageRepository.update_status(db, wa_message_id, status_value)
+            # Actualizar estado del mensaje en la base de datos; si no es de una
+            # conversación, puede ser de un destinatario de campaña
+            if MessageRepository.update_status(db, wa_message_id, status_value) is None:
+                CampaignRepository.update_delivery_status(db, wa_message_id, status_value)
             
-            logger.info(f"Updated message status: {wa_message_id} -> {status_value}")
+            logger.info("Updated message status: %s -> %s", wa_message_id, status_value, extra={"message_id": wa_message_id})
             
-            status_value = status.get('status')
             if status_value == "delivered":
                 # Lógica para mensajes entregados
                 pass
@@ -254,16 +422,21 @@ class WhatsAppService:
             elif status_value == "sent":
                 # Lógica para mensajes enviados
                 pass
+            elif status_value == "failed":
+                errors = [f"{error.code}: {error.title}" for error in status.errors or []]
+                logger.warning("Message %s failed: %s", wa_message_id, errors, extra={"message_id": wa_message_id})
             else:
-                logger.warning(f"Unknown status: {status_value}")
+                logger.warning("Unknown status: %s", status_value)
                 
         except Exception as e:
-            logger.error(f"Error processing status update: {str(e)}", exc_info=True)
+            logger.error("Error processing status update: %s", e, exc_info=True)
+            if raise_errors:
+                raise
     
     @staticmethod
     async def send_message(recipient_id: str, message_text: str):
         """ Envía un mensaje a través de la API de WhatsApp """
-        url = f"https://graph.facebook.com/v22.0/{settings.WHATSAPP_PHONE_ID}/messages"
+        url = f"{settings.WHATSAPP_API_URL}/{settings.WHATSAPP_PHONE_ID}/messages"
         
         headers = {
             "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
@@ -278,10 +451,10 @@ class WhatsAppService:
         try:
             response = requests.post(url, headers=headers, json=message.model_dump(by_alias=True))
             response.raise_for_status()
-            logger.info(f"Message sent successfully to {recipient_id}")
+            logger.info("Message sent successfully to %s", recipient_id)
             return response.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to send message: {e}")
+            logger.error("Failed to send message: %s", e)
             return {"error": str(e)}
     
     @staticmethod
@@ -293,54 +466,34 @@ class WhatsAppService:
     @staticmethod
     async def close_user_session(sender_id: str, db: Session):
         """
-        Cierra la sesión activa de un usuario, genera un resumen y envía un mensaje de confirmación.
+        Cierra la sesión activa de un usuario y envía un mensaje de confirmación.
+        
+        El resumen de la conversación no se genera aquí: la sesión queda en cola
+        y el trabajo de resúmenes en segundo plano lo guarda en su contexto.
         """
         try:
             # Buscar el contacto
             contact = ContactRepository.get_by_wa_id(db, sender_id)
             
             if not contact:
-                logger.warning(f"Intento de cerrar sesión para usuario no encontrado: {sender_id}")
+                logger.warning("Intento de cerrar sesión para usuario no encontrado: %s", sender_id)
                 return {"status": "error", "message": "Usuario no encontrado"}
             
             # Buscar la sesión activa
             active_session = SessionRepository.get_active_session(db, contact.id)
             
             if not active_session:
+                db.commit()  # sin transacción abierta durante el envío (ver _process_with_ai)
                 await WhatsAppService.send_message(
                     sender_id, 
                     "No tienes una sesión activa en este momento."
                 )
                 return {"status": "warning", "message": "No hay sesión activa"}
             
-            # Obtener los mensajes de la sesión
-            messages = MessageRepository.get_session_history(db, active_session.id, limit=20)
-            
-            # Generar un resumen de la conversación usando Gemini
-            conversation_text = ""
-            for msg in messages:
-                role = "Usuario" if msg.direction == "incoming" else "Asistente"
-                conversation_text += f"{role}: {msg.content}\n"
-            
-            summary_prompt = f"""
-            Por favor, genera un resumen conciso de la siguiente conversación entre un usuario y un asistente.
-            Resalta: 1) El propósito principal de la conversación, 2) Cualquier decisión o información importante compartida,
-            3) Si se completó alguna tarea o transacción. Limita el resumen a 2-3 frases cortas.
-            
-            Conversación:
-            {conversation_text}
-            
-            Resumen:
-            """
-            
-            session_summary = await GeminiService.generate_response(summary_prompt, [])
-            
-            # Guardar el resumen en el campo context
             SessionRepository.close_session(
                 db, 
                 active_session.id, 
-                status="closed_by_user",
-                context=session_summary
+                status="closed_by_user"
             )
             
             # Enviar mensaje de confirmación
@@ -348,11 +501,13 @@ class WhatsAppService:
                 "Tu sesión ha sido cerrada correctamente. "
                 "Si necesitas ayuda nuevamente, no dudes en escribirnos."
             )
+            session_id, contact_name = active_session.id, contact.name
+            db.commit()  # sin transacción abierta durante el envío
             await WhatsAppService.send_message(sender_id, confirmation_message)
             
-            logger.info(f"Sesión {active_session.id} cerrada para {contact.name} con resumen: {session_summary[:50]}...")
-            return {"status": "success", "session_id": active_session.id, "summary": session_summary}
+            logger.info("Sesión %s cerrada para %s; resumen pendiente", session_id, contact_name)
+            return {"status": "success", "session_id": session_id}
         
         except Exception as e:
-            logger.error(f"Error cerrando sesión: {str(e)}", exc_info=True)
-            return {"status": "error", "message": str(e)}
\ No newline at end of file
+            logger.error("Error cerrando sesión: %s", e, exc_info=True)
+            return {"status": "error", "message": str(e)}
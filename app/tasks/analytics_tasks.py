@@ -0,0 +1,23 @@
+import logging
+from app.config import settings
+from app.database.db import SessionLocal
+from app.repositories.analytics_repository import AnalyticsRepository
+
+logger = logging.getLogger(__name__)
+
+def update_daily_stats() -> int:
+    """
+    Consolida en business_daily_stats los mensajes y sesiones nuevos desde la
+    última ejecución.
+    
+    Se registra en el JobScheduler (un solo worker del despliegue).
+    """
+    db = SessionLocal()
+    try:
+        messages = AnalyticsRepository.rollup_messages(db, settings.ANALYTICS_ROLLUP_BATCH_SIZE)
+        sessions = AnalyticsRepository.rollup_sessions(db, settings.ANALYTICS_SETTLE_SECONDS)
+        if messages or sessions:
+            logger.info("Tarea programada: Rollup de %d ids de mensajes y %d filas de sesiones", messages, sessions)
+        return messages
+    finally:
+        db.close()
@@ -0,0 +1,41 @@
+import logging
+from datetime import datetime, timedelta
+from app.config import settings
+from app.database import partitions
+from app.database.db import SessionLocal, engine
+from app.services.archive_service import ArchiveService
+
+logger = logging.getLogger(__name__)
+
+def archive_closed_sessions() -> int:
+    """
+    Archiva en frío las sesiones cerradas hace más de ARCHIVE_RETENTION_DAYS.
+    
+    Se registra en el JobScheduler (un solo worker del despliegue).
+    """
+    db = SessionLocal()
+    try:
+        archived = ArchiveService.archive_closed_sessions(
+            db,
+            retention_days=settings.ARCHIVE_RETENTION_DAYS,
+            batch_size=settings.ARCHIVE_BATCH_SIZE,
+            max_batches=settings.ARCHIVE_MAX_BATCHES_PER_RUN
+        )
+        if archived > 0:
+            logger.info("Tarea programada: Archivadas %d sesiones", archived)
+        return archived
+    finally:
+        db.close()
+
+def maintain_message_partitions() -> None:
+    """
+    Crea las particiones mensuales de messages de los próximos meses y retira
+    las anteriores al periodo de retención que ya están vacías (archivadas).
+    """
+    # DDL fuera de transacción larga: cada sentencia se confirma por separado
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if not partitions.is_partitioned(connection):
+            return
+        partitions.ensure_partitions(connection, settings.MESSAGES_PARTITION_MONTHS_AHEAD)
+        cutoff = datetime.utcnow() - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+        partitions.drop_partitions_before(connection, cutoff, action=settings.MESSAGES_OLD_PARTITION_ACTION)
@@ -0,0 +1,16 @@
+from app.services.campaign_service import CampaignDispatcher
+
+_dispatcher = None
+
+async def dispatch_campaigns() -> int:
+    """
+    Envía los mensajes pendientes de las campañas en curso.
+    
+    Se registra en el JobScheduler (un solo worker del despliegue), así que el
+    ritmo de envío de cada campaña es global y no por worker.
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        # Se crea dentro del event loop (usa un asyncio.Semaphore)
+        _dispatcher = CampaignDispatcher()
+    return await _dispatcher.run_once()
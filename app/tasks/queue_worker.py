@@ -0,0 +1,155 @@
+"""
+Worker de la cola de webhooks (WEBHOOK_PROCESSING_MODE=queue).
+
+Reclama lotes de webhook_jobs con SELECT ... FOR UPDATE SKIP LOCKED y los
+procesa con WhatsAppService. Se escala lanzando más procesos, independientes
+de las réplicas HTTP:
+
+    python -m app.tasks.queue_worker --concurrency 10 --batch-size 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Any, Dict, Optional, Set
+from app.config import settings
+from app.database.db import SessionLocal
+from app.logging_config import log_context, setup_logging, shutdown_logging
+from app.repositories.job_repository import JobRepository
+from app.services.cache_invalidation import invalidation_bus
+from app.services.gemini_service import GeminiService
+from app.services.webhook_queue import WebhookQueueService
+
+logger = logging.getLogger(__name__)
+
+class QueueWorker:
+    """
+    Consume la cola manteniendo hasta `concurrency` trabajos en curso.
+    
+    Solo reclama tantos trabajos como huecos libres tiene, así que un trabajo
+    lento no retiene un lote entero. Los trabajos no terminados dentro del
+    visibility timeout (p. ej. si el proceso muere) los recupera otro worker.
+    """
+    
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        visibility_timeout: Optional[float] = None
+    ):
+        self.batch_size = batch_size or settings.QUEUE_BATCH_SIZE
+        self.concurrency = concurrency or settings.QUEUE_CONCURRENCY
+        self.poll_interval = poll_interval or settings.QUEUE_POLL_INTERVAL_SECONDS
+        self.visibility_timeout = visibility_timeout or settings.QUEUE_VISIBILITY_TIMEOUT_SECONDS
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.processed = 0
+        self.retried = 0
+        self.dead = 0
+        self._stopping = asyncio.Event()
+    
+    def stop(self) -> None:
+        """Deja de reclamar trabajos; los que están en curso terminan"""
+        self._stopping.set()
+    
+    def _claim(self, limit: int):
+        db = SessionLocal()
+        try:
+            return JobRepository.claim_batch(db, self.worker_id, limit, self.visibility_timeout)
+        finally:
+            db.close()
+    
+    async def _handle(self, job: Dict[str, Any]) -> None:
+        db = SessionLocal()
+        try:
+            with log_context(business_id=job["business_id"]):
+                try:
+                    await WebhookQueueService.process_job(job, db)
+                except Exception as e:
+                    db.rollback()
+                    status = JobRepository.fail(
+                        db, job, self.worker_id, f"{type(e).__name__}: {e}", settings.QUEUE_RETRY_BASE_SECONDS
+                    )
+                    if status == "dead":
+                        self.dead += 1
+                        logger.error("Job %s moved to dead-letter after %d attempts", job["id"], job["attempts"])
+                    else:
+                        self.retried += 1
+                        logger.warning("Job %s failed (attempt %d), will retry", job["id"], job["attempts"])
+                    return
+                if not JobRepository.complete(db, job["id"], self.worker_id):
+                    logger.warning("Job %s lease expired before completion", job["id"])
+                self.processed += 1
+        finally:
+            db.close()
+    
+    async def run(self) -> None:
+        """Bucle principal: reclama, procesa y repite hasta stop()"""
+        in_flight: Set[asyncio.Task] = set()
+        logger.info("Queue worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        while not self._stopping.is_set():
+            free = self.concurrency - len(in_flight)
+            claimed = 0
+            if free > 0:
+                try:
+                    jobs = await asyncio.to_thread(self._claim, min(self.batch_size, free))
+                except Exception as e:
+                    logger.warning("Could not claim jobs: %s", e)
+                    jobs = []
+                claimed = len(jobs)
+                for job in jobs:
+                    in_flight.add(asyncio.create_task(self._handle(job), name=f"webhook-job:{job['id']}"))
+            
+            if claimed and len(in_flight) < self.concurrency:
+                # Puede haber más trabajo esperando: volver a reclamar sin esperar
+                continue
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                in_flight -= done
+            else:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        
+        if in_flight:
+            logger.info("Waiting for %d jobs in progress", len(in_flight))
+            await asyncio.wait(in_flight)
+        logger.info(
+            "Queue worker %s stopped: %d processed, %d retried, %d dead",
+            self.worker_id, self.processed, self.retried, self.dead
+        )
+
+async def _main(worker: QueueWorker) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    loop.run_in_executor(None, GeminiService.warm_up)
+    invalidation_bus.start()
+    try:
+        await worker.run()
+    finally:
+        invalidation_bus.stop()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker de la cola de webhooks")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--poll-interval", type=float, default=None)
+    args = parser.parse_args()
+    
+    setup_logging()
+    worker = QueueWorker(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval
+    )
+    try:
+        asyncio.run(_main(worker))
+    finally:
+        shutdown_logging()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import asyncio
+import inspect
+import logging
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobStats:
+    """Métricas de ejecución de un trabajo periódico"""
+    runs: int = 0
+    failures: int = 0
+    is_leader: bool = False
+    last_run_at: Optional[datetime] = None
+    last_duration_ms: Optional[float] = None
+    max_duration_ms: float = 0.0
+    total_duration_ms: float = 0.0
+    last_error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "is_leader": self.is_leader,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "avg_duration_ms": round(self.total_duration_ms / self.runs, 2) if self.runs else None,
+            "max_duration_ms": self.max_duration_ms,
+            "last_error": self.last_error,
+        }
+
+
+@dataclass
+class PeriodicJob:
+    """Trabajo periódico; func puede ser una función síncrona o una corrutina"""
+    name: str
+    interval_seconds: float
+    func: Callable[[], Any]
+    stats: JobStats = field(default_factory=JobStats)
+
+    @property
+    def lock_key(self) -> int:
+        # Clave estable de 32 bits para pg_try_advisory_lock
+        return zlib.crc32(f"whats2want:job:{self.name}".encode())
+
+
+class _Lease:
+    """Liderazgo de un trabajo: una conexión dedicada que mantiene el advisory lock"""
+
+    def __init__(self, connection=None):
+        self.connection = connection
+
+    def is_alive(self) -> bool:
+        if self.connection is None:
+            return True
+        try:
+            self.connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def release(self, key: int) -> None:
+        if self.connection is None:
+            return
+        try:
+            self.connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+        except Exception:
+            pass
+        finally:
+            self.connection.close()
+
+
+class JobScheduler:
+    """
+    Ejecuta trabajos periódicos en un solo worker de todo el despliegue.
+
+    Cada trabajo intenta tomar un advisory lock de Postgres en una conexión
+    dedicada (fuera del pool). El worker que lo obtiene es el líder y ejecuta el
+    trabajo en cada intervalo; el resto reintenta cada JOB_LEADER_RETRY_SECONDS.
+    Si el líder muere o pierde la conexión, Postgres libera el lock y otro worker
+    toma el relevo. En otras bases de datos (nodo único) todos los trabajos se
+    ejecutan localmente.
+    """
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.database_url = database_url or settings.DATABASE_URL
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._lease_engine = None
+
+    @property
+    def uses_advisory_locks(self) -> bool:
+        return self.database_url.startswith("postgresql")
+
+    def register(self, name: str, interval_seconds: float, func: Callable[[], Any]) -> PeriodicJob:
+        """Registra un trabajo periódico"""
+        job = PeriodicJob(name=name, interval_seconds=interval_seconds, func=func)
+        self.jobs[name] = job
+        return job
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Devuelve las métricas de todos los trabajos registrados"""
+        return {name: job.stats.as_dict() for name, job in self.jobs.items()}
+
+    async def start(self) -> None:
+        """Arranca un bucle por cada trabajo registrado"""
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._job_loop(job), name=f"job:{job.name}"))
+
+    async def stop(self) -> None:
+        """Cancela los bucles y libera los locks"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+    def _acquire(self, job: PeriodicJob) -> Optional[_Lease]:
+        """Intenta obtener el liderazgo del trabajo"""
+        if not self.uses_advisory_locks:
+            return _Lease()
+        if self._lease_engine is None:
+            self._lease_engine = create_engine(self.database_url, poolclass=NullPool)
+        connection = self._lease_engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": job.lock_key}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            return _Lease(connection)
+        connection.close()
+        return None
+
+    async def _job_loop(self, job: PeriodicJob) -> None:
+        while True:
+            try:
+                lease = await asyncio.to_thread(self._acquire, job)
+            except Exception as e:
+                logger.warning("No se pudo intentar el liderazgo de %s: %s", job.name, e)
+                lease = None
+
+            if lease is None:
+                await asyncio.sleep(settings.JOB_LEADER_RETRY_SECONDS)
+                continue
+
+            job.stats.is_leader = True
+            logger.info("Este worker es líder del trabajo %s", job.name)
+            try:
+                while await asyncio.to_thread(lease.is_alive):
+                    await self._execute(job)
+                    await asyncio.sleep(job.interval_seconds)
+                logger.warning("Conexión de liderazgo perdida para %s", job.name)
+            finally:
+                job.stats.is_leader = False
+                await asyncio.shield(asyncio.to_thread(lease.release, job.lock_key))
+
+    async def _execute(self, job: PeriodicJob) -> None:
+        """Ejecuta el trabajo una vez y registra su duración"""
+        started = time.perf_counter()
+        job.stats.last_run_at = datetime.now(timezone.utc)
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                await asyncio.to_thread(job.func)
+            job.stats.last_error = None
+        except Exception as e:
+            job.stats.failures += 1
+            job.stats.last_error = str(e)
+            logger.error("Error en el trabajo %s: %s", job.name, e, exc_info=True)
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            job.stats.runs += 1
+            job.stats.last_duration_ms = duration_ms
+            job.stats.total_duration_ms += duration_ms
+            job.stats.max_duration_ms = max(job.stats.max_duration_ms, duration_ms)
+            logger.info("Trabajo %s ejecutado en %.1f ms", job.name, duration_ms)
+
+
+scheduler = JobScheduler()
@@ -1,30 +1,24 @@
 import logging
-from fastapi import Depends
-from sqlalchemy.orm import Session
+from app.config import settings
 from app.repositories.session_repository import SessionRepository
-from app.database.db import get_db
-import asyncio
+from app.database.db import SessionLocal
 
 logger = logging.getLogger(__name__)
 
-async def close_inactive_sessions(db: Session):
-    """Cierra sesiones que han estado inactivas por más de 30 minutos"""
+def close_inactive_sessions() -> int:
+    """
+    Cierra sesiones que han estado inactivas más de SESSION_TIMEOUT_MINUTES.
+    
+    Se registra en el JobScheduler, que la ejecuta en un hilo y en un solo
+    worker de todo el despliegue.
+    """
+    db = SessionLocal()
     try:
-        closed_count = SessionRepository.close_inactive_sessions(db, timeout_minutes=30)
+        closed_count = SessionRepository.close_inactive_sessions(
+            db, timeout_minutes=settings.SESSION_TIMEOUT_MINUTES
+        )
         if closed_count > 0:
-            logger.info(f"Tarea programada: Cerradas {closed_count} sesiones inactivas")
-    except Exception as e:
-        logger.error(f"Error en tarea de cierre de sesiones: {str(e)}", exc_info=True)
-
-async def start_session_cleanup_task():
-    """Inicia la tarea programada para limpiar sesiones inactivas"""
-    while True:
-        # Crear una nueva sesión de base de datos para la tarea
-        db = next(get_db())
-        try:
-            await close_inactive_sessions(db)
-        finally:
-            db.close()
-        
-        # Esperar 10 minutos antes de la próxima ejecución
-        await asyncio.sleep(10 * 60)
\ No newline at end of file
+            logger.info("Tarea programada: Cerradas %d sesiones inactivas", closed_count)
+        return closed_count
+    finally:
+        db.close()
@@ -0,0 +1,23 @@
+import logging
+from app.config import settings
+from app.database.db import SessionLocal
+from app.services.summary_service import SummaryService
+
+logger = logging.getLogger(__name__)
+
+def summarize_closed_sessions() -> int:
+    """
+    Resume por lotes las sesiones cerradas pendientes (closed_by_user y timed_out).
+    
+    Se registra en el JobScheduler (un solo worker del despliegue).
+    """
+    db = SessionLocal()
+    try:
+        return SummaryService.summarize_pending(
+            db,
+            batch_size=settings.SUMMARY_BATCH_SIZE,
+            sessions_per_call=settings.SUMMARY_SESSIONS_PER_CALL,
+            max_messages=settings.SUMMARY_MAX_MESSAGES
+        )
+    finally:
+        db.close()
@@ -0,0 +1 @@
+# Herramientas de benchmark y pruebas de carga (no se despliegan con la API)
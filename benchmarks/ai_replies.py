@@ -0,0 +1,110 @@
+"""
+Benchmark de las respuestas de IA con plazo (AIReplyService) contra Gemini simulado.
+
+Dos fases con --messages mensajes cada una, elegidos de un conjunto de
+--questions preguntas (así la caché de respuestas tiene aciertos):
+
+- lenta: Gemini con latencia --gemini-latency-ms ± --gemini-jitter-ms. Las
+  respuestas que superan --deadline-ms se sustituyen por la cacheada o el
+  mensaje de espera, y las tardías se entregan después.
+- caída: Gemini devuelve siempre error. El circuit breaker se abre tras
+  --breaker-threshold fallos y las siguientes respuestas no esperan a Gemini.
+
+Informa de la latencia de respuesta (p50/p95/máx), del origen de las
+respuestas y de las llamadas que recibió Gemini en cada fase.
+
+    python -m benchmarks.ai_replies --messages 300 --deadline-ms 1500 --gemini-latency-ms 1200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import Counter
+
+from benchmarks import fake_servers
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de respuestas de IA con plazo")
+    parser.add_argument("--messages", type=int, default=200, help="Mensajes por fase")
+    parser.add_argument("--questions", type=int, default=30, help="Preguntas distintas")
+    parser.add_argument("--concurrency", type=int, default=16, help="Conversaciones simultáneas")
+    parser.add_argument("--deadline-ms", type=int, default=1500)
+    parser.add_argument("--breaker-threshold", type=int, default=5)
+    parser.add_argument("--breaker-reset-seconds", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    fake_servers.add_arguments(parser)
+    parser.set_defaults(gemini_latency_ms=1200.0, gemini_jitter_ms=600.0)
+    args = parser.parse_args()
+
+    gemini = fake_servers.FakeGeminiServer(
+        profile=fake_servers.LatencyProfile(args.gemini_latency_ms, args.gemini_jitter_ms, args.error_rate),
+    ).start()
+    os.environ["GOOGLE_GEMINI_API_ENDPOINT"] = gemini.url
+    os.environ["AI_REPLY_DEADLINE_MS"] = str(args.deadline_ms)
+    os.environ["AI_LATE_REPLY_POLICY"] = "deliver"
+    os.environ["AI_MAX_CONCURRENT_CALLS"] = str(args.concurrency * 2)
+    os.environ["AI_BREAKER_FAILURE_THRESHOLD"] = str(args.breaker_threshold)
+    os.environ["AI_BREAKER_RESET_SECONDS"] = str(args.breaker_reset_seconds)
+
+    from app.services.ai_reply_service import AIReplyService, gemini_breaker
+
+    rng = random.Random(args.seed)
+    questions = [f"¿Tenéis el plato número {number} disponible hoy?" for number in range(args.questions)]
+    late_delivered = []
+
+    async def phase(name: str) -> None:
+        gemini.reset()
+        messages = [rng.choice(questions) for _ in range(args.messages)]
+        latencies, sources = [], Counter()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        late_before = len(late_delivered)
+
+        async def on_late(text: str) -> None:
+            late_delivered.append(text)
+
+        async def one(content: str) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                reply = await AIReplyService.reply(content, [], on_late_reply=on_late)
+                latencies.append((time.perf_counter() - started) * 1000)
+                sources[reply.source if reply.reason is None else f"{reply.source} ({reply.reason})"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(content) for content in messages))
+        elapsed = time.perf_counter() - started
+        # Dar tiempo a que lleguen las respuestas tardías de esta fase
+        await asyncio.sleep(min(5.0, (args.gemini_latency_ms + 3 * args.gemini_jitter_ms) / 1000))
+
+        print(f"\nFase {name}: {len(messages)} mensajes en {elapsed:.1f} s")
+        print(
+            f"  Latencia de respuesta: p50 {_percentile(latencies, 0.5):.0f} ms, "
+            f"p95 {_percentile(latencies, 0.95):.0f} ms, máx {max(latencies):.0f} ms "
+            f"(media {statistics.mean(latencies):.0f} ms, plazo {args.deadline_ms} ms)"
+        )
+        print(f"  Origen: {dict(sources)}")
+        print(f"  Respuestas tardías entregadas: {len(late_delivered) - late_before}")
+        print(f"  Llamadas recibidas por Gemini: {gemini.stats().get('generate_content', 0) + gemini.stats().get('errors', 0)}")
+        print(f"  Circuit breaker: {gemini_breaker.stats()}")
+
+    async def run() -> None:
+        await phase("lenta")
+        gemini.profile.error_rate = 1.0
+        await phase("caída")
+        print(f"\nEstadísticas (/health/ai): {AIReplyService.stats()}")
+
+    try:
+        asyncio.run(run())
+    finally:
+        gemini.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark de la importación masiva de negocios (BusinessImportService).
+
+Genera un fichero NDJSON o CSV con --rows negocios (un --invalid-ratio de ellos
+con errores de validación) y lo importa en una base de datos vacía de negocios.
+Informa de filas por segundo y del pico de memoria del proceso, que no debe
+crecer con --rows. Con --compare-single N mide también el alta fila a fila
+(BusinessRepository.create, un commit por fila) como referencia.
+
+    python -m benchmarks.business_import --rows 100000
+    python -m benchmarks.business_import --database-url postgresql://.../w2w_bench --rows 100000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+
+def _rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_file(path: str, fmt: str, rows: int, invalid_ratio: float, seed: int) -> None:
+    """Escribe el fichero de negocios sintéticos"""
+    rng = random.Random(seed)
+    fields = ["name", "business_type", "address", "phone", "email", "system_prompt"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        for i in range(1, rows + 1):
+            row = {
+                "name": f"Franquicia {i}",
+                "business_type": rng.choice(["restaurant", "store", "service"]),
+                "address": f"Calle {rng.randint(1, 500)}, {rng.choice(['Madrid', 'Sevilla', 'Bilbao'])}",
+                "phone": f"91{i:07d}",
+                "email": f"local{i}@franquicia.es",
+                "system_prompt": "Eres el asistente del local.",
+            }
+            if rng.random() < invalid_ratio:
+                row[rng.choice(["name", "email"])] = "" if rng.random() < 0.5 else "no-es-un-email"
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de importación masiva de negocios")
+    parser.add_argument("--database-url", help="Por defecto, un SQLite temporal")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--invalid-ratio", type=float, default=0.01)
+    parser.add_argument("--compare-single", type=int, default=0, help="Filas a insertar una a una")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'import.db')}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from app.database.db import SessionLocal
+    from app.database.init_db import create_tables
+    from app.repositories.business_repository import BusinessRepository
+    from app.services.business_import import BusinessImportService
+
+    create_tables()
+    path = os.path.join(workdir, f"businesses.{args.format}")
+    write_file(path, args.format, args.rows, args.invalid_ratio, args.seed)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+
+    rss_before = _rss_mb()
+    with SessionLocal() as db, open(path, "rb") as f:
+        result = BusinessImportService.import_file(db, f, args.format)
+    elapsed = result.elapsed_ms / 1000
+
+    print(f"Fichero: {args.rows} filas, {size_mb:.1f} MB ({args.format})")
+    print(f"Importadas: {result.imported}, rechazadas: {result.failed}")
+    print(f"Tiempo: {elapsed:.2f} s ({result.total_rows / elapsed:,.0f} filas/s)")
+    print(f"Pico de memoria: {_rss_mb():.1f} MB (antes de importar: {rss_before:.1f} MB)")
+
+    if args.compare_single:
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            for i in range(args.compare_single):
+                BusinessRepository.create(db, {"name": f"Una a una {i}", "phone": f"93{i:07d}"})
+            single = time.perf_counter() - started
+        print(f"Fila a fila: {args.compare_single / single:,.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark del motor de campañas contra la Graph API simulada.
+
+Siembra (o reutiliza) una base de datos con --contacts contactos de un mismo
+negocio, crea una campaña a --rate mensajes por segundo y la envía con
+CampaignDispatcher. Informa del ritmo conseguido frente al pedido, de los
+envíos a la Graph API por destinatario (1.0 = sin duplicados) y del reparto
+final de estados. Con --restart-after S el envío se corta a los S segundos y
+otro dispatcher (como tras un reinicio) termina la campaña.
+
+    python -m benchmarks.campaign --contacts 2000 --rate 200 --graph-latency-ms 80
+    python -m benchmarks.campaign --contacts 2000 --rate 100 --restart-after 5 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks import fake_servers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de campañas")
+    parser.add_argument("--database-url", help="Por defecto, un SQLite temporal")
+    parser.add_argument("--contacts", type=int, default=2_000)
+    parser.add_argument("--rate", type=float, default=100.0, help="rate_per_second de la campaña")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--restart-after", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    fake_servers.add_arguments(parser)
+    args = parser.parse_args()
+
+    graph = fake_servers.FakeGraphServer(
+        profile=fake_servers.LatencyProfile(args.graph_latency_ms, args.graph_jitter_ms, args.error_rate),
+    ).start()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'campaign.db')}"
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "WHATSAPP_API_URL": f"{graph.url}/v22.0",
+        "CAMPAIGN_MAX_CONCURRENCY": str(args.concurrency),
+        "CAMPAIGN_BATCH_SIZE": str(args.batch_size),
+        "CAMPAIGN_MAX_RATE_PER_SECOND": str(max(args.rate, 1.0)),
+        "CAMPAIGN_RETRY_BASE_SECONDS": "0.5",
+        "CAMPAIGN_LEASE_SECONDS": "1",
+    })
+
+    from sqlalchemy import create_engine
+    from benchmarks.repositories import seed
+
+    # Un solo negocio: todos los contactos le pertenecen
+    seed(create_engine(database_url), 1, args.contacts, args.contacts, args.seed)
+
+    from app.controllers.campaign_controller import CampaignController
+    from app.database.db import SessionLocal
+    from app.schemas.campaign import CampaignCreate
+    from app.services.campaign_service import CampaignDispatcher
+
+    with SessionLocal() as db:
+        campaign = CampaignController.create_campaign(db, 1, CampaignCreate(
+            name=f"Benchmark {time.time():.0f}",
+            template_name="oferta_del_dia",
+            template_components=[{"type": "body", "parameters": [
+                {"type": "text", "text": "{name}"},
+                {"type": "text", "text": "{business}"},
+                {"type": "text", "text": "{discount}"},
+            ]}],
+            variables={"discount": "20%"},
+            rate_per_second=args.rate,
+            start=True,
+        ))
+    print(f"Campaña {campaign.id}: {campaign.total_recipients} destinatarios a {args.rate:g} msg/s")
+
+    graph.reset()
+    started = time.perf_counter()
+    if args.restart_after:
+        asyncio.run(CampaignDispatcher(max_seconds=args.restart_after).run_once())
+        print(f"Corte a los {time.perf_counter() - started:.1f} s: {graph.stats().get('messages', 0)} envíos")
+    while True:
+        with SessionLocal() as db:
+            campaign = CampaignController.get_campaign(db, 1, campaign.id)
+        if campaign.status != "running":
+            break
+        asyncio.run(CampaignDispatcher(max_seconds=60).run_once())
+    elapsed = time.perf_counter() - started
+
+    sends = graph.stats().get("messages", 0)
+    delivered = campaign.progress.get("sent", 0)
+    print(f"Estado: {campaign.status}, destinatarios por estado: {campaign.progress}")
+    print(f"Tiempo: {elapsed:.1f} s, ritmo conseguido: {delivered / elapsed:.1f} msg/s (pedido {args.rate:g})")
+    print(
+        f"Envíos a la Graph API: {sends} ({sends / max(campaign.total_recipients, 1):.3f} por destinatario), "
+        f"errores simulados reintentados: {graph.stats().get('errors', 0)}"
+    )
+    graph.stop()
+
+
+if __name__ == "__main__":
+    main()
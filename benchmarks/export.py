@@ -0,0 +1,66 @@
+"""
+Benchmark de la exportación en streaming de conversaciones.
+
+Siembra (o reutiliza) una base de datos con todos los mensajes en un mismo
+negocio y recorre ExportService.iter_export descartando la salida. Informa de
+filas por segundo, bytes generados y del pico de memoria del proceso; el pico
+debe mantenerse plano al aumentar --messages.
+
+    python -m benchmarks.export --database-url postgresql://.../w2w_bench --messages 5000000
+    python -m benchmarks.export --messages 200000 --format csv --gzip
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+
+def _rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de exportación en streaming")
+    parser.add_argument("--database-url", help="Por defecto, un SQLite temporal")
+    parser.add_argument("--contacts", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'export.db')}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import create_engine
+    from benchmarks.repositories import seed
+
+    # Un solo negocio: todas las sesiones (y sus mensajes) le pertenecen
+    seed(create_engine(database_url), 1, args.contacts, args.messages, args.seed)
+
+    from app.services.export_service import ExportService
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    first_chunk_ms = None
+    total_bytes = 0
+    for chunk in ExportService.iter_export(
+        1, args.format, compress=args.gzip, chunk_size=args.chunk_size
+    ):
+        if first_chunk_ms is None:
+            first_chunk_ms = (time.perf_counter() - started) * 1000
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+
+    print(f"Mensajes exportados: {args.messages} ({args.format}{', gzip' if args.gzip else ''})")
+    print(f"Tiempo total: {elapsed:.2f} s ({args.messages / elapsed:,.0f} filas/s)")
+    print(f"Primer bloque: {first_chunk_ms or 0:.1f} ms")
+    print(f"Salida: {total_bytes / 1024 / 1024:.1f} MB")
+    print(f"Pico de memoria: {_rss_mb():.1f} MB (antes de exportar: {rss_before:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
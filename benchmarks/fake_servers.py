@@ -0,0 +1,284 @@
+"""
+Servidores locales que sustituyen a graph.facebook.com y a la API de Gemini.
+
+Cada servidor corre en un hilo propio, añade una latencia configurable
+(media + jitter) y puede devolver errores con una probabilidad dada. Exponen
+GET /stats con el número de llamadas recibidas.
+
+Para apuntar la API a ellos:
+
+    WHATSAPP_API_URL=http://127.0.0.1:9100/v22.0
+    GOOGLE_GEMINI_API_ENDPOINT=http://127.0.0.1:9200
+
+Uso independiente:
+
+    python -m benchmarks.fake_servers --graph-port 9100 --gemini-port 9200 \\
+        --gemini-latency-ms 800 --error-rate 0.01
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+
+@dataclass
+class LatencyProfile:
+    """Perfil de latencia y errores de un servidor simulado"""
+    mean_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    def delay(self, rng: random.Random) -> None:
+        if self.mean_ms or self.jitter_ms:
+            time.sleep(max(0.0, rng.gauss(self.mean_ms, self.jitter_ms)) / 1000.0)
+
+    def should_fail(self, rng: random.Random) -> bool:
+        return self.error_rate > 0 and rng.random() < self.error_rate
+
+
+class StandInServer:
+    """Base de los servidores simulados: arranque en hilo, contadores y /stats"""
+
+    name = "stand-in"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, profile: Optional[LatencyProfile] = None):
+        self.profile = profile or LatencyProfile()
+        self.rng = random.Random()
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Devuelve (status, content_type, body); las subclases lo implementan"""
+        raise NotImplementedError
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if self.path == "/stats":
+                    status, content_type, payload = 200, "application/json", json.dumps(server.stats()).encode()
+                else:
+                    server.profile.delay(server.rng)
+                    if server.profile.should_fail(server.rng):
+                        server.count("errors")
+                        status, content_type = server.profile.error_status, "application/json"
+                        payload = json.dumps({"error": {"message": "simulated failure"}}).encode()
+                    else:
+                        status, content_type, payload = server.handle(method, self.path, body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class FakeGraphServer(StandInServer):
+    """
+    Sustituto de la Graph API de WhatsApp (envío de mensajes y descarga de medios).
+
+    GET /vX/{media_id} devuelve los metadatos del medio y GET /media/{media_id}
+    su contenido. El contenido depende de media_id % media_variants, así que
+    ids distintos comparten contenido (como los medios reenviados).
+    """
+
+    name = "fake-graph"
+    _messages_path = re.compile(r"^/v[\d.]+/[^/]+/messages$")
+    _media_info_path = re.compile(r"^/v[\d.]+/(\d+)$")
+    _media_download_path = re.compile(r"^/media/(\d+)$")
+
+    def __init__(self, *args, media_size: int = 256 * 1024, media_variants: int = 50, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.media_size = media_size
+        self.media_variants = media_variants
+        self._media_cache: Dict[int, bytes] = {}
+
+    def media_content(self, media_id: str) -> bytes:
+        """Contenido determinista del medio (compartido entre ids de la misma variante)"""
+        variant = int(media_id) % self.media_variants
+        content = self._media_cache.get(variant)
+        if content is None:
+            block = hashlib.sha256(f"variant-{variant}".encode()).digest()
+            content = (block * (self.media_size // len(block) + 1))[:self.media_size]
+            self._media_cache[variant] = content
+        return content
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        if method == "GET":
+            info = self._media_info_path.match(path)
+            if info:
+                self.count("media_info")
+                content = self.media_content(info.group(1))
+                response = {
+                    "messaging_product": "whatsapp",
+                    "url": f"{self.url}/media/{info.group(1)}",
+                    "mime_type": "application/octet-stream",
+                    "sha256": hashlib.sha256(content).hexdigest(),
+                    "file_size": len(content),
+                    "id": info.group(1),
+                }
+                return 200, "application/json", json.dumps(response).encode()
+            download = self._media_download_path.match(path)
+            if download:
+                self.count("media_download")
+                return 200, "application/octet-stream", self.media_content(download.group(1))
+        if method == "POST" and self._messages_path.match(path):
+            self.count("messages")
+            try:
+                to = json.loads(body or b"{}").get("to", "")
+            except ValueError:
+                return 400, "application/json", b'{"error": {"message": "invalid json"}}'
+            response = {
+                "messaging_product": "whatsapp",
+                "contacts": [{"input": to, "wa_id": to}],
+                "messages": [{"id": f"wamid.FAKE{uuid.uuid4().hex}"}],
+            }
+            return 200, "application/json", json.dumps(response).encode()
+        self.count("not_found")
+        return 404, "application/json", b'{"error": {"message": "unknown path"}}'
+
+
+class FakeGeminiServer(StandInServer):
+    """Sustituto de la API REST de Gemini (generateContent)"""
+
+    name = "fake-gemini"
+    _generate_path = re.compile(r"^/v1(beta)?/models/[^/:]+:generateContent")
+    _session_header = re.compile(r"### Sesión (\d+)")
+
+    def __init__(self, *args, reply: str = "¡Claro! Te ayudo con eso enseguida.", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reply = reply
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        if method == "POST" and self._generate_path.match(path):
+            self.count("generate_content")
+            reply = self.reply
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                request = {}
+            if request.get("generationConfig", {}).get("responseMimeType") == "application/json":
+                # Resúmenes por lotes: un resumen por cada sesión del prompt
+                self.count("generate_content_json")
+                prompt = " ".join(
+                    part.get("text", "")
+                    for content in request.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+                reply = json.dumps({
+                    session_id: f"Resumen de la sesión {session_id}."
+                    for session_id in self._session_header.findall(prompt)
+                }, ensure_ascii=False)
+            response: Dict[str, Any] = {
+                "candidates": [
+                    {
+                        "content": {"parts": [{"text": reply}], "role": "model"},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }
+                ],
+                "usageMetadata": {
+                    "promptTokenCount": max(1, len(body) // 4),
+                    "candidatesTokenCount": max(1, len(reply) // 4),
+                    "totalTokenCount": max(1, len(body) // 4) + max(1, len(reply) // 4),
+                },
+            }
+            return 200, "application/json", json.dumps(response).encode()
+        self.count("not_found")
+        return 404, "application/json", b'{"error": {"message": "unknown path"}}'
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Argumentos comunes para configurar los servidores simulados"""
+    parser.add_argument("--graph-latency-ms", type=float, default=80.0)
+    parser.add_argument("--graph-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=600.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de error en ambos servidores")
+
+
+def start_from_args(args: argparse.Namespace, graph_port: int = 0, gemini_port: int = 0):
+    """Arranca ambos servidores con los parámetros de la línea de comandos"""
+    graph = FakeGraphServer(
+        port=graph_port,
+        profile=LatencyProfile(args.graph_latency_ms, args.graph_jitter_ms, args.error_rate),
+    ).start()
+    gemini = FakeGeminiServer(
+        port=gemini_port,
+        profile=LatencyProfile(args.gemini_latency_ms, args.gemini_jitter_ms, args.error_rate),
+    ).start()
+    return graph, gemini
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidores locales de Graph API y Gemini")
+    parser.add_argument("--graph-port", type=int, default=9100)
+    parser.add_argument("--gemini-port", type=int, default=9200)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    graph, gemini = start_from_args(args, args.graph_port, args.gemini_port)
+    print(f"Graph API simulada en {graph.url}/v22.0")
+    print(f"Gemini simulado en {gemini.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        graph.stop()
+        gemini.stop()
+
+
+if __name__ == "__main__":
+    main()
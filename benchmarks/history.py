@@ -0,0 +1,81 @@
+"""
+Comprueba que el historial de conversaciones no tiene consultas N+1.
+
+Siembra (o reutiliza) una base de datos con todas las sesiones en un mismo
+negocio y pide páginas de sesiones con contacto y mensajes de distintos
+tamaños, contando las sentencias SQL. El número de sentencias debe ser el
+mismo para cualquier tamaño de página; si no lo es, el proceso termina con
+código 1. Como referencia se mide también la carga perezosa (una consulta por
+contacto y otra por sesión).
+
+    python -m benchmarks.history
+    python -m benchmarks.history --database-url postgresql://.../w2w_bench --page-sizes 10,100,500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.load_test import StatementCounter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Consultas por página del historial de conversaciones")
+    parser.add_argument("--database-url", help="Por defecto, un SQLite temporal")
+    parser.add_argument("--contacts", type=int, default=2_000)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--page-sizes", default="1,10,50,200", help="Tamaños de página separados por comas")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'history.db')}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import create_engine
+    from benchmarks.repositories import seed
+
+    # Un solo negocio: todas las sesiones le pertenecen
+    seed(create_engine(database_url), 1, args.contacts, args.messages, args.seed)
+
+    from app.controllers.history_controller import HistoryController
+    from app.database.db import SessionLocal, engine, read_engine
+    from app.models.conversation_session import ConversationSession
+
+    counter = StatementCounter(engine, read_engine)
+    page_sizes = [int(size) for size in args.page_sizes.split(",")]
+
+    def measure(load) -> tuple:
+        with SessionLocal() as db:
+            counter.reset()
+            started = time.perf_counter()
+            rows = load(db)
+            return counter.count, (time.perf_counter() - started) * 1000, rows
+
+    def lazy(db, size):
+        sessions = db.query(ConversationSession).filter(ConversationSession.business_id == 1)\
+            .order_by(ConversationSession.started_at.desc()).limit(size).all()
+        return sum(len(session.messages) + (session.contact is not None) for session in sessions)
+
+    eager_counts = set()
+    print(f"{'página':>7} {'sql (eager)':>12} {'ms':>8} {'sql (lazy)':>11} {'ms':>8} {'mensajes':>9}")
+    for size in page_sizes:
+        eager_sql, eager_ms, sessions = measure(
+            lambda db: HistoryController.get_sessions(db, 1, limit=size, include_messages=True)
+        )
+        lazy_sql, lazy_ms, _ = measure(lambda db: lazy(db, size))
+        eager_counts.add(eager_sql)
+        messages = sum(len(session.messages) for session in sessions)
+        print(f"{size:>7} {eager_sql:>12} {eager_ms:>8.1f} {lazy_sql:>11} {lazy_ms:>8.1f} {messages:>9}")
+
+    if len(eager_counts) != 1:
+        print(f"ERROR: el número de sentencias depende del tamaño de página: {sorted(eager_counts)}")
+        sys.exit(1)
+    if 0 in eager_counts:
+        print("ERROR: no se ha contado ninguna sentencia; el contador no ve el engine que usa la consulta")
+        sys.exit(1)
+    print(f"OK: {eager_counts.pop()} sentencias por página, independientemente del tamaño")
+
+
+if __name__ == "__main__":
+    main()
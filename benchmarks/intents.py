@@ -0,0 +1,67 @@
+"""
+Mide el reconocimiento de intenciones del negocio (IntentMatcher) y comprueba
+las respuestas de una lista de mensajes conocidos.
+
+    python -m benchmarks.intents --iterations 20000
+
+Antes de medir se comprueba que cada mensaje de CASES da exactamente las
+intenciones esperadas (preguntas que se responden, quejas y avisos que van a
+la IA, frases anidadas como "dirección de correo"); si alguno no, el proceso
+termina con código 1.
+"""
+import argparse
+import sys
+import time
+from typing import List, Tuple
+
+from app.services.intent_matcher import INTENTS, IntentMatcher
+
+# Mensaje -> intenciones esperadas, en orden
+CASES: List[Tuple[str, List[str]]] = [
+    ("¿Cuál es vuestra dirección de correo?", ["email"]),
+    ("¿Cuál es vuestra dirección?", ["address"]),
+    ("dirección", ["address"]),
+    ("teléfono", ["phone"]),
+    ("¿me pasas el número de teléfono?", ["phone"]),
+    ("¿Horario y dirección?", ["opening_hours", "address"]),
+    ("a que hora abris hoy", ["opening_hours"]),
+    ("¿Tenéis página web o correo electrónico?", ["website", "email"]),
+    ("he llamado al telefono y nadie contesta", []),
+    ("no me funciona la web para pedir", []),
+    ("¿Está abierto el plazo de inscripción?", []),
+]
+
+
+def check(matcher: IntentMatcher) -> List[str]:
+    """Mensajes de CASES cuyas intenciones no son las esperadas"""
+    errors = []
+    for content, expected in CASES:
+        intents = matcher.match(content)
+        if intents != expected:
+            errors.append(f"{content!r}: {intents} (esperado {expected})")
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconocimiento de intenciones del negocio")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    matcher = IntentMatcher({intent: spec["template"] for intent, spec in INTENTS.items()})
+    errors = check(matcher)
+    for error in errors:
+        print(f"ERROR: {error}")
+    if errors:
+        sys.exit(1)
+    print(f"OK: {len(CASES)} mensajes con las intenciones esperadas")
+
+    messages = [content for content, _ in CASES]
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        matcher.match(messages[i % len(messages)])
+    elapsed = time.perf_counter() - started
+    print(f"{args.iterations} mensajes: {elapsed * 1e6 / args.iterations:.1f} µs/mensaje")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark del índice BM25 de la base de conocimiento.
+
+Genera una carta sintética de --items platos (semilla fija) y mide:
+
+- construcción del índice completo y recarga desde el fichero guardado,
+- latencia de búsqueda de los top-k fragmentos para preguntas de clientes,
+- tamaño del prompt: con la carta entera en system_prompt frente a solo los
+  --top-k fragmentos recuperados.
+
+    python -m benchmarks.knowledge --items 2000 --queries 1000 --top-k 3
+"""
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.load_test import percentile
+
+DISHES = ["pizza", "lasaña", "ensalada", "hamburguesa", "risotto", "tarta", "croquetas", "paella", "sopa", "tacos"]
+INGREDIENTS = [
+    "tomate", "mozzarella", "albahaca", "pollo", "ternera", "setas", "trufa", "atún", "queso de cabra",
+    "cebolla caramelizada", "pimiento", "gambas", "chorizo", "espinacas", "aguacate", "nueces", "miel",
+]
+QUESTIONS = [
+    "¿Tenéis {dish} con {ingredient}?",
+    "¿Cuánto cuesta la {dish}?",
+    "¿La {dish} lleva {ingredient}?",
+    "Quiero algo con {ingredient}, ¿qué me recomiendas?",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del índice de la base de conocimiento")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.services.gemini_service import GeminiService
+    from app.services.knowledge_index import BM25Index
+
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    items = []
+    for i in range(1, args.items + 1):
+        dish = rng.choice(DISHES)
+        ingredients = ", ".join(rng.sample(INGREDIENTS, 3))
+        items.append((i, f"{dish.capitalize()} {i}", f"{dish} con {ingredients}. {rng.randint(6, 25)} €"))
+
+    index = BM25Index()
+    started = time.perf_counter()
+    for item_id, title, content in items:
+        index.add(item_id, title, content, now)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    path = os.path.join(tempfile.mkdtemp(), "index.pickle")
+    with open(path, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        pickle.load(f)
+    reload_ms = (time.perf_counter() - started) * 1000
+
+    queries = [
+        rng.choice(QUESTIONS).format(dish=rng.choice(DISHES), ingredient=rng.choice(INGREDIENTS))
+        for _ in range(args.queries)
+    ]
+    timings = []
+    prompt_chars = []
+    for query in queries:
+        started = time.perf_counter()
+        hits = index.search(query, args.top_k)
+        timings.append((time.perf_counter() - started) * 1000)
+        snippets = [f"{index.snippet(doc_id)[0]}: {index.snippet(doc_id)[1]}" for doc_id, _ in hits]
+        prompt_chars.append(len(GeminiService.build_prompt(query, knowledge=snippets)))
+
+    full_menu = "\n".join(f"{title}: {content}" for _, title, content in items)
+    full_chars = len(GeminiService.build_prompt(queries[0], system_prompt=full_menu))
+
+    print(f"Índice de {args.items} fragmentos: construcción {build_ms:.0f} ms, "
+          f"recarga desde fichero {reload_ms:.1f} ms ({os.path.getsize(path) / 1024:.0f} KiB)")
+    print(f"Búsqueda top-{args.top_k}: p50 {percentile(timings, 50):.3f} ms, "
+          f"p99 {percentile(timings, 99):.3f} ms")
+    print(f"Prompt: {full_chars} caracteres con la carta en system_prompt, "
+          f"p50 {percentile(prompt_chars, 50):.0f} con los fragmentos recuperados")
+
+
+if __name__ == "__main__":
+    main()
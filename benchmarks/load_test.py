@@ -0,0 +1,283 @@
+"""
+Prueba de carga de extremo a extremo del webhook /api/v1/whatsapp/webhook.
+
+Por defecto arranca la API en este mismo proceso (uvicorn en un hilo) contra la
+base de datos indicada, con la Graph API y Gemini sustituidos por servidores
+locales, y envía webhooks sintéticos a un ritmo objetivo (bucle abierto: la
+latencia se mide desde el instante programado, así que las colas cuentan).
+
+Informa de throughput, percentiles de latencia, sentencias SQL ejecutadas y
+llamadas a Gemini por mensaje.
+
+    python -m benchmarks.load_test --database-url postgresql://.../w2w_bench \\
+        --rate 50 --duration 30 --contacts 5000 --batch-size 3 --status-ratio 0.3
+
+Contra una instancia ya desplegada (sin recuento de sentencias SQL; la
+instancia debe apuntar a los servidores simulados que se arrancan aquí):
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --graph-port 9100 --gemini-port 9200
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from benchmarks import fake_servers
+from benchmarks.payloads import PayloadGenerator
+
+WEBHOOK_PATH = "/api/v1/whatsapp/webhook"
+
+
+class StatementCounter:
+    """Cuenta las sentencias SQL ejecutadas por uno o varios engines de SQLAlchemy
+
+    Con SQLite embebido hay que pasar también read_engine: las lecturas
+    @read_only no pasan por el engine de escritura.
+    """
+
+    def __init__(self, *engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        self._lock = threading.Lock()
+        for engine in engines:
+            if engine is not None:
+                event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        with self._lock:
+            self.count += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+
+
+@dataclass
+class LoadResult:
+    """Resultados de una ejecución de carga"""
+    requests: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+    latencies_ms: List[float] = field(default_factory=list)
+    service_ms: List[float] = field(default_factory=list)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app_in_process(database_url: str, graph_url: str, gemini_url: str):
+    """
+    Arranca la API con uvicorn en un hilo apuntando a los servidores simulados.
+
+    Returns:
+        (url base, servidor uvicorn, contador de sentencias SQL)
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["WHATSAPP_API_URL"] = f"{graph_url}/v22.0"
+    os.environ["GOOGLE_GEMINI_API_ENDPOINT"] = gemini_url
+    os.environ.setdefault("GOOGLE_GEMINI", "bench-api-key")
+    os.environ.setdefault("WHATSAPP_PHONE_ID", "bench-phone-id")
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+    import uvicorn
+    from main import app
+    from app.database.db import engine, read_engine
+    from app.database.init_db import create_tables
+
+    # Base de datos de benchmark: crear el esquema directamente
+    create_tables()
+
+    counter = StatementCounter(engine, read_engine)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server, counter
+
+
+def drive(url: str, bodies: List[bytes], rate: float, concurrency: int) -> LoadResult:
+    """Envía los cuerpos al webhook a un ritmo fijo con un pool de hilos"""
+    interval = 1.0 / rate
+    return drive_schedule(url, [(i * interval, WEBHOOK_PATH, body) for i, body in enumerate(bodies)], concurrency)
+
+
+def drive_schedule(url: str, schedule: Iterable[Tuple[float, str, bytes]], concurrency: int) -> LoadResult:
+    """
+    Envía cada cuerpo a su ruta en su instante (segundos desde el inicio) con un pool de hilos
+
+    La latencia se mide desde el instante programado, así que las colas cuentan.
+    """
+    target = urlparse(url)
+    jobs: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=concurrency * 100)
+    result = LoadResult()
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=120)
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            scheduled, path, body = job
+            started = time.perf_counter()
+            ok = False
+            try:
+                conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                payload = response.read()
+                ok = response.status == 200 and b'"error"' not in payload
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=120)
+            finished = time.perf_counter()
+            with lock:
+                result.requests += 1
+                result.errors += 0 if ok else 1
+                result.latencies_ms.append((finished - scheduled) * 1000)
+                result.service_ms.append((finished - started) * 1000)
+        conn.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    begin = time.perf_counter()
+    for offset, path, body in schedule:
+        scheduled = begin + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        jobs.put((scheduled, path, body))
+    for _ in threads:
+        jobs.put(None)
+    for thread in threads:
+        thread.join()
+    result.elapsed_s = time.perf_counter() - begin
+    return result
+
+
+def report(
+    result: LoadResult,
+    generator: PayloadGenerator,
+    statements: Optional[int],
+    gemini_calls: Optional[int],
+    graph_calls: Optional[int],
+) -> Dict[str, Any]:
+    """Resume los resultados en un diccionario"""
+    messages = generator.text_messages + generator.media_messages
+    summary: Dict[str, Any] = {
+        "requests": result.requests,
+        "errors": result.errors,
+        "elapsed_s": round(result.elapsed_s, 3),
+        "throughput_rps": round(result.requests / result.elapsed_s, 2) if result.elapsed_s else 0.0,
+        "messages": messages,
+        "statuses": generator.statuses,
+        "messages_per_s": round(messages / result.elapsed_s, 2) if result.elapsed_s else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(result.latencies_ms, 50), 2),
+            "p90": round(percentile(result.latencies_ms, 90), 2),
+            "p99": round(percentile(result.latencies_ms, 99), 2),
+            "max": round(max(result.latencies_ms, default=0.0), 2),
+        },
+        "service_ms_p50": round(percentile(result.service_ms, 50), 2),
+    }
+    if statements is not None:
+        events = messages + generator.statuses
+        summary["db_statements"] = statements
+        summary["db_statements_per_event"] = round(statements / events, 2) if events else 0.0
+    if gemini_calls is not None:
+        summary["gemini_calls"] = gemini_calls
+        summary["gemini_calls_per_message"] = round(gemini_calls / messages, 3) if messages else 0.0
+    if graph_calls is not None:
+        summary["graph_sends"] = graph_calls
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga del webhook de WhatsApp")
+    parser.add_argument("--url", help="URL de una instancia ya arrancada (si no, se arranca en proceso)")
+    parser.add_argument("--database-url", help="Base de datos para la instancia en proceso")
+    parser.add_argument("--rate", type=float, default=20.0, help="Webhooks por segundo")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos de carga")
+    parser.add_argument("--concurrency", type=int, default=32, help="Conexiones simultáneas")
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1, help="Mensajes o estados por entrada")
+    parser.add_argument("--entries", type=int, default=1, help="Entradas por webhook")
+    parser.add_argument("--status-ratio", type=float, default=0.2)
+    parser.add_argument("--media-ratio", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--graph-port", type=int, default=0)
+    parser.add_argument("--gemini-port", type=int, default=0)
+    parser.add_argument("--json", dest="json_output", help="Fichero donde guardar el resumen en JSON")
+    fake_servers.add_arguments(parser)
+    args = parser.parse_args()
+
+    graph, gemini = fake_servers.start_from_args(args, args.graph_port, args.gemini_port)
+    counter = None
+    server = None
+    if args.url:
+        url = args.url.rstrip("/")
+        print(f"Graph API simulada: {graph.url}/v22.0  Gemini simulado: {gemini.url}")
+    else:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        url, server, counter = start_app_in_process(database_url, graph.url, gemini.url)
+
+    generator = PayloadGenerator(
+        seed=args.seed,
+        contacts=args.contacts,
+        batch_size=args.batch_size,
+        entries=args.entries,
+        status_ratio=args.status_ratio,
+        media_ratio=args.media_ratio,
+    )
+    total = max(1, int(args.rate * args.duration))
+    bodies = [json.dumps(generator.next_webhook()).encode() for _ in range(total)]
+
+    graph.reset()
+    gemini.reset()
+    if counter is not None:
+        counter.reset()
+
+    result = drive(url, bodies, args.rate, args.concurrency)
+    summary = report(
+        result,
+        generator,
+        counter.count if counter is not None else None,
+        gemini.stats().get("generate_content", 0),
+        graph.stats().get("messages", 0),
+    )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    if server is not None:
+        server.should_exit = True
+    graph.stop()
+    gemini.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark de la descarga de medios (MediaService) contra la Graph API simulada.
+
+Descarga --downloads medios con ids aleatorios; como el contenido de la Graph
+API simulada se repite cada --variants ids, la mayoría de descargas deberían
+resolverse por deduplicación sin transferir el fichero. Informa de medios por
+segundo, MB transferidos, deduplicados y pico de memoria del proceso, que no
+debe crecer con --media-size (la descarga va por bloques a disco) más allá
+de lo que ocupa la propia Graph API simulada, que guarda sus variantes en memoria.
+
+    python -m benchmarks.media --downloads 500 --media-size 5242880 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+
+from benchmarks import fake_servers
+
+
+def _rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de descarga de medios")
+    parser.add_argument("--downloads", type=int, default=300)
+    parser.add_argument("--media-size", type=int, default=1024 * 1024, help="Bytes por medio")
+    parser.add_argument("--variants", type=int, default=50, help="Contenidos distintos")
+    parser.add_argument("--concurrency", type=int, default=4, help="MEDIA_MAX_CONCURRENT_DOWNLOADS")
+    parser.add_argument("--media-dir", help="Por defecto, un directorio temporal que se borra al terminar")
+    parser.add_argument("--seed", type=int, default=42)
+    fake_servers.add_arguments(parser)
+    args = parser.parse_args()
+
+    graph = fake_servers.FakeGraphServer(
+        profile=fake_servers.LatencyProfile(args.graph_latency_ms, args.graph_jitter_ms, args.error_rate),
+        media_size=args.media_size,
+        media_variants=args.variants,
+    ).start()
+    media_dir = args.media_dir or tempfile.mkdtemp(prefix="media-bench-")
+    os.environ["WHATSAPP_API_URL"] = f"{graph.url}/v22.0"
+    os.environ["MEDIA_DIR"] = media_dir
+    os.environ["MEDIA_MAX_CONCURRENT_DOWNLOADS"] = str(args.concurrency)
+    os.environ["MEDIA_MAX_BYTES"] = str(max(args.media_size, 1) * 2)
+
+    from app.services.media_service import MediaService
+
+    rng = random.Random(args.seed)
+    media_ids = [str(rng.randint(10**14, 10**15)) for _ in range(args.downloads)]
+
+    async def run():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(media_id: str):
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(MediaService.download, media_id)
+                except Exception:
+                    return None
+
+        return await asyncio.gather(*(one(media_id) for media_id in media_ids))
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    stored = [r for r in results if r is not None]
+    deduplicated = sum(1 for r in stored if r.deduplicated)
+    downloaded_mb = graph.stats().get("media_download", 0) * args.media_size / 1024 / 1024
+    print(f"Medios: {len(media_ids)} ({len(media_ids) - len(stored)} errores)")
+    print(f"Tiempo total: {elapsed:.2f} s ({len(media_ids) / elapsed:,.1f} medios/s)")
+    print(f"Descargados: {graph.stats().get('media_download', 0)} ({downloaded_mb:.1f} MB, "
+          f"{downloaded_mb / elapsed:.1f} MB/s)")
+    print(f"Deduplicados: {deduplicated}")
+    print(f"Ficheros en disco: {len(set(r.sha256 for r in stored))}")
+    print(f"Pico de memoria: {_rss_mb():.1f} MB (antes de descargar: {rss_before:.1f} MB)")
+
+    graph.stop()
+    if not args.media_dir:
+        shutil.rmtree(media_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
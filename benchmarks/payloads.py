@@ -0,0 +1,219 @@
+"""
+Generador de payloads sintéticos del webhook de WhatsApp.
+
+Produce eventos con la misma forma que envía Meta: mensajes de texto, mensajes
+multimedia, actualizaciones de estado, lotes de varios mensajes y muchos contactos.
+
+    from benchmarks.payloads import PayloadGenerator
+    gen = PayloadGenerator(seed=42, contacts=1000, batch_size=5)
+    body = gen.next_webhook()
+"""
+import random
+import string
+import time
+from typing import Dict, Any, List, Optional
+
+PHONE_NUMBER_ID = "100000000000001"
+DISPLAY_PHONE_NUMBER = "15550000000"
+WABA_ID = "200000000000001"
+
+SAMPLE_TEXTS = [
+    "Hola, ¿qué tal?",
+    "¿Cuál es el horario de hoy?",
+    "Quiero pedir una pizza margarita y dos refrescos",
+    "¿Tenéis opciones sin gluten?",
+    "¿Cuál es la dirección del local?",
+    "Gracias!",
+    "¿Hacéis envíos a domicilio? Vivo en el centro, cerca de la plaza mayor",
+    "Necesito cambiar mi pedido de ayer, me llegó incompleto",
+]
+
+MEDIA_TYPES = ["image", "audio", "document", "video", "sticker"]
+MEDIA_MIME_TYPES = {
+    "image": "image/jpeg",
+    "audio": "audio/ogg; codecs=opus",
+    "document": "application/pdf",
+    "video": "video/mp4",
+    "sticker": "image/webp",
+}
+STATUS_VALUES = ["sent", "delivered", "read"]
+
+
+def _wamid(rng: random.Random) -> str:
+    return "wamid." + "".join(rng.choices(string.ascii_letters + string.digits, k=40))
+
+
+def text_message(wa_id: str, body: str, message_id: str, timestamp: int) -> Dict[str, Any]:
+    """Mensaje de texto entrante"""
+    return {
+        "from": wa_id,
+        "id": message_id,
+        "timestamp": str(timestamp),
+        "text": {"body": body},
+        "type": "text",
+    }
+
+
+def media_message(
+    wa_id: str,
+    media_type: str,
+    message_id: str,
+    timestamp: int,
+    media_id: str,
+    caption: Optional[str] = None,
+    sha256: str = "",
+) -> Dict[str, Any]:
+    """Mensaje multimedia entrante (imagen, audio, documento, ...)"""
+    media: Dict[str, Any] = {
+        "id": media_id,
+        "mime_type": MEDIA_MIME_TYPES.get(media_type, "application/octet-stream"),
+        "sha256": sha256,
+    }
+    if caption and media_type in ("image", "video", "document"):
+        media["caption"] = caption
+    if media_type == "document":
+        media["filename"] = "pedido.pdf"
+    if media_type == "audio":
+        media["voice"] = True
+    return {
+        "from": wa_id,
+        "id": message_id,
+        "timestamp": str(timestamp),
+        "type": media_type,
+        media_type: media,
+    }
+
+
+def status_update(message_id: str, status: str, recipient_id: str, timestamp: int) -> Dict[str, Any]:
+    """Actualización de estado de un mensaje saliente"""
+    update: Dict[str, Any] = {
+        "id": message_id,
+        "status": status,
+        "timestamp": str(timestamp),
+        "recipient_id": recipient_id,
+    }
+    # Meta solo envía conversation/pricing en sent/delivered
+    if status != "read":
+        update["conversation"] = {
+            "id": "CONVERSATION_" + recipient_id,
+            "expiration_timestamp": str(timestamp + 86400),
+            "origin": {"type": "service"},
+        }
+        update["pricing"] = {"billable": True, "pricing_model": "CBP", "category": "service"}
+    return update
+
+
+def webhook(values: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Envuelve uno o varios 'value' en el sobre del webhook (una entrada por value)"""
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [
+            {"id": WABA_ID, "changes": [{"value": value, "field": "messages"}]}
+            for value in values
+        ],
+    }
+
+
+def value(
+    messages: Optional[List[Dict[str, Any]]] = None,
+    contacts: Optional[List[Dict[str, Any]]] = None,
+    statuses: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Construye el objeto 'value' de un cambio del webhook"""
+    result: Dict[str, Any] = {
+        "messaging_product": "whatsapp",
+        "metadata": {
+            "display_phone_number": DISPLAY_PHONE_NUMBER,
+            "phone_number_id": PHONE_NUMBER_ID,
+        },
+    }
+    if contacts:
+        result["contacts"] = contacts
+    if messages:
+        result["messages"] = messages
+    if statuses:
+        result["statuses"] = statuses
+    return result
+
+
+class PayloadGenerator:
+    """
+    Genera webhooks sintéticos reproducibles.
+
+    Args:
+        seed: Semilla del generador aleatorio
+        contacts: Número de contactos distintos que escriben
+        batch_size: Mensajes por webhook
+        entries: Entradas por webhook (cada una con su propio 'value')
+        status_ratio: Proporción de webhooks que son actualizaciones de estado
+        media_ratio: Proporción de mensajes que no son de texto
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        contacts: int = 1000,
+        batch_size: int = 1,
+        entries: int = 1,
+        status_ratio: float = 0.0,
+        media_ratio: float = 0.0,
+    ):
+        self.rng = random.Random(seed)
+        self.contacts = [
+            {"profile": {"name": f"Cliente {i}"}, "wa_id": f"34600{i:07d}"}
+            for i in range(contacts)
+        ]
+        self.batch_size = batch_size
+        self.entries = entries
+        self.status_ratio = status_ratio
+        self.media_ratio = media_ratio
+        self.sent_ids: List[str] = []
+        self.text_messages = 0
+        self.media_messages = 0
+        self.statuses = 0
+
+    def _now(self) -> int:
+        return int(time.time())
+
+    def _message(self, contact: Dict[str, Any]) -> Dict[str, Any]:
+        message_id = _wamid(self.rng)
+        wa_id = contact["wa_id"]
+        if self.rng.random() < self.media_ratio:
+            self.media_messages += 1
+            media_type = self.rng.choice(MEDIA_TYPES)
+            media_id = str(self.rng.randint(10**14, 10**15))
+            sha256 = "%064x" % self.rng.getrandbits(256)
+            return media_message(
+                wa_id, media_type, message_id, self._now(), media_id, "foto del pedido", sha256
+            )
+        self.text_messages += 1
+        return text_message(wa_id, self.rng.choice(SAMPLE_TEXTS), message_id, self._now())
+
+    def _message_value(self) -> Dict[str, Any]:
+        senders = [self.rng.choice(self.contacts) for _ in range(self.batch_size)]
+        unique = {c["wa_id"]: c for c in senders}
+        return value(
+            messages=[self._message(c) for c in senders],
+            contacts=list(unique.values()),
+        )
+
+    def _status_value(self) -> Dict[str, Any]:
+        updates = []
+        for _ in range(self.batch_size):
+            contact = self.rng.choice(self.contacts)
+            message_id = self.rng.choice(self.sent_ids) if self.sent_ids else _wamid(self.rng)
+            updates.append(
+                status_update(message_id, self.rng.choice(STATUS_VALUES), contact["wa_id"], self._now())
+            )
+        self.statuses += len(updates)
+        return value(statuses=updates)
+
+    def next_webhook(self) -> Dict[str, Any]:
+        """Devuelve el siguiente webhook sintético"""
+        values = []
+        for _ in range(self.entries):
+            if self.rng.random() < self.status_ratio:
+                values.append(self._status_value())
+            else:
+                values.append(self._message_value())
+        return webhook(values)
@@ -0,0 +1,159 @@
+"""
+Reproduce tráfico real del webhook grabado con WEBHOOK_RECORDING_ENABLED=true.
+
+Lee los segmentos (recordings/webhooks-*.ndjson.gz), los mezcla por instante de
+llegada y envía cada cuerpo a su ruta respetando los intervalos originales
+divididos por --speed (1 = tiempo real, 10 = diez veces más rápido, 0 = sin
+esperas). La Graph API y Gemini se sustituyen por servidores locales, como en
+benchmarks.load_test, y se informa de throughput, latencia y errores.
+
+    # Contra la API arrancada en este proceso (SQLite temporal por defecto)
+    python -m benchmarks.replay --recordings recordings --speed 5
+
+    # Contra una instancia ya desplegada, que debe apuntar a los servidores simulados
+    python -m benchmarks.replay --url http://127.0.0.1:8000 --graph-port 9100 --gemini-port 9200 \\
+        --recordings /var/lib/w2w/recordings --since 2026-10-19T08:00 --until 2026-10-19T09:00
+
+Con --fresh-ids los ids de mensaje (wamid.) se vuelven a codificar con una
+clave nueva en cada reproducción, con su misma forma y longitud, y los estados
+y respuestas siguen apuntando a su mensaje: si no, repetir una grabación contra
+la misma base de datos solo ejercita la detección de duplicados.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, Optional, Tuple
+
+from benchmarks import fake_servers
+from benchmarks.load_test import drive_schedule, percentile, start_app_in_process
+
+_MESSAGE_ID = re.compile(r'"(wamid\.[^"]+)"')
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def build_schedule(
+    records: Iterator[Tuple[float, str, str]],
+    speed: float,
+    since: Optional[float],
+    until: Optional[float],
+    path: Optional[str],
+    run_tag: Optional[str],
+    stats: dict,
+) -> Iterator[Tuple[float, str, bytes]]:
+    """Convierte los registros grabados en (segundos desde el inicio, ruta, cuerpo)"""
+    from app.services.webhook_recorder import pseudonymize_message_id
+
+    first: Optional[float] = None
+    for received_at, recorded_path, body in records:
+        if since is not None and received_at < since:
+            continue
+        if until is not None and received_at >= until:
+            break
+        if first is None:
+            first = received_at
+        if run_tag:
+            body = _MESSAGE_ID.sub(lambda match: f'"{pseudonymize_message_id(match.group(1), run_tag)}"', body)
+        stats["count"] += 1
+        stats["span_s"] = received_at - first
+        offset = (received_at - first) / speed if speed > 0 else 0.0
+        yield offset, path or recorded_path, body.encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reproducción de webhooks grabados")
+    parser.add_argument("--recordings", default="recordings", help="Directorio de segmentos o fichero .ndjson.gz")
+    parser.add_argument("--speed", type=float, default=1.0, help="Factor de velocidad (0 = sin esperas)")
+    parser.add_argument("--since", help="Primer instante a reproducir (ISO 8601)")
+    parser.add_argument("--until", help="Instante final (ISO 8601, excluido)")
+    parser.add_argument("--limit", type=int, help="Máximo de webhooks a reproducir")
+    parser.add_argument("--path", help="Enviar todo a esta ruta (p. ej. /api/v1/whatsapp/webhook)")
+    parser.add_argument("--fresh-ids", action="store_true", help="Ids de mensaje nuevos en cada reproducción")
+    parser.add_argument("--url", help="URL de una instancia ya arrancada (si no, se arranca en proceso)")
+    parser.add_argument("--database-url", help="Base de datos para la instancia en proceso")
+    parser.add_argument("--concurrency", type=int, default=32, help="Conexiones simultáneas")
+    parser.add_argument("--graph-port", type=int, default=0)
+    parser.add_argument("--gemini-port", type=int, default=0)
+    parser.add_argument("--json", dest="json_output", help="Fichero donde guardar el resumen en JSON")
+    fake_servers.add_arguments(parser)
+    args = parser.parse_args()
+
+    from app.services.webhook_recorder import list_segments, read_segments
+
+    if os.path.isdir(args.recordings):
+        segments = list_segments(args.recordings)
+    else:
+        segments = [args.recordings]
+    if not segments:
+        sys.exit(f"No hay segmentos grabados en {args.recordings}")
+
+    graph, gemini = fake_servers.start_from_args(args, args.graph_port, args.gemini_port)
+    counter = None
+    server = None
+    if args.url:
+        url = args.url.rstrip("/")
+        print(f"Graph API simulada: {graph.url}/v22.0  Gemini simulado: {gemini.url}")
+    else:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'replay.db')}"
+        url, server, counter = start_app_in_process(database_url, graph.url, gemini.url)
+
+    stats = {"count": 0, "span_s": 0.0}
+    schedule = build_schedule(
+        read_segments(segments),
+        args.speed,
+        _timestamp(args.since),
+        _timestamp(args.until),
+        args.path,
+        uuid.uuid4().hex[:8] if args.fresh_ids else None,
+        stats,
+    )
+    if args.limit:
+        schedule = islice(schedule, args.limit)
+
+    print(f"Reproduciendo {len(segments)} segmentos a {args.speed}x...", file=sys.stderr)
+    started = time.perf_counter()
+    result = drive_schedule(url, schedule, args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        "segments": len(segments),
+        "requests": result.requests,
+        "errors": result.errors,
+        "recorded_span_s": round(stats["span_s"], 3),
+        "elapsed_s": round(elapsed, 3),
+        "speed": args.speed,
+        "throughput_rps": round(result.requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(result.latencies_ms, 50), 2),
+            "p90": round(percentile(result.latencies_ms, 90), 2),
+            "p99": round(percentile(result.latencies_ms, 99), 2),
+            "max": round(max(result.latencies_ms, default=0.0), 2),
+        },
+        "service_ms_p50": round(percentile(result.service_ms, 50), 2),
+        "gemini_calls": gemini.stats().get("generate_content", 0),
+        "graph_sends": graph.stats().get("messages", 0),
+    }
+    if counter is not None:
+        summary["db_statements"] = counter.count
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    if server is not None:
+        server.should_exit = True
+    graph.stop()
+    gemini.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Comprueba el enrutado de lecturas a réplicas con un primario y una réplica reales.
+
+Necesita dos Postgres con replicación en streaming (la réplica creada con
+pg_basebackup -R). Siembra el primario y pide los endpoints de consulta
+(negocios, búsqueda, historial) en tres fases, contando las sentencias SQL
+que recibe cada servidor:
+
+1. Réplica al día: las lecturas van a la réplica.
+2. Réplica retrasada: se pausa la aplicación de WAL en la réplica
+   (pg_wal_replay_pause) y se escribe en el primario. Al superar
+   DB_REPLICA_MAX_LAG_SECONDS las lecturas vuelven al primario, y un negocio
+   recién creado se encuentra.
+3. Read-your-writes: con la réplica aún pausada, una sesión de consulta que
+   escribe lee después del primario lo que acaba de escribir.
+
+Al final se reanuda la réplica y se comprueba que las lecturas vuelven a ella.
+Termina con código 1 si alguna comprobación falla.
+
+    python -m benchmarks.replicas \\
+        --primary-url "postgresql://postgres@/w2w?host=/tmp/rp_primary" \\
+        --replica-url "postgresql://postgres@/w2w?host=/tmp/rp_replica"
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from benchmarks.load_test import StatementCounter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Enrutado de lecturas a réplicas")
+    parser.add_argument("--primary-url", required=True)
+    parser.add_argument("--replica-url", required=True)
+    parser.add_argument("--requests", type=int, default=300, help="Peticiones por fase")
+    parser.add_argument("--businesses", type=int, default=20)
+    parser.add_argument("--contacts", type=int, default=2_000)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--max-lag", type=float, default=1.0, help="DB_REPLICA_MAX_LAG_SECONDS")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.update(
+        DATABASE_URL=args.primary_url,
+        DATABASE_REPLICA_URLS=args.replica_url,
+        DB_REPLICA_MAX_LAG_SECONDS=str(args.max_lag),
+        DB_REPLICA_LAG_CHECK_SECONDS="0.2",
+        AUTH_ENABLED="false",
+    )
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from benchmarks.repositories import seed
+    from app.database.db import ReadSessionLocal, engine
+    from app.database.replicas import replica_router
+    from app.repositories.business_repository import BusinessRepository
+    from main import app
+
+    seed(engine, args.businesses, args.contacts, args.messages, args.seed)
+    replica = replica_router.replicas[0].engine
+    primary_counter, replica_counter = StatementCounter(engine), StatementCounter(replica)
+    client = TestClient(app)
+    rng = random.Random(args.seed)
+    failures = []
+
+    def replica_sql(statement: str):
+        with replica.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            return connection.execute(text(statement)).scalar()
+
+    def check(condition: bool, description: str) -> None:
+        print(f"  [{'ok' if condition else 'FALLO'}] {description}")
+        if not condition:
+            failures.append(description)
+
+    def read_load(label: str) -> float:
+        """Lanza las peticiones de consulta y devuelve la fracción de sentencias en la réplica"""
+        paths = [
+            lambda: f"/api/v1/businesses/{rng.randint(1, args.businesses)}",
+            lambda: "/api/v1/businesses/?limit=50",
+            lambda: "/api/v1/businesses/search/?query=Negocio",
+            lambda: f"/api/v1/businesses/{rng.randint(1, args.businesses)}/sessions?limit=20&include_messages=true",
+        ]
+        primary_counter.reset()
+        replica_counter.reset()
+        errors = 0
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            if client.get(rng.choice(paths)()).status_code != 200:
+                errors += 1
+        elapsed = time.perf_counter() - started
+        total = primary_counter.count + replica_counter.count
+        share = replica_counter.count / total if total else 0.0
+        print(
+            f"\n{label}: {args.requests} peticiones en {elapsed:.1f} s ({errors} con error); "
+            f"sentencias primario {primary_counter.count}, réplica {replica_counter.count} ({share:.0%})"
+        )
+        print(f"  Estado: {replica_router.stats()['replicas'][0]}")
+        return share
+
+    def wait_for_replica(predicate, timeout: float = 10.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not predicate():
+            time.sleep(0.1)
+
+    # 1. Réplica al día
+    wait_for_replica(lambda: replica_sql("SELECT pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()"))
+    check(read_load("Réplica al día") > 0.9, "las lecturas van a la réplica")
+
+    # 2. Réplica retrasada
+    replica_sql("SELECT pg_wal_replay_pause()")
+    try:
+        created = client.post("/api/v1/businesses/", json={"name": "Negocio recién creado"}).json()
+        time.sleep(args.max_lag + 0.5)
+        check(client.get(f"/api/v1/businesses/{created['id']}").status_code == 200,
+              "un negocio recién creado se encuentra con la réplica retrasada")
+        check(read_load("Réplica retrasada") < 0.05, "las lecturas vuelven al primario")
+
+        # 3. Read-your-writes en una sesión de consulta
+        with ReadSessionLocal() as db:
+            business = BusinessRepository.create(db, {"name": "Escrito en sesión de consulta"})
+            primary_counter.reset()
+            replica_counter.reset()
+            found = BusinessRepository.get_by_id(db, business.id)
+        check(found is not None and replica_counter.count == 0,
+              "una sesión que escribe lee del primario lo que acaba de escribir")
+    finally:
+        replica_sql("SELECT pg_wal_replay_resume()")
+
+    wait_for_replica(lambda: replica_sql("SELECT pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()"))
+    time.sleep(0.5)
+    check(read_load("Réplica reanudada") > 0.9, "las lecturas vuelven a la réplica")
+
+    print(f"\nEstadísticas (/health/replicas): {replica_router.stats()}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Microbenchmarks de la capa de repositorios.
+
+Siembra una base de datos con datos reproducibles (semilla fija) al tamaño
+indicado, ejecuta cada método de ContactRepository, MessageRepository,
+SessionRepository y BusinessRepository, e informa de operaciones por segundo,
+latencia p50 y sentencias SQL por operación. Los resultados se comparan con una
+línea base guardada; el proceso termina con código 1 si hay regresiones.
+
+    # Sembrar una vez a tamaño realista (tarda) y guardar la línea base
+    python -m benchmarks.repositories --database-url postgresql://.../w2w_bench \\
+        --messages 10000000 --contacts 1000000 --save-baseline
+
+    # En cada cambio de la capa de datos
+    python -m benchmarks.repositories --database-url postgresql://.../w2w_bench \\
+        --messages 10000000 --contacts 1000000
+
+La siembra se omite si las tablas ya tienen el tamaño pedido, así que la
+misma base de datos se puede reutilizar entre ejecuciones.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, List
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.load_test import StatementCounter, percentile
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "repositories.json")
+CHUNK_SIZE = 10_000
+
+
+def _models():
+    # Importar todos los modelos para que Base.metadata los conozca
+    from app.database.db import Base
+    from app.models.business import Business
+    from app.models.contact import Contact
+    from app.models.conversation_session import ConversationSession
+    from app.models.message import Message
+    from app.models import analytics, api_token, campaign, knowledge, webhook_job  # noqa: F401
+
+    return Base, Business, Contact, ConversationSession, Message
+
+
+def _insert_chunks(engine, table, rows_iter, total: int, label: str) -> None:
+    batch: List[Dict[str, Any]] = []
+    done = 0
+    with engine.begin() as conn:
+        for row in rows_iter:
+            batch.append(row)
+            if len(batch) >= CHUNK_SIZE:
+                conn.execute(insert(table), batch)
+                done += len(batch)
+                batch = []
+                if done % (CHUNK_SIZE * 50) == 0:
+                    print(f"  {label}: {done}/{total}", file=sys.stderr)
+        if batch:
+            conn.execute(insert(table), batch)
+
+
+def _advance_sequences(engine, tables) -> None:
+    """
+    La siembra inserta los ids explícitamente, sin pasar por las secuencias de
+    Postgres: se avanzan hasta el máximo id de cada tabla para que los casos
+    *.create no choquen con claves duplicadas.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def seed(engine, businesses: int, contacts: int, messages: int, seed_value: int) -> None:
+    """Crea el esquema y siembra los datos si no existen ya"""
+    Base, Business, Contact, ConversationSession, Message = _models()
+    Base.metadata.create_all(engine)
+
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(Message.__table__)).scalar()
+    if existing >= messages:
+        print(f"Base de datos ya sembrada ({existing} mensajes), se omite la siembra", file=sys.stderr)
+        # Una base sembrada por una versión anterior puede tener las secuencias sin avanzar
+        _advance_sequences(engine, (Business.__table__, Contact.__table__, ConversationSession.__table__, Message.__table__))
+        return
+
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    print("Sembrando datos...", file=sys.stderr)
+
+    _insert_chunks(engine, Business.__table__, (
+        {
+            "id": i,
+            "name": f"Negocio {i}",
+            "business_type": rng.choice(["restaurant", "store", "service"]),
+            "address": f"Calle {i}, Madrid",
+            "phone": f"91{i:07d}",
+            "system_prompt": "Eres el asistente del negocio.",
+            "created_at": now,
+            "updated_at": now,
+            "is_active": True,
+        }
+        for i in range(1, businesses + 1)
+    ), businesses, "negocios")
+
+    _insert_chunks(engine, Contact.__table__, (
+        {
+            "id": i,
+            "wa_id": f"34600{i:07d}",
+            "phone_number": f"34600{i:07d}",
+            "name": f"Cliente {i}",
+            "business_id": rng.randint(1, businesses),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, contacts + 1)
+    ), contacts, "contactos")
+
+    # Una sesión por contacto; el 10% sigue activa
+    _insert_chunks(engine, ConversationSession.__table__, (
+        {
+            "id": i,
+            "contact_id": i,
+            "business_id": rng.randint(1, businesses),
+            "started_at": now - timedelta(days=rng.randint(0, 90)),
+            "last_activity": now - timedelta(minutes=rng.randint(0, 120)),
+            "ended_at": None if i % 10 == 0 else now,
+            "is_active": i % 10 == 0,
+            "status": "in_progress" if i % 10 == 0 else rng.choice(["timed_out", "closed_by_user"]),
+        }
+        for i in range(1, contacts + 1)
+    ), contacts, "sesiones")
+
+    def message_rows():
+        for i in range(1, messages + 1):
+            contact_id = rng.randint(1, contacts)
+            yield {
+                "id": i,
+                "wa_message_id": f"wamid.seed{i}",
+                "contact_id": contact_id,
+                "session_id": contact_id,
+                "direction": "incoming" if i % 2 else "outgoing",
+                "message_type": "text",
+                "content": "¿Cuál es el horario de hoy?",
+                "timestamp": now - timedelta(seconds=messages - i),
+                "status": "received" if i % 2 else "delivered",
+                "ai_processed": not i % 2,
+                "created_at": now,
+            }
+
+    _insert_chunks(engine, Message.__table__, message_rows(), messages, "mensajes")
+    _advance_sequences(engine, (Business.__table__, Contact.__table__, ConversationSession.__table__, Message.__table__))
+
+
+def build_cases(sizes: Dict[str, int], rng: random.Random) -> Dict[str, Callable]:
+    """Define una operación representativa por cada método de repositorio"""
+    from app.repositories.business_repository import BusinessRepository
+    from app.repositories.contact_repository import ContactRepository
+    from app.repositories.message_repository import MessageRepository
+    from app.repositories.session_repository import SessionRepository
+
+    contacts, messages, businesses = sizes["contacts"], sizes["messages"], sizes["businesses"]
+    counter = {"n": 0}
+
+    def unique(prefix: str) -> str:
+        counter["n"] += 1
+        return f"{prefix}{time.time_ns()}{counter['n']}"
+
+    def contact_wa_id() -> str:
+        return f"34600{rng.randint(1, contacts):07d}"
+
+    now = datetime.now(timezone.utc)
+    return {
+        "ContactRepository.get_by_wa_id": lambda db: ContactRepository.get_by_wa_id(db, contact_wa_id()),
+        "ContactRepository.create": lambda db: ContactRepository.create(
+            db, unique("bench"), unique("bench"), "Bench"
+        ),
+        "ContactRepository.get_or_create[existing]": lambda db: ContactRepository.get_or_create(
+            db, contact_wa_id(), "", "Unknown"
+        ),
+        "ContactRepository.get_or_create[new]": lambda db: ContactRepository.get_or_create(
+            db, unique("new"), unique("new"), "Nuevo"
+        ),
+        "MessageRepository.create": lambda db: MessageRepository.create(
+            db, unique("wamid.bench"), rng.randint(1, contacts), "incoming", "text", "hola", now
+        ),
+        "MessageRepository.get_by_wa_id": lambda db: MessageRepository.get_by_wa_id(
+            db, f"wamid.seed{rng.randint(1, messages)}"
+        ),
+        "MessageRepository.update_status": lambda db: MessageRepository.update_status(
+            db, f"wamid.seed{rng.randint(1, messages)}", "read"
+        ),
+        "MessageRepository.get_conversation_history": lambda db: MessageRepository.get_conversation_history(
+            db, rng.randint(1, contacts)
+        ),
+        "MessageRepository.get_session_history": lambda db: MessageRepository.get_session_history(
+            db, rng.randint(1, contacts)
+        ),
+        "SessionRepository.create": lambda db: SessionRepository.create(db, rng.randint(1, contacts)),
+        "SessionRepository.get_active_session": lambda db: SessionRepository.get_active_session(
+            db, rng.randint(1, contacts)
+        ),
+        "SessionRepository.update_last_activity": lambda db: SessionRepository.update_last_activity(
+            db, rng.randint(1, contacts)
+        ),
+        "SessionRepository.close_session": lambda db: SessionRepository.close_session(
+            db, rng.randint(1, contacts)
+        ),
+        "SessionRepository.get_or_create_active_session": lambda db: SessionRepository.get_or_create_active_session(
+            db, rng.randint(1, contacts)
+        ),
+        "SessionRepository.close_inactive_sessions": lambda db: SessionRepository.close_inactive_sessions(db),
+        "SessionRepository.get_session_messages": lambda db: SessionRepository.get_session_messages(
+            db, rng.randint(1, contacts)
+        ),
+        "BusinessRepository.create": lambda db: BusinessRepository.create(db, {"name": unique("Bench ")[:100]}),
+        "BusinessRepository.get_by_id": lambda db: BusinessRepository.get_by_id(db, rng.randint(1, businesses)),
+        "BusinessRepository.get_by_name": lambda db: BusinessRepository.get_by_name(
+            db, f"Negocio {rng.randint(1, businesses)}"
+        ),
+        "BusinessRepository.search_by_name": lambda db: BusinessRepository.search_by_name(
+            db, str(rng.randint(1, businesses))
+        ),
+        "BusinessRepository.get_all": lambda db: BusinessRepository.get_all(db),
+        "BusinessRepository.update": lambda db: BusinessRepository.update(
+            db, rng.randint(1, businesses), {"description": unique("desc")}
+        ),
+        "BusinessRepository.delete[soft]": lambda db: BusinessRepository.delete(db, rng.randint(1, businesses)),
+    }
+
+
+def run_case(engine, session_factory, counter: StatementCounter, operation: Callable, iterations: int, warmup: int):
+    """
+    Ejecuta una operación y devuelve sus métricas
+
+    Todo el caso va dentro de una transacción que se deshace al terminar, para
+    que las operaciones que escriben (create, update, delete, close_*) no
+    cambien los datos sembrados que miden los casos siguientes ni las próximas
+    ejecuciones. Los commit de los repositorios liberan un SAVEPOINT en lugar
+    de confirmar, así que las sentencias por operación incluyen SAVEPOINT y
+    RELEASE.
+    """
+    timings: List[float] = []
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            with session_factory(bind=connection, join_transaction_mode="create_savepoint") as db:
+                for _ in range(warmup):
+                    operation(db)
+                counter.reset()
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    op_started = time.perf_counter()
+                    operation(db)
+                    timings.append(time.perf_counter() - op_started)
+                elapsed = time.perf_counter() - started
+        finally:
+            transaction.rollback()
+    return {
+        "ops_per_s": round(iterations / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "statements_per_op": round(counter.count / iterations, 2),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Devuelve la lista de regresiones respecto a la línea base"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["ops_per_s"] < previous["ops_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {current['ops_per_s']} ops/s (línea base {previous['ops_per_s']})"
+            )
+        if current["statements_per_op"] > previous["statements_per_op"]:
+            regressions.append(
+                f"{name}: {current['statements_per_op']} sentencias/op "
+                f"(línea base {previous['statements_per_op']})"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks de repositorios")
+    parser.add_argument("--database-url", help="Por defecto, un SQLite temporal")
+    parser.add_argument("--businesses", type=int, default=1_000)
+    parser.add_argument("--contacts", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--only", help="Ejecutar solo los casos que contengan este texto")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Caída de ops/s tolerada (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'repos.db')}"
+
+    from app.database.sqlite import create_sqlite_engines, is_sqlite
+
+    # Con SQLite, el engine de escritura de la aplicación: su evento begin abre
+    # la transacción, y sin eso el RELEASE del SAVEPOINT de run_case confirmaría
+    engine = create_sqlite_engines(database_url)[0] if is_sqlite(database_url) else create_engine(database_url)
+    sizes = {"businesses": args.businesses, "contacts": args.contacts, "messages": args.messages}
+    seed(engine, args.businesses, args.contacts, args.messages, args.seed)
+
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    counter = StatementCounter(engine)
+    rng = random.Random(args.seed)
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, operation in build_cases(sizes, rng).items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = run_case(engine, session_factory, counter, operation, args.iterations, args.warmup)
+        metrics = results[name]
+        print(
+            f"{name:<55} {metrics['ops_per_s']:>10} ops/s  "
+            f"p50 {metrics['p50_ms']:>8} ms  {metrics['statements_per_op']:>5} sql/op"
+        )
+
+    key = f"{engine.dialect.name}:businesses={args.businesses}:contacts={args.contacts}:messages={args.messages}"
+    baselines: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines[key] = {**baselines.get(key, {}), **results}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Línea base guardada en {args.baseline} [{key}]")
+        return
+
+    if key not in baselines:
+        print(f"No hay línea base para [{key}]; usa --save-baseline para crearla")
+        return
+    regressions = compare(results, baselines[key], args.tolerance)
+    if regressions:
+        print("Regresiones detectadas:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("Sin regresiones respecto a la línea base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compara el modo embebido en SQLite con Postgres a carga moderada.
+
+Lanza la prueba de carga del webhook (benchmarks.load_test) en un proceso
+nuevo por cada base de datos, con los mismos webhooks sintéticos y el mismo
+ritmo, y muestra una tabla con throughput, percentiles de latencia, errores y
+sentencias SQL por evento. Con varias conexiones simultáneas, los errores
+incluyen los "database is locked" que el escritor único debe evitar: el
+proceso termina con código 1 si SQLite devuelve alguno.
+
+    # Solo SQLite (fichero temporal)
+    python -m benchmarks.sqlite_mode --rate 30 --duration 30
+
+    # SQLite frente a Postgres
+    python -m benchmarks.sqlite_mode --postgres-url postgresql://.../w2w_bench \\
+        --rate 30 --duration 30 --concurrency 32
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_load_test(database_url: str, args: argparse.Namespace, workdir: str, label: str) -> Dict[str, Any]:
+    """Ejecuta benchmarks.load_test en un proceso aparte y devuelve su resumen"""
+    output = os.path.join(workdir, f"{label}.json")
+    command = [
+        sys.executable, "-m", "benchmarks.load_test",
+        "--database-url", database_url,
+        "--rate", str(args.rate),
+        "--duration", str(args.duration),
+        "--concurrency", str(args.concurrency),
+        "--contacts", str(args.contacts),
+        "--batch-size", str(args.batch_size),
+        "--status-ratio", str(args.status_ratio),
+        "--seed", str(args.seed),
+        "--json", output,
+    ]
+    # Un proceso por base de datos: el engine se crea al importar app.database.db
+    subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    with open(output, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    rows: List[tuple] = [
+        ("throughput (webhooks/s)", lambda r: r["throughput_rps"]),
+        ("mensajes/s", lambda r: r["messages_per_s"]),
+        ("latencia p50 (ms)", lambda r: r["latency_ms"]["p50"]),
+        ("latencia p90 (ms)", lambda r: r["latency_ms"]["p90"]),
+        ("latencia p99 (ms)", lambda r: r["latency_ms"]["p99"]),
+        ("latencia máx. (ms)", lambda r: r["latency_ms"]["max"]),
+        ("errores", lambda r: r["errors"]),
+        ("sentencias SQL/evento", lambda r: r.get("db_statements_per_event", "-")),
+    ]
+    labels = list(results)
+    print(f"\n{'':<26}" + "".join(f"{label:>14}" for label in labels))
+    for name, value in rows:
+        print(f"{name:<26}" + "".join(f"{value(results[label]):>14}" for label in labels))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite embebido frente a Postgres")
+    parser.add_argument("--postgres-url", help="Base de datos Postgres para comparar (si no, solo SQLite)")
+    parser.add_argument("--sqlite-path", help="Fichero SQLite (por defecto, uno temporal)")
+    parser.add_argument("--rate", type=float, default=30.0, help="Webhooks por segundo")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--concurrency", type=int, default=32, help="Conexiones simultáneas")
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--status-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_output", help="Fichero donde guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    sqlite_path = args.sqlite_path or os.path.join(workdir, "embedded.db")
+    targets = {"sqlite": f"sqlite:///{sqlite_path}"}
+    if args.postgres_url:
+        targets["postgres"] = args.postgres_url
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for label, database_url in targets.items():
+        print(f"Carga contra {label}: {args.rate} webhooks/s durante {args.duration} s...", file=sys.stderr)
+        results[label] = run_load_test(database_url, args, workdir, label)
+
+    print_table(results)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if results["sqlite"]["errors"]:
+        print(f"\nSQLite devolvió {results['sqlite']['errors']} errores", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Mide el tiempo hasta la primera petición atendida (time-to-first-request).
+
+Arranca la API con uvicorn en un proceso nuevo varias veces y mide cuánto
+tarda en responder 200 en /api/v1/health desde que se lanza el proceso. Es el
+tiempo que importa para el autoescalado y los despliegues progresivos.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --database-url postgresql://.../whats2want --runs 10
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load_test import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(env: dict, timeout: float) -> float:
+    """Lanza un proceso de la API y devuelve los segundos hasta el primer 200"""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"La API terminó durante el arranque (código {process.returncode})")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/api/v1/health")
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("La API no respondió a tiempo")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de la API")
+    parser.add_argument("--database-url", help="Por defecto, un SQLite temporal")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+    env.setdefault("GOOGLE_GEMINI", "bench-api-key")
+    env.setdefault("SECRET_KEY", "bench-secret-key")
+
+    timings = []
+    for run in range(1, args.runs + 1):
+        elapsed = time_to_first_request(env, args.timeout)
+        timings.append(elapsed * 1000)
+        print(f"Arranque {run}: {elapsed * 1000:.0f} ms")
+
+    print(
+        f"time-to-first-request: p50 {percentile(timings, 50):.0f} ms, "
+        f"min {min(timings):.0f} ms, max {max(timings):.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
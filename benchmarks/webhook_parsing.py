@@ -0,0 +1,143 @@
+"""
+Compara el parseo del webhook desde bytes a modelos tipados con el camino
+anterior (request.json() + recorrido de diccionarios con .get()).
+
+    python -m benchmarks.webhook_parsing --entries 50 --batch-size 20 --iterations 200
+
+Ambos caminos extraen los mismos campos que usa el servicio (remitente, id,
+tipo, timestamp, texto, nombre de perfil y estados), para que la comparación
+incluya el recorrido y no solo la deserialización.
+
+Con --invalid-ratio se quita el remitente a esa fracción de los mensajes: el
+camino tipado descarta solo esos mensajes y procesa el resto del lote, y se
+mide también ese caso (más lento, porque el lote se valida elemento a elemento).
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from app.models.whatsapp_model import WhatsAppWebhookEvent
+from benchmarks.payloads import PayloadGenerator
+
+
+def dict_path(body: bytes) -> int:
+    """Camino anterior: json.loads y recorrido con .get()"""
+    data = json.loads(body)
+    extracted = 0
+    if data.get("object") == "whatsapp_business_account":
+        for entry in data.get("entry", []):
+            for change in entry.get("changes", []):
+                if change.get("field") != "messages":
+                    continue
+                value = change.get("value", {})
+                for message in value.get("messages", []) or []:
+                    sender = message.get("from")
+                    message.get("id")
+                    message.get("type")
+                    message.get("timestamp")
+                    if message.get("type") == "text" and "text" in message:
+                        message.get("text", {}).get("body", "")
+                    for contact in value.get("contacts", []) or []:
+                        if contact.get("wa_id") == sender:
+                            contact.get("profile", {}).get("name", "Unknown")
+                            break
+                    extracted += 1
+                for status in value.get("statuses", []) or []:
+                    status.get("id")
+                    status.get("status")
+                    extracted += 1
+    return extracted
+
+
+def typed_path(body: bytes) -> int:
+    """Camino nuevo: validación única desde bytes y acceso por atributos"""
+    event = WhatsAppWebhookEvent.model_validate_json(body)
+    extracted = 0
+    if event.object == "whatsapp_business_account":
+        for entry in event.entry:
+            for change in entry.changes:
+                if change.field != "messages":
+                    continue
+                value = change.value
+                for message in value.messages or []:
+                    sender = message.from_
+                    message.id
+                    message.type
+                    message.timestamp
+                    if message.type == "text" and message.text:
+                        message.text.body
+                    for contact in value.contacts or []:
+                        if contact.wa_id == sender:
+                            contact.profile.get("name", "Unknown")
+                            break
+                    extracted += 1
+                for status in value.statuses or []:
+                    status.id
+                    status.status
+                    extracted += 1
+    return extracted
+
+
+def bench(fn, bodies: List[bytes], iterations: int) -> Dict[str, Any]:
+    items = sum(fn(body) for body in bodies)  # calentamiento y recuento
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for body in bodies:
+            fn(body)
+    elapsed = time.perf_counter() - started
+    payloads = iterations * len(bodies)
+    return {
+        "us_per_payload": round(elapsed / payloads * 1e6, 2),
+        "us_per_item": round(elapsed / (iterations * items) * 1e6, 3) if items else 0.0,
+        "payloads_per_s": round(payloads / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de parseo del webhook")
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--payloads", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--status-ratio", type=float, default=0.3)
+    parser.add_argument("--media-ratio", type=float, default=0.2)
+    parser.add_argument("--invalid-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    generator = PayloadGenerator(
+        contacts=5000,
+        batch_size=args.batch_size,
+        entries=args.entries,
+        status_ratio=args.status_ratio,
+        media_ratio=args.media_ratio,
+    )
+    rng = random.Random(42)
+    events = [generator.next_webhook() for _ in range(args.payloads)]
+    invalid = 0
+    for event in events:
+        for entry in event["entry"]:
+            for change in entry["changes"]:
+                for message in change["value"].get("messages") or []:
+                    if rng.random() < args.invalid_ratio:
+                        del message["from"]
+                        invalid += 1
+    bodies = [json.dumps(event).encode() for event in events]
+    # El camino de diccionarios no valida: cuenta también los mensajes inválidos
+    assert sum(dict_path(body) for body in bodies) - invalid == sum(typed_path(body) for body in bodies)
+    if invalid:
+        print(f"Mensajes inválidos: {invalid} (descartados solo ellos por el camino tipado)")
+
+    size_kb = sum(len(body) for body in bodies) / len(bodies) / 1024
+    print(f"Payload medio: {size_kb:.1f} KiB, {args.entries} entradas x {args.batch_size} elementos")
+    for name, fn in (("dict (json.loads + .get)", dict_path), ("typed (model_validate_json)", typed_path)):
+        result = bench(fn, bodies, args.iterations)
+        print(
+            f"{name:<30} {result['us_per_payload']:>10} µs/payload  "
+            f"{result['us_per_item']:>8} µs/elemento  {result['payloads_per_s']:>8} payloads/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
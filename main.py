@@ -1,28 +1,84 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-import logging
 import asyncio
-from app.config import settings
-from app.routers import business, health, whatsapp
-from app.database.init_db import create_tables
-from app.tasks.session_tasks import start_session_cleanup_task
+from app.config import DEFAULT_SECRET_KEY, settings
+from app.logging_config import setup_logging
+from app.routers import archive, business, campaign, health, knowledge, whatsapp, debug
+from app.middleware.profiling import ProfilingMiddleware
+from app.services.cache_invalidation import invalidation_bus
+from app.services.gemini_service import GeminiService
+from app.services.webhook_recorder import webhook_recorder
+from app.tasks.scheduler import scheduler
+from app.tasks.analytics_tasks import update_daily_stats
+from app.tasks.archive_tasks import archive_closed_sessions, maintain_message_partitions
+from app.tasks.campaign_tasks import dispatch_campaigns
+from app.tasks.session_tasks import close_inactive_sessions
+from app.tasks.summary_tasks import summarize_closed_sessions
 from contextlib import asynccontextmanager
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO if settings.DEBUG_MODE else logging.WARNING,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Configurar logging (cola + hilo en segundo plano, sin bloquear el event loop)
+setup_logging()
+
+# El esquema de la base de datos se gestiona con Alembic (alembic upgrade head)
+# o, en desarrollo, con: python -m app.database.init_db
 
-# Inicializar tablas de base de datos (esto se puede comentar después de la primera ejecución)
-# o preferiblemente usar Alembic para migraciones
-create_tables()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Handle startup and shutdown events"""
+    if settings.AUTH_ENABLED and settings.SECRET_KEY == DEFAULT_SECRET_KEY:
+        # Con la clave pública por defecto cualquiera podría firmar sus propios JWT
+        raise RuntimeError("SECRET_KEY must be set when AUTH_ENABLED is true")
+    
+    # Precargar el cliente de Gemini en segundo plano sin retrasar el arranque
+    asyncio.get_running_loop().run_in_executor(None, GeminiService.warm_up)
+    
+    # Trabajos periódicos: solo el worker líder de cada uno lo ejecuta
+    scheduler.register(
+        "session_cleanup",
+        settings.SESSION_CLEANUP_INTERVAL_SECONDS,
+        close_inactive_sessions
+    )
+    scheduler.register(
+        "session_summaries",
+        settings.SUMMARY_INTERVAL_SECONDS,
+        summarize_closed_sessions
+    )
+    scheduler.register(
+        "session_archive",
+        settings.ARCHIVE_INTERVAL_SECONDS,
+        archive_closed_sessions
+    )
+    scheduler.register(
+        "daily_stats_rollup",
+        settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS,
+        update_daily_stats
+    )
+    scheduler.register(
+        "campaign_dispatch",
+        settings.CAMPAIGN_DISPATCH_INTERVAL_SECONDS,
+        dispatch_campaigns
+    )
+    scheduler.register(
+        "message_partitions",
+        settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+        maintain_message_partitions
+    )
+    await scheduler.start()
+    
+    # Invalidación de cachés entre workers (LISTEN/NOTIFY)
+    invalidation_bus.start()
+    yield
+    invalidation_bus.stop()
+    await scheduler.stop()
+    # Cerrar el segmento de grabación en curso para que se pueda reproducir
+    webhook_recorder.stop()
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="Backend API for Whats2Want",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -34,26 +90,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Handle startup and shutdown events"""
-    # Start background tasks on startup
-    cleanup_task = asyncio.create_task(start_session_cleanup_task())
-    yield
-    # Clean up on shutdown if needed
-    cleanup_task.cancel()
-    try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        pass
-
-# Use the lifespan context manager when creating the FastAPI app
-app = FastAPI(
-    title=settings.APP_NAME,
-    description="Backend API for Whats2Want",
-    version="0.1.0",
-    lifespan=lifespan
-)
+# Profiling opcional de peticiones lentas (sin coste cuando está desactivado)
+app.add_middleware(ProfilingMiddleware)
 
 @app.get("/")
 async def read_root():
@@ -63,7 +101,12 @@ async def read_root():
 app.include_router(health.router, prefix="/api/v1")
 app.include_router(whatsapp.router, prefix="/api/v1")
 app.include_router(business.router, prefix="/api/v1")
+app.include_router(campaign.router, prefix="/api/v1")
+app.include_router(knowledge.router, prefix="/api/v1")
+app.include_router(archive.router, prefix="/api/v1")
+app.include_router(debug.router, prefix="/api/v1")
 
 if __name__ == "__main__":
     port = int(settings.PORT) if settings.PORT else 8000
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=settings.DEBUG_MODE)
\ No newline at end of file
+    # log_config=None: uvicorn no reconfigura sus loggers; setup_logging los envía a la cola
+    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=settings.DEBUG_MODE, log_config=None)
@@ -3,6 +3,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
 import os
+import re
 import sys
 from dotenv import load_dotenv
 
@@ -27,16 +28,33 @@ from app.models.contact import Contact
 from app.models.message import Message
 from app.models.conversation_session import ConversationSession
 from app.models.business import Business
+from app.models.webhook_job import WebhookJob
+from app.models.analytics import BusinessDailyStats, RollupWatermark
+from app.models.api_token import ApiToken
+from app.models.campaign import Campaign, CampaignRecipient
+from app.models.knowledge import KnowledgeItem
 from app.database.db import Base
 
 target_metadata = Base.metadata
 
+# Particiones mensuales de messages (app/database/partitions.py): no están en
+# los modelos, las crea y elimina el propio job de particiones
+PARTITION_TABLE = re.compile(r"^messages_(legacy|\d{4}_\d{2})$")
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and PARTITION_TABLE.match(name):
+        return False
+    if type_ == "index" and reflected and PARTITION_TABLE.match(object.table.name):
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -53,8 +71,13 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # SQLite no sabe añadir ni quitar restricciones con ALTER TABLE: en
+        # modo batch Alembic recrea la tabla (también en las autogeneradas)
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=connection.dialect.name == "sqlite",
         )
 
         with context.begin_transaction():
@@ -1,7 +1,7 @@
 """Add conversation sessions
 
 Revision ID: 60d60d53fb68
-Revises: cf399fe20568
+Revises: 9c4d2e7a1b30
 Create Date: 2025-03-17 20:31:48.370189
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '60d60d53fb68'
-down_revision: Union[str, None] = 'cf399fe20568'
+down_revision: Union[str, None] = '9c4d2e7a1b30'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
@@ -21,14 +21,17 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.add_column('messages', sa.Column('session_id', sa.Integer(), nullable=True))
-    op.create_foreign_key(None, 'messages', 'conversation_sessions', ['session_id'], ['id'])
+    # En batch para SQLite; el nombre es el que Postgres pone por defecto
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.add_column(sa.Column('session_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('messages_session_id_fkey', 'conversation_sessions', ['session_id'], ['id'])
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_constraint(None, 'messages', type_='foreignkey')
-    op.drop_column('messages', 'session_id')
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_constraint('messages_session_id_fkey', type_='foreignkey')
+        batch_op.drop_column('session_id')
     # ### end Alembic commands ###
@@ -0,0 +1,48 @@
+"""Create conversation sessions
+
+Revision ID: 9c4d2e7a1b30
+Revises: cf399fe20568
+Create Date: 2026-10-19 17:05:12.418230
+
+La tabla conversation_sessions la creaba create_all al importar la app, y
+ninguna revisión la creaba: 60d60d53fb68 le añade una FK y efbf6307ced5 una
+columna, así que la cadena no podía construir una base de datos vacía. Esta
+revisión la crea con las columnas que tenía entonces; en las bases de datos
+donde ya existe (creadas por create_all) no hace nada.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d2e7a1b30'
+down_revision: Union[str, None] = 'cf399fe20568'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table('conversation_sessions'):
+        return
+    op.create_table('conversation_sessions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('last_activity', sa.DateTime(), nullable=True),
+    sa.Column('ended_at', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('context', sa.String(length=500), nullable=True),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_conversation_sessions_id'), 'conversation_sessions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_conversation_sessions_id'), table_name='conversation_sessions')
+    op.drop_table('conversation_sessions')
@@ -0,0 +1,47 @@
+"""Add webhook jobs queue
+
+Revision ID: a3c5e1f2b7d4
+Revises: 6d2de134c89d
+Create Date: 2026-10-19 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e1f2b7d4'
+down_revision: Union[str, None] = '6d2de134c89d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('webhook_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('ordering_key', sa.String(length=64), nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(length=64), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_webhook_jobs_status_available_at', 'webhook_jobs', ['status', 'available_at'], unique=False)
+    op.create_index('ix_webhook_jobs_ordering_key_id', 'webhook_jobs', ['ordering_key', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_jobs_ordering_key_id', table_name='webhook_jobs')
+    op.drop_index('ix_webhook_jobs_status_available_at', table_name='webhook_jobs')
+    op.drop_table('webhook_jobs')
@@ -0,0 +1,50 @@
+"""Align message indexes with the partitioned schema
+
+Revision ID: a4d9e2f7c1b8
+Revises: e7c1f4b9a2d6
+Create Date: 2026-10-19 17:20:37.902114
+
+b7e2d4c9a1f0 cambió los índices de messages solo en Postgres, donde la tabla
+pasa a estar particionada y un índice único tiene que incluir la clave de
+partición: wa_message_id deja de ser único por sí solo y lo es junto con
+`timestamp`, y session_id gana un índice. Esta revisión aplica lo mismo en
+el resto de bases de datos (SQLite), para que el modelo y el esquema migrado
+coincidan en todas. En Postgres no hace nada.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d9e2f7c1b8'
+down_revision: Union[str, None] = 'e7c1f4b9a2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        return
+    op.execute("UPDATE messages SET timestamp = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE timestamp IS NULL")
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=False)
+        batch_op.drop_index('ix_messages_wa_message_id')
+        batch_op.create_index('ix_messages_wa_message_id', ['wa_message_id'], unique=False)
+        batch_op.create_index('uq_messages_wa_message_id_timestamp', ['wa_message_id', 'timestamp'], unique=True)
+        batch_op.create_index('ix_messages_session_id', ['session_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        return
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_index('ix_messages_session_id')
+        batch_op.drop_index('uq_messages_wa_message_id_timestamp')
+        batch_op.drop_index('ix_messages_wa_message_id')
+        batch_op.create_index('ix_messages_wa_message_id', ['wa_message_id'], unique=True)
+        batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=True)
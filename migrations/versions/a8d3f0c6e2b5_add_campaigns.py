@@ -0,0 +1,68 @@
+"""Add campaigns and campaign_recipients tables
+
+Revision ID: a8d3f0c6e2b5
+Revises: f2b9d7a4c8e1
+Create Date: 2026-10-19 19:22:48.306117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3f0c6e2b5'
+down_revision: Union[str, None] = 'f2b9d7a4c8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('campaigns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('template', sa.Text(), nullable=False),
+    sa.Column('variables', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('rate_per_second', sa.Float(), nullable=False),
+    sa.Column('total_recipients', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_campaigns_business_id'), 'campaigns', ['business_id'], unique=False)
+    op.create_table('campaign_recipients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=False),
+    sa.Column('wa_id', sa.String(length=30), nullable=False),
+    sa.Column('variables', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('wa_message_id', sa.String(length=100), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('campaign_id', 'contact_id', name='uq_campaign_recipients_campaign_contact')
+    )
+    op.create_index('ix_campaign_recipients_campaign_status_id', 'campaign_recipients', ['campaign_id', 'status', 'id'], unique=False)
+    op.create_index(op.f('ix_campaign_recipients_wa_message_id'), 'campaign_recipients', ['wa_message_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_campaign_recipients_wa_message_id'), table_name='campaign_recipients')
+    op.drop_index('ix_campaign_recipients_campaign_status_id', table_name='campaign_recipients')
+    op.drop_table('campaign_recipients')
+    op.drop_index(op.f('ix_campaigns_business_id'), table_name='campaigns')
+    op.drop_table('campaigns')
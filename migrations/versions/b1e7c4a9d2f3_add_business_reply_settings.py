@@ -0,0 +1,32 @@
+"""Add AI reply settings to businesses
+
+Revision ID: b1e7c4a9d2f3
+Revises: a8d3f0c6e2b5
+Create Date: 2026-10-19 21:12:44.301958
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1e7c4a9d2f3'
+down_revision: Union[str, None] = 'a8d3f0c6e2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('businesses', sa.Column('reply_deadline_ms', sa.Integer(), nullable=True))
+    op.add_column('businesses', sa.Column('holding_message', sa.Text(), nullable=True))
+    op.add_column('businesses', sa.Column('late_reply_policy', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('businesses', 'late_reply_policy')
+    op.drop_column('businesses', 'holding_message')
+    op.drop_column('businesses', 'reply_deadline_ms')
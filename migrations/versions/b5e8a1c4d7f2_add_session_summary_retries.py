@@ -0,0 +1,35 @@
+"""Add summary retry columns to conversation sessions
+
+Revision ID: b5e8a1c4d7f2
+Revises: a4d9e2f7c1b8
+Create Date: 2026-10-19 17:41:26.530871
+
+Las sesiones que Gemini no resume se reintentan con espera exponencial y un
+máximo de intentos, en lugar de quedarse en la cabeza de la cola.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8a1c4d7f2'
+down_revision: Union[str, None] = 'a4d9e2f7c1b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('conversation_sessions') as batch_op:
+        batch_op.add_column(sa.Column('summary_attempts', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('summary_retry_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('conversation_sessions') as batch_op:
+        batch_op.drop_column('summary_retry_at')
+        batch_op.drop_column('summary_attempts')
@@ -0,0 +1,108 @@
+"""Partition messages by month and add session archive columns
+
+Revision ID: b7e2d4c9a1f0
+Revises: a3c5e1f2b7d4
+Create Date: 2026-10-19 12:40:05.118734
+
+En Postgres, messages pasa a estar particionada por rango de `timestamp`. La
+tabla existente no se copia: se adjunta como partición messages_legacy (desde
+MINVALUE hasta el primer mes particionado), así que la migración solo
+reconstruye la clave primaria y el índice único, que ahora incluyen
+`timestamp` (requisito de Postgres). En otras bases de datos solo se añaden
+las columnas de archivo de conversation_sessions.
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4c9a1f0'
+down_revision: Union[str, None] = 'a3c5e1f2b7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversation_sessions', sa.Column('archive_path', sa.String(length=255), nullable=True))
+    op.add_column('conversation_sessions', sa.Column('archived_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_conversation_sessions_archive_candidates', 'conversation_sessions', ['is_active', 'ended_at'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # La clave de partición no admite NULL
+    op.execute("UPDATE messages SET timestamp = COALESCE(created_at, now()) WHERE timestamp IS NULL")
+    op.execute("ALTER TABLE messages ALTER COLUMN timestamp SET NOT NULL")
+
+    # Primer mes particionado: el siguiente al mensaje más reciente (y como mínimo el próximo)
+    latest = bind.execute(sa.text("SELECT max(timestamp) FROM messages")).scalar()
+    boundary = _add_months(date.today().replace(day=1), 1)
+    if latest is not None and latest.date() >= boundary:
+        boundary = _add_months(latest.date().replace(day=1), 1)
+
+    # La tabla actual se convierte en la partición legacy
+    op.execute("ALTER TABLE messages DROP CONSTRAINT messages_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_messages_wa_message_id")
+    op.execute("ALTER INDEX IF EXISTS ix_messages_id RENAME TO ix_messages_legacy_id")
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER TABLE messages_legacy ADD CONSTRAINT messages_legacy_pkey PRIMARY KEY (id, timestamp)")
+
+    op.execute("CREATE TABLE messages (LIKE messages_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (timestamp)")
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (id, timestamp)")
+    op.execute("ALTER TABLE messages ADD FOREIGN KEY (contact_id) REFERENCES contacts (id)")
+    op.execute("ALTER TABLE messages ADD FOREIGN KEY (session_id) REFERENCES conversation_sessions (id)")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+
+    # Con el CHECK validado, ATTACH PARTITION no necesita volver a recorrer la tabla
+    op.execute(f"ALTER TABLE messages_legacy ADD CONSTRAINT messages_legacy_range CHECK (timestamp < '{boundary.isoformat()}') NOT VALID")
+    op.execute("ALTER TABLE messages_legacy VALIDATE CONSTRAINT messages_legacy_range")
+    op.execute(f"ALTER TABLE messages ATTACH PARTITION messages_legacy FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')")
+    op.execute("ALTER TABLE messages_legacy DROP CONSTRAINT messages_legacy_range")
+
+    # Índices del padre (se adjuntan los equivalentes existentes de la partición legacy)
+    op.execute("CREATE INDEX ix_messages_id ON messages (id)")
+    op.execute("CREATE INDEX ix_messages_wa_message_id ON messages (wa_message_id)")
+    op.execute("CREATE UNIQUE INDEX uq_messages_wa_message_id_timestamp ON messages (wa_message_id, timestamp)")
+    op.execute("CREATE INDEX ix_messages_session_id ON messages (session_id)")
+
+    for offset in range(MONTHS_AHEAD):
+        month = _add_months(boundary, offset)
+        op.execute(
+            f"CREATE TABLE messages_{month:%Y_%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Volver a una tabla normal copiando los mensajes de todas las particiones
+        op.execute("CREATE TABLE messages_plain (LIKE messages INCLUDING DEFAULTS)")
+        op.execute("INSERT INTO messages_plain SELECT * FROM messages")
+        op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages_plain.id")
+        op.execute("DROP TABLE messages CASCADE")
+        op.execute("ALTER TABLE messages_plain RENAME TO messages")
+        op.execute("ALTER TABLE messages ALTER COLUMN timestamp DROP NOT NULL")
+        op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (id)")
+        op.execute("ALTER TABLE messages ADD FOREIGN KEY (contact_id) REFERENCES contacts (id)")
+        op.execute("ALTER TABLE messages ADD FOREIGN KEY (session_id) REFERENCES conversation_sessions (id)")
+        op.execute("CREATE INDEX ix_messages_id ON messages (id)")
+        op.execute("CREATE UNIQUE INDEX ix_messages_wa_message_id ON messages (wa_message_id)")
+
+    op.drop_index('ix_conversation_sessions_archive_candidates', table_name='conversation_sessions')
+    op.drop_column('conversation_sessions', 'archived_at')
+    op.drop_column('conversation_sessions', 'archive_path')
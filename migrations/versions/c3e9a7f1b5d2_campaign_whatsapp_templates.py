@@ -0,0 +1,37 @@
+"""Send campaigns as approved WhatsApp templates
+
+Revision ID: c3e9a7f1b5d2
+Revises: f6c2a9d4e8b3
+Create Date: 2026-10-19 21:14:07.538216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a7f1b5d2'
+down_revision: Union[str, None] = 'f6c2a9d4e8b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las campañas anteriores no tienen plantilla aprobada: sus envíos pendientes fallan
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.add_column(sa.Column('template_name', sa.String(length=512), nullable=True))
+        batch_op.add_column(sa.Column('template_language', sa.String(length=20), server_default='es', nullable=False))
+        batch_op.add_column(sa.Column('template_components', sa.Text(), nullable=True))
+        batch_op.drop_column('template')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.add_column(sa.Column('template', sa.Text(), server_default='', nullable=False))
+        batch_op.drop_column('template_components')
+        batch_op.drop_column('template_language')
+        batch_op.drop_column('template_name')
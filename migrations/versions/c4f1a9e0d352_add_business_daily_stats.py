@@ -0,0 +1,58 @@
+"""Add business daily stats rollups
+
+Revision ID: c4f1a9e0d352
+Revises: b7e2d4c9a1f0
+Create Date: 2026-10-19 16:05:47.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a9e0d352'
+down_revision: Union[str, None] = 'b7e2d4c9a1f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('business_daily_stats',
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('messages_in', sa.Integer(), nullable=False),
+    sa.Column('messages_out', sa.Integer(), nullable=False),
+    sa.Column('sessions_started', sa.Integer(), nullable=False),
+    sa.Column('sessions_timed_out', sa.Integer(), nullable=False),
+    sa.Column('sessions_closed_by_user', sa.Integer(), nullable=False),
+    sa.Column('ai_replies', sa.Integer(), nullable=False),
+    sa.Column('ai_fallbacks', sa.Integer(), nullable=False),
+    sa.Column('ai_latency_ms_sum', sa.Integer(), nullable=False),
+    sa.Column('ai_latency_ms_max', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('business_id', 'day')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=True),
+    sa.Column('next_id', sa.Integer(), nullable=True),
+    sa.Column('last_time', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.add_column('messages', sa.Column('ai_latency_ms', sa.Integer(), nullable=True))
+    op.add_column('messages', sa.Column('ai_fallback', sa.Boolean(), nullable=True))
+    op.create_index('ix_conversation_sessions_started_at', 'conversation_sessions', ['started_at'], unique=False)
+    op.create_index('ix_conversation_sessions_ended_at', 'conversation_sessions', ['ended_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversation_sessions_ended_at', table_name='conversation_sessions')
+    op.drop_index('ix_conversation_sessions_started_at', table_name='conversation_sessions')
+    op.drop_column('messages', 'ai_fallback')
+    op.drop_column('messages', 'ai_latency_ms')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('business_daily_stats')
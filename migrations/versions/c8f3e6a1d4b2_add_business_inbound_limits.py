@@ -0,0 +1,30 @@
+"""Add inbound rate limits to businesses
+
+Revision ID: c8f3e6a1d4b2
+Revises: b1e7c4a9d2f3
+Create Date: 2026-10-19 23:05:17.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f3e6a1d4b2'
+down_revision: Union[str, None] = 'b1e7c4a9d2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('businesses', sa.Column('inbound_rate_per_minute', sa.Integer(), nullable=True))
+    op.add_column('businesses', sa.Column('inbound_burst', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('businesses', 'inbound_burst')
+    op.drop_column('businesses', 'inbound_rate_per_minute')
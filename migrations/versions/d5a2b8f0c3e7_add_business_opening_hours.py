@@ -0,0 +1,28 @@
+"""Add opening hours to businesses
+
+Revision ID: d5a2b8f0c3e7
+Revises: c8f3e6a1d4b2
+Create Date: 2026-10-20 10:41:09.216734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a2b8f0c3e7'
+down_revision: Union[str, None] = 'c8f3e6a1d4b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('businesses', sa.Column('opening_hours', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('businesses', 'opening_hours')
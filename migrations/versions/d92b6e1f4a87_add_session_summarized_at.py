@@ -0,0 +1,39 @@
+"""Add summarized_at to conversation sessions
+
+Revision ID: d92b6e1f4a87
+Revises: c4f1a9e0d352
+Create Date: 2026-10-19 17:32:10.884215
+
+Las sesiones ya cerradas se marcan como resumidas para que el trabajo de
+resúmenes en segundo plano no procese todo el histórico al desplegar.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd92b6e1f4a87'
+down_revision: Union[str, None] = 'c4f1a9e0d352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversation_sessions', sa.Column('summarized_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_conversation_sessions_summarized_at', 'conversation_sessions', ['summarized_at'], unique=False)
+    op.execute(
+        sa.text(
+            "UPDATE conversation_sessions SET summarized_at = COALESCE(ended_at, CURRENT_TIMESTAMP) "
+            "WHERE is_active = :inactive"
+        ).bindparams(inactive=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversation_sessions_summarized_at', table_name='conversation_sessions')
+    op.drop_column('conversation_sessions', 'summarized_at')
@@ -0,0 +1,38 @@
+"""Add downloaded media columns to messages
+
+Revision ID: e5a8c3d1f6b9
+Revises: d92b6e1f4a87
+Create Date: 2026-10-19 18:05:41.227604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c3d1f6b9'
+down_revision: Union[str, None] = 'd92b6e1f4a87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('media_id', sa.String(length=100), nullable=True))
+    op.add_column('messages', sa.Column('media_sha256', sa.String(length=64), nullable=True))
+    op.add_column('messages', sa.Column('media_mime_type', sa.String(length=100), nullable=True))
+    op.add_column('messages', sa.Column('media_size', sa.BigInteger(), nullable=True))
+    op.add_column('messages', sa.Column('media_path', sa.String(length=255), nullable=True))
+    op.create_index(op.f('ix_messages_media_sha256'), 'messages', ['media_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_messages_media_sha256'), table_name='messages')
+    op.drop_column('messages', 'media_path')
+    op.drop_column('messages', 'media_size')
+    op.drop_column('messages', 'media_mime_type')
+    op.drop_column('messages', 'media_sha256')
+    op.drop_column('messages', 'media_id')
@@ -38,20 +38,25 @@ def upgrade() -> None:
     sa.PrimaryKeyConstraint('id')
     )
     op.create_index(op.f('ix_businesses_id'), 'businesses', ['id'], unique=False)
-    op.add_column('contacts', sa.Column('business_id', sa.Integer(), nullable=True))
-    op.create_foreign_key(None, 'contacts', 'businesses', ['business_id'], ['id'])
-    op.add_column('conversation_sessions', sa.Column('business_id', sa.Integer(), nullable=True))
-    op.create_foreign_key(None, 'conversation_sessions', 'businesses', ['business_id'], ['id'])
+    # En batch para SQLite; los nombres son los que Postgres pone por defecto
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.add_column(sa.Column('business_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('contacts_business_id_fkey', 'businesses', ['business_id'], ['id'])
+    with op.batch_alter_table('conversation_sessions') as batch_op:
+        batch_op.add_column(sa.Column('business_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('conversation_sessions_business_id_fkey', 'businesses', ['business_id'], ['id'])
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_constraint(None, 'conversation_sessions', type_='foreignkey')
-    op.drop_column('conversation_sessions', 'business_id')
-    op.drop_constraint(None, 'contacts', type_='foreignkey')
-    op.drop_column('contacts', 'business_id')
+    with op.batch_alter_table('conversation_sessions') as batch_op:
+        batch_op.drop_constraint('conversation_sessions_business_id_fkey', type_='foreignkey')
+        batch_op.drop_column('business_id')
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.drop_constraint('contacts_business_id_fkey', type_='foreignkey')
+        batch_op.drop_column('business_id')
     op.drop_index(op.f('ix_businesses_id'), table_name='businesses')
     op.drop_table('businesses')
     # ### end Alembic commands ###
@@ -0,0 +1,29 @@
+"""Add intent fast path opt-out to businesses
+
+Revision ID: f6c2a9d4e8b3
+Revises: b5e8a1c4d7f2
+Create Date: 2026-10-19 18:02:44.915307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c2a9d4e8b3'
+down_revision: Union[str, None] = 'b5e8a1c4d7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('businesses', sa.Column('intent_fast_path', sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('businesses') as batch_op:
+        batch_op.drop_column('intent_fast_path')